@@ -1,2 +1,9 @@
 from ._version import __version__  # noqa
-from .core import AWSLogs  # noqa
\ No newline at end of file
+
+
+def __getattr__(name):
+    if name == "AWSLogs":
+        from .core import AWSLogs
+
+        return AWSLogs
+    raise AttributeError("module {0!r} has no attribute {1!r}".format(__name__, name))
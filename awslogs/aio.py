@@ -0,0 +1,212 @@
+import heapq
+import asyncio
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+
+from . import exceptions
+from .core import AWSLogs
+from .dedup import EventIdWindow
+from .polling import AdaptivePoller
+
+_END = object()
+
+
+class _Failure(object):
+    def __init__(self, exc):
+        self.exc = exc
+
+
+class _AsyncSource(object):
+    """Advances a page iterator of ``AWSLogs`` on ``executor`` in the
+    background, keeping up to ``maxsize`` pages ready.
+
+    Like the iterator, it pauses after every ``None`` until ``resume`` is
+    called, so that watching doesn't poll before the events are consumed.
+    """
+
+    def __init__(self, pages, executor, maxsize=2):
+        self._pages = pages
+        self._executor = executor
+        self._queue = asyncio.Queue(maxsize)
+        self._resume = asyncio.Event()
+        self._task = asyncio.ensure_future(self._prefetch())
+
+    async def _prefetch(self):
+        loop = asyncio.get_event_loop()
+        while True:
+            try:
+                page = await loop.run_in_executor(
+                    self._executor, next, self._pages, _END
+                )
+            except Exception as exc:
+                await self._queue.put(_Failure(exc))
+                return
+            await self._queue.put(page)
+            if page is _END:
+                return
+            if page is None:
+                await self._resume.wait()
+                self._resume.clear()
+
+    async def get(self):
+        """Returns the next page, ``None`` at the end of a round or ``_END``
+        once there are no more pages."""
+        page = await self._queue.get()
+        if isinstance(page, _Failure):
+            raise page.exc
+        return page
+
+    def resume(self):
+        self._resume.set()
+
+    def cancel(self):
+        self._task.cancel()
+
+
+class AsyncAWSLogs(object):
+    """asyncio front end of ``AWSLogs``, taking the same options.
+
+    The blocking boto3 calls run on a thread pool of ``max_in_flight``
+    threads, or on ``executor``, so many tails can share a few threads
+    instead of needing one each. Groups are listed, the streams of every
+    group are listed and the events of every group are fetched
+    concurrently, and ``iter_events`` yields the events as an async
+    iterator. When watching, waiting for new events doesn't block the loop.
+    """
+
+    def __init__(self, executor=None, **kwargs):
+        self.logs = AWSLogs(**kwargs)
+        self._own_executor = executor is None
+        self.executor = executor or ThreadPoolExecutor(
+            max_workers=self.logs.max_in_flight
+        )
+
+    async def close(self):
+        if self._own_executor:
+            self.executor.shutdown(wait=False)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def _run(self, func, *args, **kwargs):
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(self.executor, partial(func, *args, **kwargs))
+
+    async def get_groups(self):
+        """Returns the names of the available log groups."""
+        return await self._run(lambda: list(self.logs.get_groups()))
+
+    async def get_streams(self, log_group_name=None):
+        """Returns the names of the streams in ``log_group_name``."""
+        return await self._run(lambda: list(self.logs.get_streams(log_group_name)))
+
+    async def get_groups_and_streams(self):
+        """Returns the groups to get events from and a dict with the
+        streams selected in each of them, listing them concurrently."""
+        logs = self.logs
+        groups = await self._run(logs._get_log_group_names)
+        if logs.log_stream_name == logs.ALL_WILDCARD:
+            return groups, {}
+
+        def select(group):
+            return list(logs._get_streams_from_pattern(group, logs.log_stream_name))
+
+        selected = await asyncio.gather(*[self._run(select, group) for group in groups])
+        streams = dict(zip(groups, selected))
+        groups = [group for group in groups if streams[group]]
+        if not groups:
+            raise exceptions.NoStreamsFilteredError(logs.log_stream_name)
+        return groups, streams
+
+    async def iter_pages(self):
+        """Yield pages of events, like ``filter_log_events`` responses,
+        merged by timestamp across groups and shards.
+
+        When watching, ``None`` is yielded every time all the events
+        available so far have been yielded, and the next round of requests
+        is issued once the caller asks for more.
+        """
+        groups, streams = await self.get_groups_and_streams()
+        sources = [
+            _AsyncSource(self.logs._iter_source_pages(kwargs), self.executor)
+            for kwargs in self.logs._source_kwargs(groups, streams)
+        ]
+        try:
+            while True:
+                async for page in self._merge_round(sources):
+                    yield page
+                if not self.logs.watch or not sources:
+                    return
+                yield None
+                for source in sources:
+                    source.resume()
+        finally:
+            for source in sources:
+                source.cancel()
+
+    async def _merge_round(self, sources, page_size=1000):
+        """Yield the events of ``sources`` until their next ``None`` merged
+        by timestamp in pages of up to ``page_size`` events. Sources that
+        have ended are removed from ``sources``."""
+        heap = []
+        ended = []
+
+        async def push(index):
+            source = sources[index]
+            while True:
+                page = await source.get()
+                if page is _END:
+                    ended.append(source)
+                    return
+                if page is None:
+                    return
+                events = page.get("events", [])
+                if events:
+                    heapq.heappush(heap, (events[0]["timestamp"], index, 0, events))
+                    return
+
+        await asyncio.gather(*[push(index) for index in range(len(sources))])
+
+        page = []
+        while heap:
+            _, index, position, events = heapq.heappop(heap)
+            page.append(events[position])
+            if position + 1 < len(events):
+                heapq.heappush(
+                    heap,
+                    (events[position + 1]["timestamp"], index, position + 1, events),
+                )
+            else:
+                await push(index)
+            if len(page) >= page_size:
+                yield {"events": page}
+                page = []
+        if page:
+            yield {"events": page}
+
+        for source in ended:
+            sources.remove(source)
+
+    async def iter_events(self):
+        """Yield the events, deduplicated and in timestamp order, as
+        ``LogEvent``. When watching, it waits for new events without end."""
+        logs = self.logs
+        window = EventIdWindow(logs.dedup_window)
+        poller = AdaptivePoller(
+            logs.watch_interval, logs.watch_max_interval, logs.MAX_EVENTS_PER_CALL
+        )
+        received = 0
+        async for page in self.iter_pages():
+            if page is None:
+                if not logs.watch:
+                    return
+                await asyncio.sleep(poller.wait_time(received))
+                received = 0
+                continue
+            for event in page["events"]:
+                if window.add(event["eventId"]):
+                    received += 1
+                    yield event
@@ -1,21 +1,34 @@
 import os
 import sys
+import errno
 import argparse
 
-import boto3
-from botocore.client import ClientError
-from termcolor import colored
-
 from . import exceptions
-from .core import AWSLogs
 from ._version import __version__
 
 
+def AWSLogs(**kwargs):
+    """Returns a ``core.AWSLogs`` for ``kwargs``, importing core only once
+    there is a command to run so that ``--help``, ``--version`` and argument
+    errors stay fast."""
+    from .core import AWSLogs
+
+    return AWSLogs(**kwargs)
+
+
+def _write_error(message, color):
+    from termcolor import colored
+
+    sys.stderr.write(colored("{0}\n".format(message), color))
+
+
 def main(argv=None):
 
     argv = (argv or sys.argv)[1:]
 
-    parser = argparse.ArgumentParser(usage=("%(prog)s [ get | groups | streams ]"))
+    parser = argparse.ArgumentParser(
+        usage=("%(prog)s [ get | export | insights | groups | streams | serve ]")
+    )
     parser.add_argument(
         "--version", action="version", version="%(prog)s " + __version__
     )
@@ -69,6 +82,69 @@ def main(argv=None):
             help="aws endpoint url to services such localstack, fakes3, others",
         )
 
+        parser.add_argument(
+            "--max-tps",
+            dest="max_tps",
+            type=float,
+            default=None,
+            help=(
+                "Maximum number of requests per second sent to AWS for each "
+                "API operation"
+            ),
+        )
+
+        parser.add_argument(
+            "--max-pool-connections",
+            dest="max_pool_connections",
+            type=int,
+            default=os.environ.get("AWSLOGS_MAX_POOL_CONNECTIONS", None),
+            help=(
+                "Size of the pool of HTTP connections to AWS (default: "
+                "enough for the concurrent requests of the command)"
+            ),
+        )
+
+        parser.add_argument(
+            "--connect-timeout",
+            dest="connect_timeout",
+            type=float,
+            default=os.environ.get("AWSLOGS_CONNECT_TIMEOUT", None),
+            help="Seconds to wait for a connection to AWS (default 60)",
+        )
+
+        parser.add_argument(
+            "--read-timeout",
+            dest="read_timeout",
+            type=float,
+            default=os.environ.get("AWSLOGS_READ_TIMEOUT", None),
+            help="Seconds to wait for a response from AWS (default 60)",
+        )
+
+        parser.add_argument(
+            "--retry-mode",
+            dest="retry_mode",
+            choices=["legacy", "standard", "adaptive"],
+            default=os.environ.get("AWS_RETRY_MODE", None),
+            help="botocore retry mode of failed requests",
+        )
+
+        parser.add_argument(
+            "--max-attempts",
+            dest="max_attempts",
+            type=int,
+            default=os.environ.get("AWS_MAX_ATTEMPTS", None),
+            help="Maximum number of attempts of every request, retries included",
+        )
+
+        parser.add_argument(
+            "--tcp-keepalive",
+            action="store_true",
+            dest="tcp_keepalive",
+            default=os.environ.get("AWSLOGS_TCP_KEEPALIVE", "").lower()
+            in ("1", "true", "yes"),
+            help="Enable TCP keepalive on the connections to AWS",
+        )
+
     def add_date_range_arguments(parser, default_start="5m"):
         parser.add_argument(
             "-s",
@@ -81,6 +157,25 @@ def main(argv=None):
 
         parser.add_argument("-e", "--end", type=str, dest="end", help="End time")
 
+    def add_cache_arguments(parser):
+        parser.add_argument(
+            "--no-cache",
+            action="store_false",
+            dest="stream_cache",
+            help="Do not use the local cache of log streams",
+        )
+
+        parser.add_argument(
+            "--cache-ttl",
+            dest="stream_cache_ttl",
+            type=int,
+            default=3600,
+            help=(
+                "Seconds after which the local cache of log streams is "
+                "rebuilt from scratch (default %(default)s)"
+            ),
+        )
+
     subparsers = parser.add_subparsers()
 
     # get
@@ -89,13 +184,25 @@ def main(argv=None):
     add_common_arguments(get_parser)
 
     get_parser.add_argument(
-        "log_group_name", type=str, default="ALL", nargs="?", help="log group name"
+        "log_group_name",
+        type=str,
+        default="ALL",
+        nargs="?",
+        help="log group name, or several comma separated log group names",
     )
 
     get_parser.add_argument(
         "log_stream_name", type=str, default="ALL", nargs="?", help="log stream name"
     )
 
+    get_parser.add_argument(
+        "-p",
+        "--log-group-prefix",
+        action="store",
+        dest="log_group_prefix",
+        help="Get logs from all the groups matching the prefix",
+    )
+
     get_parser.add_argument(
         "-f",
         "--filter-pattern",
@@ -121,7 +228,92 @@ def main(argv=None):
         dest="watch_interval",
         type=int,
         default=1,
-        help="Interval in seconds at which to query for new log lines",
+        help=(
+            "Interval in seconds at which to query for new log lines "
+            "while they keep arriving"
+        ),
+    )
+
+    get_parser.add_argument(
+        "--watch-max-interval",
+        dest="watch_max_interval",
+        type=int,
+        default=10,
+        help=(
+            "Maximum interval in seconds between queries for new log lines. "
+            "While no new lines arrive the interval doubles from "
+            "--watch-interval up to this value (default %(default)s)"
+        ),
+    )
+
+    get_parser.add_argument(
+        "--watch-skew",
+        dest="watch_skew",
+        type=int,
+        default=5,
+        help=(
+            "When watching, query again from this many seconds before the "
+            "newest event seen, to catch events that arrive late "
+            "(default %(default)s)"
+        ),
+    )
+
+    get_parser.add_argument(
+        "--cursor",
+        dest="cursor",
+        metavar="FILE",
+        default=None,
+        help=(
+            "Save where the output got to in FILE, and start from there "
+            "instead of --start if FILE exists"
+        ),
+    )
+
+    get_parser.add_argument(
+        "--store",
+        action="store_true",
+        dest="store",
+        help=(
+            "Keep the events fetched in a local store, and read the time "
+            "ranges it already has from it instead of AWS"
+        ),
+    )
+
+    get_parser.add_argument(
+        "--stats",
+        action="store_true",
+        dest="stats",
+        help="Print request statistics to stderr when exiting",
+    )
+
+    get_parser.add_argument(
+        "--parallel",
+        dest="parallel",
+        type=int,
+        default=1,
+        help=(
+            "Number of concurrent requests used to fetch the time range "
+            "in slices (ignored with --watch)"
+        ),
+    )
+
+    get_parser.add_argument(
+        "--max-in-flight",
+        dest="max_in_flight",
+        type=int,
+        default=None,
+        help="Maximum number of concurrent requests to AWS (default 10)",
+    )
+
+    get_parser.add_argument(
+        "--dedup-window",
+        dest="dedup_window",
+        type=int,
+        default=None,
+        help=(
+            "Number of recent event ids remembered to drop duplicated "
+            "events (default 10000)"
+        ),
     )
 
     get_parser.add_argument(
@@ -154,7 +346,31 @@ def main(argv=None):
         help="Add ingestion time to the output",
     )
 
+    get_parser.add_argument(
+        "-o",
+        "--output",
+        choices=["text", "jsonl", "csv", "raw"],
+        dest="output_format",
+        default="text",
+        help=(
+            "Output format: 'text' (default), 'jsonl' (one JSON object per "
+            "event), 'csv' or 'raw' (just the messages)"
+        ),
+    )
+
+    get_parser.add_argument(
+        "--timestamp-format",
+        choices=["iso", "local", "epoch"],
+        dest="timestamp_format",
+        default="iso",
+        help=(
+            "Format of --timestamp and --ingestion-time: 'iso' (UTC, "
+            "default), 'local' (local time) or 'epoch' (milliseconds)"
+        ),
+    )
+
     add_date_range_arguments(get_parser)
+    add_cache_arguments(get_parser)
 
     get_parser.add_argument(
         "--color",
@@ -170,6 +386,19 @@ def main(argv=None):
         ),
     )
 
+    get_parser.add_argument(
+        "--flush",
+        choices=["auto", "line", "page"],
+        metavar="WHEN",
+        default="auto",
+        help=(
+            "When to flush output. WHEN can be 'line' (after every "
+            "event), 'page' (after every page of events fetched) or "
+            "'auto' (default, 'line' when watching a terminal and "
+            "'page' otherwise)."
+        ),
+    )
+
     get_parser.add_argument(
         "-q",
         "--query",
@@ -178,6 +407,158 @@ def main(argv=None):
         help="JMESPath query to use in filtering the response data",
     )
 
+    # export
+    export_parser = subparsers.add_parser(
+        "export", description="Export logs to compressed NDJSON files"
+    )
+    export_parser.set_defaults(func="export_logs")
+    add_common_arguments(export_parser)
+    add_date_range_arguments(export_parser)
+    add_cache_arguments(export_parser)
+
+    export_parser.add_argument(
+        "log_group_name",
+        type=str,
+        default="ALL",
+        nargs="?",
+        help="log group name, or several comma separated log group names",
+    )
+
+    export_parser.add_argument(
+        "log_stream_name", type=str, default="ALL", nargs="?", help="log stream name"
+    )
+
+    export_parser.add_argument(
+        "-d",
+        "--directory",
+        dest="export_dir",
+        required=True,
+        help="Directory to write the files and the checkpoint to",
+    )
+
+    export_parser.add_argument(
+        "-p",
+        "--log-group-prefix",
+        action="store",
+        dest="log_group_prefix",
+        help="Export logs from all the groups matching the prefix",
+    )
+
+    export_parser.add_argument(
+        "-f",
+        "--filter-pattern",
+        dest="filter_pattern",
+        help="A valid CloudWatch Logs filter pattern to filter the events",
+    )
+
+    export_parser.add_argument(
+        "--compression",
+        choices=["gzip", "zstd", "none"],
+        default="gzip",
+        help="Compression of the files (default %(default)s)",
+    )
+
+    export_parser.add_argument(
+        "--split-size",
+        dest="split_size",
+        type=int,
+        default=None,
+        help="Start a new file every SPLIT_SIZE megabytes of uncompressed events",
+    )
+
+    export_parser.add_argument(
+        "--split-time",
+        dest="split_time",
+        type=int,
+        default=None,
+        help="Start a new file every SPLIT_TIME seconds of events",
+    )
+
+    export_parser.add_argument(
+        "--checkpoint",
+        dest="export_checkpoint",
+        default=None,
+        help="Checkpoint file (default checkpoint.json in the directory)",
+    )
+
+    export_parser.add_argument(
+        "--parallel",
+        dest="parallel",
+        type=int,
+        default=1,
+        help="Number of concurrent requests used to fetch the time range in slices",
+    )
+
+    # insights
+    insights_parser = subparsers.add_parser(
+        "insights", description="Run a CloudWatch Logs Insights query"
+    )
+    insights_parser.set_defaults(func="list_query_results")
+    add_common_arguments(insights_parser)
+    add_date_range_arguments(insights_parser)
+
+    insights_parser.add_argument(
+        "log_group_name",
+        type=str,
+        help="log group name, or several comma separated log group names",
+    )
+
+    insights_parser.add_argument(
+        "query_string", type=str, help="CloudWatch Logs Insights query"
+    )
+
+    insights_parser.add_argument(
+        "-p",
+        "--log-group-prefix",
+        action="store",
+        dest="log_group_prefix",
+        help="Query all the groups matching the prefix",
+    )
+
+    insights_parser.add_argument(
+        "--limit",
+        dest="query_limit",
+        type=int,
+        default=None,
+        help="Maximum number of results returned by every query",
+    )
+
+    insights_parser.add_argument(
+        "--max-queries",
+        dest="max_queries",
+        type=int,
+        default=None,
+        help="Maximum number of queries running at once (default 4)",
+    )
+
+    insights_parser.add_argument(
+        "--slice-hours",
+        dest="slice_hours",
+        type=int,
+        default=None,
+        help=(
+            "Split longer time ranges in several queries running "
+            "concurrently, unless the query uses stats, limit or dedup "
+            "(default 24)"
+        ),
+    )
+
+    insights_parser.add_argument(
+        "-o",
+        "--output",
+        choices=["text", "jsonl"],
+        dest="output_format",
+        default="text",
+        help="Output format: 'text' (tab separated fields, default) or 'jsonl'",
+    )
+
+    insights_parser.add_argument(
+        "--stats",
+        action="store_true",
+        dest="stats",
+        help="Print the query statistics to stderr when done",
+    )
+
     # groups
     groups_parser = subparsers.add_parser("groups", description="List groups")
     groups_parser.set_defaults(func="list_groups")
@@ -196,33 +577,92 @@ def main(argv=None):
     streams_parser.set_defaults(func="list_streams")
     add_common_arguments(streams_parser)
     add_date_range_arguments(streams_parser, default_start="1h")
+    add_cache_arguments(streams_parser)
 
     streams_parser.add_argument("log_group_name", type=str, help="log group name")
 
+    # serve
+    serve_parser = subparsers.add_parser(
+        "serve",
+        description=(
+            "Run a daemon keeping AWS clients, credentials and connections "
+            "warm for the other commands, which run on it while it's up"
+        ),
+    )
+    serve_parser.set_defaults(func="serve")
+    serve_parser.add_argument(
+        "--socket",
+        dest="socket",
+        default=None,
+        help="Path of the Unix socket to listen on (default $AWSLOGS_SOCKET "
+        "or daemon.sock in the cache directory)",
+    )
+
     # Parse input
     options, _ = parser.parse_known_args(argv)
 
+    if not hasattr(options, "func"):
+        parser.print_help()
+        return 1
+
+    from . import daemon
+
+    if options.func == "serve":
+        try:
+            daemon.serve(options.socket)
+        except exceptions.BaseAWSLogsException as exc:
+            _write_error(exc.hint(), "red")
+            return exc.code
+        return 0
+
+    try:
+        code = daemon.forward(vars(options))
+    except KeyboardInterrupt:
+        return 0
+    if code is not None:
+        return code
+    return run(vars(options))
+
+
+def run(options, client_factory=None, exit=None):
+    """Run the command of the parsed ``options`` dict and return its exit
+    code. ``exit``, ``os._exit`` by default, is called with the code to
+    exit with right away."""
+    exit = exit or os._exit
     try:
-        logs = AWSLogs(**vars(options))
-        if not hasattr(options, "func"):
-            parser.print_help()
-            return 1
-        getattr(logs, options.func)()
-    except ClientError as exc:
-        code = exc.response["Error"]["Code"]
-        if code in ("AccessDeniedException", "ExpiredTokenException"):
-            hint = exc.response["Error"].get("Message", "AccessDeniedException")
-            sys.stderr.write(colored("{0}\n".format(hint), "yellow"))
-            return 4
-        raise
+        logs = AWSLogs(client_factory=client_factory, **options)
+        try:
+            getattr(logs, options["func"])()
+        except IOError as exc:
+            if exc.errno != errno.EPIPE:
+                raise
+            # SIGPIPE received, so exit
+            exit(0)
+        except KeyboardInterrupt:
+            # Don't wait for the threads still blocked on requests to AWS
+            exit(130 if options["func"] == "export_logs" else 0)
     except exceptions.BaseAWSLogsException as exc:
-        sys.stderr.write(colored("{0}\n".format(exc.hint()), "red"))
+        _write_error(exc.hint(), "red")
         return exc.code
-    except Exception:
+    except Exception as exc:
+        # Already imported by core if the error came from AWS
+        from botocore.exceptions import ClientError
+
+        if isinstance(exc, ClientError):
+            code = exc.response["Error"]["Code"]
+            if code in ("AccessDeniedException", "ExpiredTokenException"):
+                _write_error(
+                    exc.response["Error"].get("Message", "AccessDeniedException"),
+                    "yellow",
+                )
+                return 4
+            raise
+
+        import boto3
         import platform
         import traceback
 
-        options = vars(options)
+        options = dict(options)
         options["aws_access_key_id"] = "SENSITIVE"
         options["aws_secret_access_key"] = "SENSITIVE"
         options["aws_session_token"] = "SENSITIVE"
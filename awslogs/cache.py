@@ -0,0 +1,119 @@
+import os
+import json
+import time
+import hashlib
+import tempfile
+
+
+def default_cache_dir():
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return os.path.join(base, "awslogs")
+
+
+def cache_path(kind, key, cache_dir=None):
+    """Returns the path of the ``kind`` cache file for the ``key`` tuple,
+    without extension."""
+    digest = hashlib.sha1(json.dumps(key, default=str).encode("utf-8")).hexdigest()
+    return os.path.join(cache_dir or default_cache_dir(), kind, digest)
+
+
+def save_json(path, data):
+    """Atomically write ``data`` as JSON to ``path``."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    # A temporary file of its own for every call, as the daemon runs
+    # commands writing the same files concurrently in one process
+    fd, tmp = tempfile.mkstemp(
+        dir=directory or None, prefix=os.path.basename(path) + ".", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+class StreamCache(object):
+    """On-disk cache of the ``describe_log_streams`` results of a group.
+
+    Only what awslogs needs is kept for every stream: its name,
+    ``firstEventTimestamp``, ``lastEventTimestamp`` and ``lastIngestionTime``.
+    The highest ``lastEventTimestamp`` seen is the high-water mark used to
+    refresh the cache incrementally. Caches older than ``ttl`` seconds are
+    discarded and rebuilt from scratch.
+    """
+
+    FIELDS = ("firstEventTimestamp", "lastEventTimestamp", "lastIngestionTime")
+
+    def __init__(self, path, ttl):
+        self.path = path
+        self.ttl = ttl
+        self.created = None
+        self.high_water = None
+        self.streams = {}
+
+    @classmethod
+    def for_group(cls, key, ttl, cache_dir=None):
+        """Returns the cache for the group identified by the ``key`` tuple,
+        usually the profile, region, endpoint and group name."""
+        return cls(cache_path("streams", key, cache_dir) + ".json", ttl)
+
+    def load(self):
+        """Load the cache from disk. Returns ``False`` if there is no usable
+        cache, in which case it has to be filled from scratch."""
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            created = data["created"]
+            high_water = data["high_water"]
+            streams = data["streams"]
+        except (IOError, OSError, ValueError, KeyError, TypeError):
+            return False
+
+        if time.time() - created > self.ttl:
+            return False
+
+        self.created = created
+        self.high_water = high_water
+        self.streams = streams
+        return True
+
+    def reset(self):
+        self.created = time.time()
+        self.high_water = None
+        self.streams = {}
+
+    def update(self, stream):
+        """Add or refresh a ``describe_log_streams`` stream."""
+        self.streams[stream["logStreamName"]] = [stream.get(f) for f in self.FIELDS]
+        last_event = stream.get("lastEventTimestamp")
+        if last_event is not None and (
+            self.high_water is None or last_event > self.high_water
+        ):
+            self.high_water = last_event
+
+    def save(self):
+        """Atomically write the cache to disk."""
+        save_json(
+            self.path,
+            {
+                "created": self.created,
+                "high_water": self.high_water,
+                "streams": self.streams,
+            },
+        )
+
+    def __iter__(self):
+        """Yield the cached streams like ``describe_log_streams`` does,
+        ordered by name."""
+        for name in sorted(self.streams):
+            stream = {"logStreamName": name}
+            for field, value in zip(self.FIELDS, self.streams[name]):
+                if value is not None:
+                    stream[field] = value
+            yield stream
@@ -2,26 +2,110 @@ import re
 import sys
 import os
 import time
-import errno
-from datetime import datetime, timedelta
-from collections import deque
+import threading
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 
-import boto3
-import botocore
-from botocore.compat import json, total_seconds
-
-import jmespath
+from botocore.exceptions import ClientError
 
 from termcolor import colored
-from dateutil.parser import parse
-from dateutil.tz import tzutc
 
 from . import exceptions
+from .cache import StreamCache
+from .cursor import WatchCursor
+from .dedup import EventIdWindow, TimestampedEventIds
+from .event import LogEvent
+from .export import ExportCheckpoint, ExportWriter
+from .filterpattern import UnsupportedFilterPattern, compile_filter_pattern
+from .insights import InsightsQuery
+from .formatting import (  # noqa
+    TEXT,
+    TimestampFormatter,
+    build_formatter,
+    build_record_formatter,
+    milis2iso,
+)
+from .merge import merge_pages
+from .output import OutputSink
+from .polling import AdaptivePoller
+from .query import compile_query, json_dumps_compact
+from .store import EventStore
+from .throttle import ThrottledClient
+
+_REGEX_SPECIAL_CHARS = frozenset(".^$*+?{}[]\\|()")
+
+
+def _has_top_level_alternation(pattern):
+    """Returns whether ``pattern`` has a ``|`` outside of any group."""
+    depth = 0
+    in_class = False
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == "\\":
+            i += 2
+            continue
+        if in_class:
+            in_class = char != "]"
+        elif char == "[":
+            in_class = True
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif char == "|" and depth == 0:
+            return True
+        i += 1
+    return False
+
+
+def split_literal_prefix(pattern):
+    """Split the ``pattern`` regular expression in the literal prefix every
+    match starts with and the rest of the expression.
+
+    >>> split_literal_prefix("ecs/api/[0-9]+")
+    ('ecs/api/', '[0-9]+')
+    """
+    if _has_top_level_alternation(pattern):
+        return "", pattern
+
+    prefix = []
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        width = 1
+        if char == "\\":
+            # Escaped punctuation is literal, but \d, \w, \A... are not
+            if i + 1 >= len(pattern) or pattern[i + 1].isalnum():
+                break
+            char = pattern[i + 1]
+            width = 2
+        elif char in _REGEX_SPECIAL_CHARS:
+            break
+
+        # Leave quantified characters to the rest of the expression
+        if pattern[i + width : i + width + 1] in ("*", "+", "?", "{"):
+            break
+        prefix.append(char)
+        i += width
+    return "".join(prefix), pattern[i:]
 
 
-def milis2iso(milis):
-    res = datetime.utcfromtimestamp(milis / 1000.0).isoformat()
-    return (res + ".000")[:23] + "Z"
+def split_time_range(start, end, count):
+    """Split the ``[start, end)`` milliseconds range in up to ``count``
+    contiguous ``(start, end)`` slices."""
+    count = max(1, min(count, end - start))
+    bounds = [start + (end - start) * i // count for i in range(count + 1)]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def parse(timestr):
+    """``dateutil.parser.parse``, imported on first use as only absolute
+    dates need it and it is slow to import."""
+    from dateutil.parser import parse
+
+    return parse(timestr)
 
 
 def boto3_client(
@@ -31,7 +115,23 @@ def boto3_client(
     aws_session_token,
     aws_region,
     aws_endpoint_url,
+    rate_limits=None,
+    client_config=None,
 ):
+    """Returns a ``ThrottledClient`` of a CloudWatch Logs client.
+
+    ``client_config`` holds ``botocore.config.Config`` options, like the
+    size of the connection pool and the timeouts. It is a plain dict so that
+    clients made with the same options can be cached by their arguments.
+
+    Unless ``client_config`` sets ``retries``, botocore doesn't retry
+    anything, so that ``ThrottledClient`` sees every throttled request.
+    """
+    # boto3 takes longer to import than anything else awslogs does
+    import boto3
+    import botocore.credentials
+    import botocore.session
+
     core_session = botocore.session.get_session()
     core_session.set_config_variable("profile", aws_profile)
 
@@ -41,15 +141,23 @@ def boto3_client(
     cache_dir = os.path.join(os.path.expanduser("~"), ".aws", "cli", "cache")
     credential_provider.cache = botocore.credentials.JSONFileCache(cache_dir)
 
+    from botocore.config import Config
+
+    client_config = dict(client_config or {})
+    client_config.setdefault("retries", {"total_max_attempts": 1})
+    config = Config(**client_config)
+
     session = boto3.session.Session(botocore_session=core_session)
-    return session.client(
+    client = session.client(
         "logs",
         aws_access_key_id=aws_access_key_id,
         aws_secret_access_key=aws_secret_access_key,
         aws_session_token=aws_session_token,
         region_name=aws_region or None,
         endpoint_url=aws_endpoint_url or None,
+        config=config,
     )
+    return ThrottledClient(client, rate_limits)
 
 
 class AWSLogs(object):
@@ -60,6 +168,20 @@ class AWSLogs(object):
 
     FILTER_LOG_EVENTS_STREAMS_LIMIT = 100
     MAX_EVENTS_PER_CALL = 10000
+    SLICES_PER_WORKER = 4
+    SLICE_MAX_PAGES = 5
+    MAX_IN_FLIGHT = 10
+    # botocore's own default
+    MAX_POOL_CONNECTIONS = 10
+    WATCH_MAX_INTERVAL = 10
+    WATCH_SKEW = 5
+    STREAM_CACHE_TTL = 3600
+    # lastEventTimestamp is eventually consistent and can lag ingestion by
+    # up to an hour, so incremental refreshes go that far past the mark.
+    STREAM_CACHE_LAG = 3600 * 1000
+    CURSOR_SAVE_INTERVAL = 1
+    # Events newer than this are not considered complete in the local store
+    STORE_LAG = 5 * 60 * 1000
     ALL_WILDCARD = "ALL"
 
     def __init__(self, **kwargs):
@@ -74,152 +196,720 @@ class AWSLogs(object):
         self.filter_pattern = kwargs.get("filter_pattern")
         self.watch = kwargs.get("watch")
         self.watch_interval = kwargs.get("watch_interval")
+        if self.watch_interval is None:
+            self.watch_interval = 1
+        self.watch_max_interval = kwargs.get("watch_max_interval")
+        if self.watch_max_interval is None:
+            self.watch_max_interval = self.WATCH_MAX_INTERVAL
+        self.watch_skew = kwargs.get("watch_skew")
+        if self.watch_skew is None:
+            self.watch_skew = self.WATCH_SKEW
+        self.stats = kwargs.get("stats")
+        self.dedup_window = kwargs.get("dedup_window") or self.MAX_EVENTS_PER_CALL
         self.color_preference = kwargs.get("color")
+        self.flush_policy = kwargs.get("flush") or OutputSink.AUTO
+        self.parallel = kwargs.get("parallel") or 1
+        self.max_in_flight = kwargs.get("max_in_flight") or self.MAX_IN_FLIGHT
+        self._in_flight = threading.BoundedSemaphore(self.max_in_flight)
         self.output_stream_enabled = kwargs.get("output_stream_enabled")
         self.output_group_enabled = kwargs.get("output_group_enabled")
         self.output_timestamp_enabled = kwargs.get("output_timestamp_enabled")
         self.output_ingestion_time_enabled = kwargs.get("output_ingestion_time_enabled")
+        self.timestamp_format = kwargs.get("timestamp_format") or TimestampFormatter.ISO
+        self.output_format = kwargs.get("output_format") or TEXT
         self.start = self.parse_datetime(kwargs.get("start"))
         self.end = self.parse_datetime(kwargs.get("end"))
         self.query = kwargs.get("query")
         if self.query is not None:
-            self.query_expression = jmespath.compile(self.query)
+            self.query_expression = compile_query(self.query)
         self.log_group_prefix = kwargs.get("log_group_prefix")
-        self.client = boto3_client(
+        self.stream_cache = kwargs.get("stream_cache")
+        self.stream_cache_ttl = kwargs.get("stream_cache_ttl")
+        if self.stream_cache_ttl is None:
+            self.stream_cache_ttl = self.STREAM_CACHE_TTL
+        self.cache_dir = kwargs.get("cache_dir")
+        self.max_tps = kwargs.get("max_tps")
+        self.cursor = kwargs.get("cursor")
+        self.store = kwargs.get("store")
+        self.query_string = kwargs.get("query_string")
+        self.query_limit = kwargs.get("query_limit")
+        self.max_queries = kwargs.get("max_queries")
+        self.slice_hours = kwargs.get("slice_hours")
+        self.export_dir = kwargs.get("export_dir")
+        self.export_checkpoint = kwargs.get("export_checkpoint")
+        self.compression = kwargs.get("compression") or "gzip"
+        self.split_size = kwargs.get("split_size")
+        self.split_time = kwargs.get("split_time")
+        self.max_pool_connections = (
+            kwargs.get("max_pool_connections") or self.default_pool_connections()
+        )
+        self.connect_timeout = kwargs.get("connect_timeout")
+        self.read_timeout = kwargs.get("read_timeout")
+        self.retry_mode = kwargs.get("retry_mode")
+        self.max_attempts = kwargs.get("max_attempts")
+        self.tcp_keepalive = kwargs.get("tcp_keepalive")
+        rate_limits = None
+        if self.max_tps:
+            rate_limits = dict.fromkeys(ThrottledClient.RATE_LIMITS, self.max_tps)
+        client_factory = kwargs.get("client_factory") or boto3_client
+        self.client = client_factory(
             self.aws_profile,
             self.aws_access_key_id,
             self.aws_secret_access_key,
             self.aws_session_token,
             self.aws_region,
             self.aws_endpoint_url,
+            rate_limits,
+            self.client_config(),
         )
+        # The client can be shared by other commands, like on the daemon, so
+        # only the throttles from now on are reported
+        self._throttles_at_start = Counter()
+        if isinstance(self.client, ThrottledClient):
+            self._throttles_at_start.update(self.client.throttles)
+
+    def default_pool_connections(self):
+        """Returns a connection pool size large enough for every request
+        that can run at once: ``max_in_flight`` ``filter_log_events``
+        requests, the ``parallel`` slices and the Insights queries."""
+        return max(
+            self.MAX_POOL_CONNECTIONS,
+            self.max_in_flight,
+            self.parallel,
+            self.max_queries or InsightsQuery.MAX_QUERIES,
+        )
+
+    def client_config(self):
+        """Returns the ``botocore.config.Config`` options of the client."""
+        config = {"max_pool_connections": self.max_pool_connections}
+        if self.connect_timeout is not None:
+            config["connect_timeout"] = self.connect_timeout
+        if self.read_timeout is not None:
+            config["read_timeout"] = self.read_timeout
+        retries = {}
+        if self.retry_mode:
+            retries["mode"] = self.retry_mode
+        if self.max_attempts:
+            retries["total_max_attempts"] = self.max_attempts
+        if retries:
+            config["retries"] = retries
+        if self.tcp_keepalive:
+            config["tcp_keepalive"] = True
+        return config
 
     def _get_streams_from_pattern(self, group, pattern):
-        """Returns streams in ``group`` matching ``pattern``."""
+        """Returns streams in ``group`` matching ``pattern``.
+
+        The literal prefix of ``pattern`` is used to only ask AWS for the
+        streams starting with it, and just the rest of the pattern is
+        matched locally.
+        """
         pattern = ".*" if pattern == self.ALL_WILDCARD else pattern
-        reg = re.compile("^{0}".format(pattern))
-        for stream in self.get_streams(group):
-            if re.match(reg, stream):
+        prefix, rest = split_literal_prefix(pattern)
+        reg = re.compile(rest)
+        for stream in self.get_streams(group, prefix=prefix):
+            if stream.startswith(prefix) and reg.match(stream, len(prefix)):
                 yield stream
 
-    def list_logs(self):
-        streams = []
+    def _get_log_group_names(self):
+        """Returns the groups to get logs from: the comma separated names in
+        ``log_group_name`` and the groups matching ``log_group_prefix``."""
+        names = []
+        if self.log_group_name and self.log_group_name != self.ALL_WILDCARD:
+            names = [name for name in self.log_group_name.split(",") if name]
+
+        if self.log_group_prefix is not None:
+            names.extend(group for group in self.get_groups() if group not in names)
+            if not names:
+                raise exceptions.NoGroupsFilteredError(self.log_group_prefix)
+        elif not names:
+            names = [self.log_group_name]
+        return names
+
+    def _get_groups_and_streams(self):
+        """Returns the groups to get logs from and a dict with the streams
+        matching ``log_stream_name`` in each of them, empty for ``ALL``."""
+        groups = self._get_log_group_names()
+        streams = {}
         if self.log_stream_name != self.ALL_WILDCARD:
-            streams = list(
-                self._get_streams_from_pattern(
-                    self.log_group_name, self.log_stream_name
+            for group in groups:
+                streams[group] = list(
+                    self._get_streams_from_pattern(group, self.log_stream_name)
+                )
+            groups = [group for group in groups if streams[group]]
+            if len(groups) == 0:
+                raise exceptions.NoStreamsFilteredError(self.log_stream_name)
+        return groups, streams
+
+    def _source_kwargs(self, groups, streams, start=None):
+        """Returns the ``filter_log_events`` kwargs of every request needed
+        to get the events of ``groups`` and ``streams``.
+
+        ``start`` overrides the ``start`` of the instance.
+        """
+        kwargs = {"interleaved": True}
+
+        start = self.start if start is None else start
+        if start:
+            kwargs["startTime"] = start
+
+        if self.end:
+            kwargs["endTime"] = self.end
+
+        if self.filter_pattern:
+            kwargs["filterPattern"] = self.filter_pattern
+
+        # AWS only allows filtering by up to FILTER_LOG_EVENTS_STREAMS_LIMIT
+        # streams at once, so bigger selections are fetched in shards.
+        limit = self.FILTER_LOG_EVENTS_STREAMS_LIMIT
+        sources = []
+        for group in groups:
+            group_kwargs = dict(kwargs, logGroupName=group)
+            group_streams = streams.get(group, [])
+            if not group_streams:
+                sources.append(group_kwargs)
+            for i in range(0, len(group_streams), limit):
+                sources.append(
+                    dict(group_kwargs, logStreamNames=group_streams[i : i + limit])
+                )
+        return sources
+
+    def _iter_responses(self, groups, streams, start=None, next_token=None):
+        """Yield the ``filter_log_events`` responses for ``groups`` and
+        ``streams``, or ``None`` every time they have all been fetched.
+
+        ``start`` overrides the ``start`` of the instance, and
+        ``next_token`` continues a previous run made of a single request.
+        Shards and groups are fetched concurrently and merged back together
+        by timestamp.
+        """
+        sources = self._source_kwargs(groups, streams, start)
+        if len(sources) == 1:
+            if next_token:
+                sources[0]["nextToken"] = next_token
+            return self._iter_source_pages(sources[0])
+        return merge_pages([self._iter_source_pages(kw) for kw in sources])
+
+    def _compile_local_filter(self):
+        """Returns a function telling if a message matches ``filter_pattern``
+        evaluated locally, or ``None`` if that pattern is only supported by
+        AWS."""
+        try:
+            return compile_filter_pattern(self.filter_pattern)
+        except UnsupportedFilterPattern:
+            return None
+
+    def _iter_stored_responses(self, groups, streams, start, match):
+        """Yield responses like ``_iter_responses`` does, but reading the
+        events from the local store, after fetching into it the parts of
+        the time range it doesn't have yet.
+
+        The store holds all the events, so ``filter_pattern`` is applied
+        with ``match``, the local evaluation of it. Ranges newer than
+        ``STORE_LAG`` are fetched every time, as events may still be
+        arriving for them.
+        """
+        store = EventStore.for_account(
+            (
+                self.aws_profile,
+                self.aws_region or getattr(self.client.meta, "region_name", None),
+                self.aws_endpoint_url,
+            ),
+            self.cache_dir,
+        )
+        now = int(time.time() * 1000)
+        start = (self.start if start is None else start) or 0
+        end = (self.end or now) + 1
+
+        for group in groups:
+            group_streams = streams.get(group, [])
+            for range_start, range_end in store.missing_ranges(
+                group, group_streams, start, end
+            ):
+                self._fetch_into_store(
+                    store, group, group_streams, range_start, range_end
                 )
+                covered_end = min(range_end, now - self.STORE_LAG)
+                if covered_end > range_start:
+                    store.add_coverage(group, group_streams, range_start, covered_end)
+
+        try:
+            for response in store.iter_events(groups, streams, start, end):
+                if self.filter_pattern:
+                    response["events"] = [
+                        event for event in response["events"] if match(event["message"])
+                    ]
+                yield response
+            yield None
+        finally:
+            store.close()
+
+    def _fetch_into_store(self, store, group, streams, start, end):
+        """Fetch the events of ``streams`` of ``group``, or all of them, in
+        the ``[start, end)`` range into ``store``."""
+        kwargs = {
+            "interleaved": True,
+            "logGroupName": group,
+            "startTime": start,
+            "endTime": end - 1,
+        }
+        limit = self.FILTER_LOG_EVENTS_STREAMS_LIMIT
+        shards = [
+            dict(kwargs, logStreamNames=streams[i : i + limit])
+            for i in range(0, len(streams), limit)
+        ]
+        for shard in shards or [kwargs]:
+            for response in self._iter_source_pages(shard):
+                if response is None:
+                    break
+                store.add_events(group, response.get("events", []))
+
+    def iter_pages(self, start=None, seen=None):
+        """Yield lists of the new events of every page fetched, in timestamp
+        order, without printing anything.
+
+        Events are ``LogEvent``, deduplicated through ``seen``, an
+        ``EventIdWindow``. When watching, ``None`` is yielded every time all
+        the events available so far have been yielded, and the next ones
+        are waited for once iteration resumes. ``start`` overrides the
+        ``start`` of the instance.
+        """
+        groups, streams = self._get_groups_and_streams()
+        poller = AdaptivePoller(
+            self.watch_interval, self.watch_max_interval, self.MAX_EVENTS_PER_CALL
+        )
+        return self._iter_new_pages(groups, streams, start, seen, poller)
+
+    def iter_events(self, start=None, seen=None):
+        """Yield the new events, like ``iter_pages`` does but one by one.
+        When watching, it waits for new events without end."""
+        for page in self.iter_pages(start, seen):
+            if page is not None:
+                for event in page:
+                    yield event
+
+    def _iter_new_pages(self, groups, streams, start, seen, poller):
+        """Yield the pages of ``iter_pages`` for ``groups`` and ``streams``,
+        waiting as told by ``poller`` between watch rounds.
+
+        AWS API stands for the interleaved parameter that:
+            interleaved (boolean) -- If provided, the API will make a best
+            effort to provide responses that contain events from multiple
+            log streams within the log group interleaved in a single
+            response. That makes some responses return some subsequent
+            response duplicate events. In a similar way when awslogs is
+            called with --watch option, we need to find out which events we
+            have alredy put in the queue in order to not do it several
+            times while waiting for new ones and reusing the same
+            next_token. The size of the ``seen`` window is ``dedup_window``
+            (MAX_EVENTS_PER_CALL by default) in order to not exhaust the
+            memory.
+        """
+        if seen is None:
+            seen = EventIdWindow(self.dedup_window)
+
+        match = None
+        if self.store and not self.watch:
+            match = self._compile_local_filter()
+        if match is not None:
+            responses = self._iter_stored_responses(groups, streams, start, match)
+        else:
+            responses = self._iter_responses(groups, streams, start)
+
+        received = 0
+        for response in responses:
+            if response is None:
+                if not self.watch:
+                    return
+                yield None
+                time.sleep(poller.wait_time(received))
+                received = 0
+                continue
+
+            page = [
+                event
+                for event in response.get("events", [])
+                if seen.add(event["eventId"])
+            ]
+            received += len(page)
+            yield page
+
+    def list_logs(self):
+        seen = EventIdWindow(self.dedup_window)
+        start = None
+        cursor = None
+        if self.cursor:
+            cursor = WatchCursor(self.cursor)
+            if cursor.load():
+                # Streams are resolved from the cursor as well, not to miss
+                # the ones that logged since then but not after --start
+                self.start = start = cursor.timestamp
+                for event_id in cursor.event_ids:
+                    seen.add(event_id)
+
+        groups, streams = self._get_groups_and_streams()
+
+        max_stream_length = max(
+            [len(s) for names in streams.values() for s in names] or [10]
+        )
+        group_length = max([len(group) for group in groups])
+
+        query = self.query_expression if self.query is not None else None
+        if self.output_format == TEXT:
+            sink = OutputSink(policy=self.flush_policy, watch=self.watch)
+            format_event = build_formatter(
+                self.color,
+                group_length=group_length if self.output_group_enabled else None,
+                stream_length=max_stream_length if self.output_stream_enabled else None,
+                timestamp=self.output_timestamp_enabled,
+                ingestion_time=self.output_ingestion_time_enabled,
+                query=query,
+                timestamp_format=self.timestamp_format,
             )
-            if len(streams) > self.FILTER_LOG_EVENTS_STREAMS_LIMIT:
-                raise exceptions.TooManyStreamsFilteredError(
-                    self.log_stream_name,
-                    len(streams),
-                    self.FILTER_LOG_EVENTS_STREAMS_LIMIT,
+        else:
+            policy = self.flush_policy
+            if policy == OutputSink.AUTO and not self.watch:
+                policy = OutputSink.BLOCK
+            sink = OutputSink(
+                policy=policy, watch=self.watch, max_bytes=OutputSink.BLOCK_BYTES
+            )
+            header, format_event = build_record_formatter(self.output_format, query)
+            if header is not None:
+                sink.write(header)
+        poller = AdaptivePoller(
+            self.watch_interval, self.watch_max_interval, self.MAX_EVENTS_PER_CALL
+        )
+
+        def save_cursor():
+            """Save the cursor once everything before it has been written."""
+            if cursor is not None:
+                sink.flush()
+                cursor.save()
+
+        received = 0
+        saved = time.monotonic()
+        try:
+            for page in self._iter_new_pages(groups, streams, start, seen, poller):
+                if page is None:
+                    if received:
+                        save_cursor()
+                    received = 0
+                    continue
+
+                for event in page:
+                    if cursor is not None:
+                        cursor.advance(event["timestamp"], event["eventId"])
+                    sink.write(format_event(event))
+                received += len(page)
+
+                sink.end_page()
+                if (
+                    cursor is not None
+                    and time.monotonic() - saved >= self.CURSOR_SAVE_INTERVAL
+                ):
+                    save_cursor()
+                    saved = time.monotonic()
+
+            sink.flush()
+            save_cursor()
+        except KeyboardInterrupt:
+            try:
+                sink.flush()
+                save_cursor()
+            except IOError:
+                pass
+            print("Closing...\n")
+            self._report_stats(poller)
+            raise
+        self._report_stats(poller)
+
+    def _report_stats(self, poller):
+        """Write statistics about the requests made to stderr if ``stats``
+        is enabled."""
+        if not self.stats:
+            return
+        if self.watch:
+            sys.stderr.write(poller.summary() + "\n")
+        if isinstance(self.client, ThrottledClient):
+            throttles = ", ".join(
+                "{0}={1}".format(operation, count)
+                for operation, count in sorted(
+                    (self.client.throttles - self._throttles_at_start).items()
                 )
-            if len(streams) == 0:
-                raise exceptions.NoStreamsFilteredError(self.log_stream_name)
+            )
+            sys.stderr.write("throttled requests: {0}\n".format(throttles or 0))
+
+    def export_logs(self):
+        """Export the events into NDJSON files in ``export_dir``.
+
+        A checkpoint is saved after every page, so running the same export
+        again after an interruption resumes right where it stopped, over
+        the same time range as the first run.
+        """
+        checkpoint = ExportCheckpoint(
+            self.export_checkpoint or os.path.join(self.export_dir, "checkpoint.json"),
+            {
+                "log_group_name": self.log_group_name,
+                "log_group_prefix": self.log_group_prefix,
+                "log_stream_name": self.log_stream_name,
+                "filter_pattern": self.filter_pattern,
+                "compression": self.compression,
+            },
+        )
+        if checkpoint.load():
+            if checkpoint.complete:
+                sys.stderr.write("Export already complete.\n")
+                return
+        else:
+            checkpoint.start = self.start
+            checkpoint.end = self.end or int(time.time() * 1000)
+        # Streams are resolved over the time range of the first run, so that
+        # a resumed export goes on with the same ones
+        self.start, self.end = checkpoint.start, checkpoint.end
+        groups, streams = self._get_groups_and_streams()
+
+        writer = ExportWriter(
+            self.export_dir,
+            self.compression,
+            max_bytes=self.split_size and self.split_size * 1024 * 1024,
+            max_seconds=self.split_time,
+            state=checkpoint.writer,
+        )
+        interleaving_sanity = EventIdWindow(self.dedup_window)
+        last_timestamp = checkpoint.timestamp
+        last_ids = set(checkpoint.event_ids)
+        exported = 0
+
+        try:
+            for response in self._iter_export_responses(groups, streams, checkpoint):
+                if response is None:
+                    break
+
+                for event in response.get("events", []):
+                    timestamp, event_id = event["timestamp"], event["eventId"]
+                    if timestamp == last_timestamp and event_id in last_ids:
+                        continue
+                    if not interleaving_sanity.add(event_id):
+                        continue
+                    writer.write(timestamp, json_dumps_compact(event.to_dict()) + "\n")
+                    exported += 1
+                    if last_timestamp is None or timestamp > last_timestamp:
+                        last_timestamp, last_ids = timestamp, {event_id}
+                    elif timestamp == last_timestamp:
+                        last_ids.add(event_id)
+
+                checkpoint.writer = writer.sync()
+                checkpoint.timestamp = last_timestamp
+                checkpoint.event_ids = sorted(last_ids)
+                checkpoint.next_token = response.get("nextToken")
+                checkpoint.save()
+        except KeyboardInterrupt:
+            sys.stderr.write("Interrupted, run the same export again to resume.\n")
+            raise
+
+        checkpoint.writer = writer.close()
+        checkpoint.complete = True
+        checkpoint.save()
+        sys.stderr.write(
+            "{0} events exported to {1}\n".format(exported, self.export_dir)
+        )
+
+    def _iter_export_responses(self, groups, streams, checkpoint):
+        """Yield the responses left to export after ``checkpoint``.
+
+        The ``nextToken`` of the checkpoint is used if there is one, falling
+        back to the timestamp of the last event exported if AWS doesn't
+        accept it anymore.
+        """
+        if checkpoint.next_token:
+            responses = self._iter_responses(
+                groups, streams, checkpoint.start, checkpoint.next_token
+            )
+            try:
+                first = next(responses)
+            except ClientError as exc:
+                if exc.response["Error"]["Code"] != "InvalidParameterException":
+                    raise
+            else:
+                yield first
+                for response in responses:
+                    yield response
+                return
+
+        start = checkpoint.start
+        if checkpoint.timestamp is not None:
+            start = checkpoint.timestamp
+        for response in self._iter_responses(groups, streams, start):
+            yield response
+
+    def _iter_source_pages(self, kwargs):
+        """Yield ``filter_log_events`` responses for ``kwargs``, in time
+        slices if ``parallel`` is enabled, with their events as
+        ``LogEvent``."""
+        if self.parallel > 1 and "startTime" in kwargs and not self.watch:
+            pages = self._iter_sliced_pages(kwargs)
+        else:
+            pages = self._iter_pages(kwargs)
 
-        max_stream_length = max([len(s) for s in streams]) if streams else 10
-        group_length = len(self.log_group_name)
+        group = kwargs["logGroupName"]
+        for page in pages:
+            if page is not None:
+                page["events"] = [
+                    LogEvent.from_response(event, group)
+                    for event in page.get("events", [])
+                ]
+            yield page
 
+    def _filter_log_events(self, **kwargs):
+        """Call ``filter_log_events`` keeping at most ``max_in_flight``
+        requests running at once."""
+        with self._in_flight:
+            return self.client.filter_log_events(**kwargs)
+
+    def _iter_pages(self, kwargs):
+        """Yield ``filter_log_events`` responses for ``kwargs``.
+
+        ``None`` is yielded every time there is no next page. When watching,
+        the query is then issued again from a low-water mark ``watch_skew``
+        seconds before the newest event seen, instead of reusing the last
+        ``nextToken``, which AWS may invalidate on long running tails. The
+        events between the mark and the newest one are fetched again, and
+        dropped by keeping their ids.
+        """
         # Note: filter_log_events paginator is broken
         # ! Error during pagination: The same next token was received twice
-        do_wait = object()
-
-        def generator():
-            """Yield events into trying to deduplicate them using a lru queue.
-            AWS API stands for the interleaved parameter that:
-                interleaved (boolean) -- If provided, the API will make a best
-                effort to provide responses that contain events from multiple
-                log streams within the log group interleaved in a single
-                response. That makes some responses return some subsequent
-                response duplicate events. In a similar way when awslogs is
-                called with --watch option, we need to find out which events we
-                have alredy put in the queue in order to not do it several
-                times while waiting for new ones and reusing the same
-                next_token. The site of this queue is MAX_EVENTS_PER_CALL in
-                order to not exhaust the memory.
-            """
-            interleaving_sanity = deque(maxlen=self.MAX_EVENTS_PER_CALL)
-            kwargs = {"logGroupName": self.log_group_name, "interleaved": True}
-
-            if streams:
-                kwargs["logStreamNames"] = streams
-
-            if self.start:
-                kwargs["startTime"] = self.start
-
-            if self.end:
-                kwargs["endTime"] = self.end
-
-            if self.filter_pattern:
-                kwargs["filterPattern"] = self.filter_pattern
-
-            while True:
-                response = self.client.filter_log_events(**kwargs)
+        kwargs = dict(kwargs)
+        start = kwargs.get("startTime")
+        seen = TimestampedEventIds() if self.watch else None
+        while True:
+            response = self._filter_log_events(**kwargs)
+            if seen is not None:
+                response["events"] = [
+                    event
+                    for event in response.get("events", [])
+                    if seen.add(event["timestamp"], event["eventId"])
+                ]
+            yield response
 
-                for event in response.get("events", []):
-                    if event["eventId"] not in interleaving_sanity:
-                        interleaving_sanity.append(event["eventId"])
-                        yield event
+            if "nextToken" in response:
+                kwargs["nextToken"] = response["nextToken"]
+            else:
+                yield None
 
-                if "nextToken" in response:
-                    kwargs["nextToken"] = response["nextToken"]
-                else:
-                    yield do_wait
+                if seen is not None:
+                    kwargs.pop("nextToken", None)
+                    if seen.newest is not None:
+                        low_water = seen.newest - self.watch_skew * 1000
+                        if start is not None:
+                            low_water = max(start, low_water)
+                        seen.prune(low_water)
+                        kwargs["startTime"] = low_water
 
-        def consumer():
-            for event in generator():
+    def _iter_sliced_pages(self, kwargs):
+        """Yield ``filter_log_events`` pages for ``kwargs`` fetching slices of
+        the ``[startTime, endTime]`` range concurrently on ``parallel`` threads.
 
-                if event is do_wait:
-                    if self.watch:
-                        time.sleep(self.watch_interval)
-                        continue
-                    else:
-                        return
-
-                output = []
-                if self.output_group_enabled:
-                    output.append(
-                        self.color(
-                            self.log_group_name.ljust(group_length, " "), "green"
-                        )
+        Slices are yielded back in time order, keeping at most twice
+        ``parallel`` of them running or waiting to be yielded. A slice that
+        needs more than SLICE_MAX_PAGES pages is cut, and what is left of it
+        is split in two new slices. ``None`` is yielded once at the end.
+        """
+        start = kwargs["startTime"]
+        end = kwargs.get("endTime", int(time.time() * 1000)) + 1
+        slices = deque(
+            split_time_range(start, end, self.parallel * self.SLICES_PER_WORKER)
+        )
+        max_in_flight = self.parallel * 2
+        in_flight = deque()
+
+        with ThreadPoolExecutor(max_workers=self.parallel) as executor:
+            while slices or in_flight:
+                while slices and len(in_flight) < max_in_flight:
+                    in_flight.append(
+                        executor.submit(self._fetch_slice, kwargs, *slices.popleft())
                     )
-                if self.output_stream_enabled:
-                    output.append(
-                        self.color(
-                            event["logStreamName"].ljust(max_stream_length, " "), "cyan"
+
+                events, rest = in_flight.popleft().result()
+                if rest is not None:
+                    for bounds in reversed(split_time_range(rest[0], rest[1], 2)):
+                        in_flight.appendleft(
+                            executor.submit(self._fetch_slice, kwargs, *bounds)
                         )
-                    )
-                if self.output_timestamp_enabled:
-                    output.append(self.color(milis2iso(event["timestamp"]), "yellow"))
-                if self.output_ingestion_time_enabled:
-                    output.append(self.color(milis2iso(event["ingestionTime"]), "blue"))
-
-                message = event["message"]
-                if self.query is not None and message[0] == "{":
-                    parsed = json.loads(event["message"])
-                    message = self.query_expression.search(parsed)
-                    if not isinstance(message, str):
-                        message = json.dumps(message)
-                output.append(message.rstrip())
-                print(" ".join(output))
-
-                try:
-                    sys.stdout.flush()
-                except IOError as e:
-                    if e.errno == errno.EPIPE:
-                        # SIGPIPE received, so exit
-                        os._exit(0)
-                    else:
-                        # We don't want to handle any other errors from this
-                        raise
+                yield {"events": events}
+        yield None
 
-        try:
-            consumer()
-        except KeyboardInterrupt:
-            print("Closing...\n")
-            os._exit(0)
+    def _fetch_slice(self, kwargs, start, end):
+        """Fetch the events for ``kwargs`` in the ``[start, end)`` range.
+
+        Returns ``(events, rest)`` where ``rest`` is ``None`` if the whole
+        slice was fetched, or the ``(start, end)`` range still left to fetch
+        if it needed more than SLICE_MAX_PAGES pages.
+        """
+        kwargs = dict(kwargs, startTime=start, endTime=end - 1)
+        events = []
+        pages = 0
+        while True:
+            response = self._filter_log_events(**kwargs)
+            events.extend(response.get("events", []))
+            pages += 1
+
+            if "nextToken" not in response:
+                return events, None
+            kwargs["nextToken"] = response["nextToken"]
+
+            if pages >= self.SLICE_MAX_PAGES and events:
+                # Events come sorted by timestamp, so cut right before the
+                # last one seen in order to not split a timestamp in two.
+                last = events[-1]["timestamp"]
+                if last > start:
+                    return [e for e in events if e["timestamp"] < last], (last, end)
+
+    def run_query(self, query_string, limit=None):
+        """Run the CloudWatch Logs Insights ``query_string`` over the log
+        groups, between ``start`` and ``end``.
+
+        Returns an iterable of the result rows as dicts, yielded as soon as
+        they are available. Its ``statistics`` are filled in as the query
+        completes.
+        """
+        end = self.end or int(time.time() * 1000)
+        return InsightsQuery(
+            self.client,
+            query_string,
+            self._get_log_group_names(),
+            self.start or 0,
+            end,
+            limit=limit,
+            max_queries=self.max_queries,
+            slice_seconds=self.slice_hours and self.slice_hours * 3600,
+        )
+
+    def list_query_results(self):
+        """Prints the results of the Logs Insights ``query_string``."""
+        rows = self.run_query(self.query_string, limit=self.query_limit)
+        if self.output_format == TEXT:
+
+            def format_row(row):
+                return "\t".join(
+                    "" if value is None else value for value in row.values()
+                )
+
+        else:
+            format_row = json_dumps_compact
+
+        sink = OutputSink(policy=self.flush_policy, watch=True)
+        for row in rows:
+            sink.write(format_row(row))
+        sink.flush()
+
+        if self.stats:
+            sys.stderr.write(
+                ", ".join(
+                    "{0}: {1:g}".format(name, value)
+                    for name, value in sorted(rows.statistics.items())
+                )
+                + "\n"
+            )
 
     def list_groups(self):
         """Lists available CloudWatch logs groups"""
@@ -241,24 +931,81 @@ class AWSLogs(object):
             for group in page.get("logGroups", []):
                 yield group["logGroupName"]
 
-    def get_streams(self, log_group_name=None):
-        """Returns available CloudWatch logs streams in ``log_group_name``."""
-        kwargs = {"logGroupName": log_group_name or self.log_group_name}
+    def get_streams(self, log_group_name=None, prefix=None):
+        """Returns available CloudWatch logs streams in ``log_group_name``,
+        only the ones starting with ``prefix`` if given."""
+        log_group_name = log_group_name or self.log_group_name
         window_start = self.start or 0
         window_end = self.end or sys.float_info.max
 
+        if self.stream_cache:
+            streams = self._get_cached_streams(log_group_name, prefix)
+        elif prefix:
+            streams = self._describe_log_streams(
+                logGroupName=log_group_name, logStreamNamePrefix=prefix
+            )
+        else:
+            streams = self._describe_log_streams(logGroupName=log_group_name)
+
+        for stream in streams:
+            if "firstEventTimestamp" not in stream:
+                # This is a specified log stream rather than
+                # a filter on the whole log group, so there's
+                # no firstEventTimestamp.
+                yield stream["logStreamName"]
+            elif max(stream["firstEventTimestamp"], window_start) <= min(
+                stream["lastIngestionTime"], window_end
+            ):
+                yield stream["logStreamName"]
+
+    def _describe_log_streams(self, **kwargs):
+        """Yield the streams ``describe_log_streams`` returns for ``kwargs``."""
         paginator = self.client.get_paginator("describe_log_streams")
         for page in paginator.paginate(**kwargs):
             for stream in page.get("logStreams", []):
-                if "firstEventTimestamp" not in stream:
-                    # This is a specified log stream rather than
-                    # a filter on the whole log group, so there's
-                    # no firstEventTimestamp.
-                    yield stream["logStreamName"]
-                elif max(stream["firstEventTimestamp"], window_start) <= min(
-                    stream["lastIngestionTime"], window_end
-                ):
-                    yield stream["logStreamName"]
+                yield stream
+
+    def _get_cached_streams(self, log_group_name, prefix=None):
+        """Returns the streams in ``log_group_name`` using the on-disk cache.
+
+        A fresh cache is refreshed incrementally, walking the streams from
+        the most recently written one until the cache high-water mark. A
+        missing or expired one is filled with all the streams of the group,
+        unless only the ones starting with ``prefix`` are needed: AWS can
+        list those directly, so the cache is left alone.
+        """
+        cache = StreamCache.for_group(
+            (
+                self.aws_profile,
+                self.aws_region or getattr(self.client.meta, "region_name", None),
+                self.aws_endpoint_url,
+                log_group_name,
+            ),
+            self.stream_cache_ttl,
+            self.cache_dir,
+        )
+
+        if cache.load() and cache.high_water is not None:
+            stop_at = cache.high_water - self.STREAM_CACHE_LAG
+            for stream in self._describe_log_streams(
+                logGroupName=log_group_name, orderBy="LastEventTime", descending=True
+            ):
+                if stream.get("lastEventTimestamp", 0) < stop_at:
+                    break
+                cache.update(stream)
+        elif prefix:
+            return self._describe_log_streams(
+                logGroupName=log_group_name, logStreamNamePrefix=prefix
+            )
+        else:
+            cache.reset()
+            for stream in self._describe_log_streams(logGroupName=log_group_name):
+                cache.update(stream)
+
+        cache.save()
+        if prefix:
+            return (s for s in cache if s["logStreamName"].startswith(prefix))
+        return cache
 
     def color(self, text, color):
         """Returns coloured version of ``text`` if ``color_enabled``."""
@@ -294,7 +1041,7 @@ class AWSLogs(object):
 
         if date.tzinfo:
             if date.utcoffset != 0:
-                date = date.astimezone(tzutc())
+                date = date.astimezone(timezone.utc)
             date = date.replace(tzinfo=None)
 
-        return int(total_seconds(date - datetime(1970, 1, 1))) * 1000
+        return int((date - datetime(1970, 1, 1)).total_seconds()) * 1000
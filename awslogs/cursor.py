@@ -0,0 +1,46 @@
+import json
+
+from .cache import save_json
+
+
+class WatchCursor(object):
+    """Where a previous ``get`` left off, saved to ``path``.
+
+    ``timestamp`` is the newest event printed and ``event_ids`` the ids of
+    the events printed at that timestamp. Starting from ``timestamp`` with
+    those ids already seen prints exactly the events that are new.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.timestamp = None
+        self.event_ids = set()
+
+    def load(self):
+        """Load the cursor from disk. Returns ``False`` if there is no usable
+        cursor."""
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            timestamp = data["timestamp"]
+            event_ids = data["event_ids"]
+        except (IOError, OSError, ValueError, KeyError, TypeError):
+            return False
+
+        self.timestamp = timestamp
+        self.event_ids = set(event_ids)
+        return True
+
+    def advance(self, timestamp, event_id):
+        """Record that the event ``event_id`` at ``timestamp`` was printed."""
+        if self.timestamp is None or timestamp > self.timestamp:
+            self.timestamp, self.event_ids = timestamp, {event_id}
+        elif timestamp == self.timestamp:
+            self.event_ids.add(event_id)
+
+    def save(self):
+        """Atomically write the cursor to disk."""
+        save_json(
+            self.path,
+            {"timestamp": self.timestamp, "event_ids": sorted(self.event_ids)},
+        )
@@ -0,0 +1,335 @@
+import io
+import os
+import sys
+import json
+import array
+import errno
+import socket
+import hashlib
+import threading
+import traceback
+
+from . import exceptions
+from .cache import default_cache_dir
+
+# Commands run by the daemon. Watching and exporting run for long enough
+# that starting a new process doesn't matter, and they have to be stopped
+# with Ctrl-C, so they always run in-process.
+FORWARDED = ("list_logs", "list_groups", "list_streams", "list_query_results")
+
+# Options holding paths, made absolute before running them on the daemon
+PATH_OPTIONS = ("cursor", "cache_dir", "export_dir", "export_checkpoint")
+
+MAX_MESSAGE = 64 * 1024
+
+# Environment variables commands depend on besides the ``AWS_*`` ones: the
+# home directory has the AWS credentials and config files, the cache
+# directory the stream cache and the local store, and ``TZ`` changes how
+# local timestamps are printed
+ENVIRONMENT = ("HOME", "XDG_CACHE_HOME", "TZ")
+
+
+def socket_path():
+    """Returns the path of the socket of the daemon, ``$AWSLOGS_SOCKET`` or
+    ``daemon.sock`` in the cache directory."""
+    return os.environ.get("AWSLOGS_SOCKET") or os.path.join(
+        default_cache_dir(), "daemon.sock"
+    )
+
+
+def environment_digest():
+    """Returns a digest of the environment variables commands depend on:
+    the ``AWS_*`` ones, which change how boto3 finds credentials and
+    regions, and those in ``ENVIRONMENT``."""
+    items = sorted(
+        (k, v)
+        for k, v in os.environ.items()
+        if k.startswith("AWS_") or k in ENVIRONMENT
+    )
+    return hashlib.sha256(json.dumps(items).encode("utf-8")).hexdigest()
+
+
+def _send_message(sock, message, fds=()):
+    data = json.dumps(message).encode("utf-8") + b"\n"
+    ancdata = []
+    if fds:
+        ancdata = [(socket.SOL_SOCKET, socket.SCM_RIGHTS, array.array("i", fds))]
+    sent = sock.sendmsg([data], ancdata)
+    if sent < len(data):
+        sock.sendall(data[sent:])
+
+
+def _receive_message(sock, max_fds=0):
+    """Returns the next JSON line sent through ``sock``, or ``None`` if it
+    was closed, and the file descriptors sent along with it."""
+    fds = array.array("i")
+    ancbufsize = socket.CMSG_LEN(max_fds * fds.itemsize) if max_fds else 0
+    data, ancdata, _, _ = sock.recvmsg(MAX_MESSAGE, ancbufsize)
+    for level, kind, cdata in ancdata:
+        if level == socket.SOL_SOCKET and kind == socket.SCM_RIGHTS:
+            fds.frombytes(cdata[: len(cdata) - len(cdata) % fds.itemsize])
+    while data and not data.endswith(b"\n") and len(data) < MAX_MESSAGE:
+        chunk = sock.recv(MAX_MESSAGE)
+        if not chunk:
+            break
+        data += chunk
+    if not data.endswith(b"\n"):
+        for fd in fds:
+            os.close(fd)
+        return None, []
+    return json.loads(data.decode("utf-8")), list(fds)
+
+
+def forward(options, path=None):
+    """Run the command of ``options`` on the daemon listening on ``path``,
+    writing to the standard output and error of this process.
+
+    Returns its exit code, or ``None`` if it has to run in-process: the
+    command isn't run by the daemon, there is no daemon running or it runs
+    with different environment variables (see ``environment_digest``).
+    """
+    if options.get("func") not in FORWARDED or options.get("watch"):
+        return None
+    try:
+        fds = [sys.stdout.fileno(), sys.stderr.fileno()]
+    except (AttributeError, ValueError, io.UnsupportedOperation):
+        return None
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(path or socket_path())
+    except OSError:
+        sock.close()
+        return None
+
+    options = dict(options)
+    for name in PATH_OPTIONS:
+        if options.get(name):
+            options[name] = os.path.abspath(options[name])
+
+    with sock:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        try:
+            _send_message(
+                sock,
+                {
+                    "options": options,
+                    "environment": environment_digest(),
+                    "encoding": getattr(sys.stdout, "encoding", None) or "utf-8",
+                },
+                fds,
+            )
+        except OSError:
+            # Nothing ran, so it can still run in-process
+            return None
+        try:
+            response, _ = _receive_message(sock)
+        except OSError:
+            response = None
+
+    if response is None:
+        sys.stderr.write("The awslogs daemon stopped while running the command.\n")
+        return 1
+    if response.get("fallback"):
+        return None
+    return response["exit"]
+
+
+class ClientPool(object):
+    """Thread safe cache of the clients made by ``boto3_client``, by the
+    arguments they are made with, so that their credentials and HTTP
+    connections are reused by every command."""
+
+    def __init__(self):
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    def get(self, *args):
+        key = json.dumps(args, sort_keys=True, default=str)
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                from .core import boto3_client
+
+                client = self._clients[key] = boto3_client(*args)
+            return client
+
+
+class _ThreadStream(object):
+    """Stands for ``sys.stdout`` or ``sys.stderr`` in the daemon, writing to
+    the stream of the client whose command runs on the current thread."""
+
+    def __init__(self, default):
+        self._default = default
+        self._local = threading.local()
+
+    def set(self, stream):
+        self._local.stream = stream
+
+    def __getattr__(self, name):
+        return getattr(getattr(self._local, "stream", None) or self._default, name)
+
+
+class _ClientStream(object):
+    """A standard stream of a client, that breaks like a closed pipe once
+    the client is gone."""
+
+    def __init__(self, fd, encoding, gone):
+        self._stream = open(fd, "w", encoding=encoding, errors="replace")
+        self._gone = gone
+
+    def _check(self):
+        if self._gone.is_set():
+            raise BrokenPipeError(errno.EPIPE, "The awslogs client is gone")
+
+    def write(self, data):
+        self._check()
+        return self._stream.write(data)
+
+    def flush(self):
+        self._check()
+        self._stream.flush()
+
+    def close(self):
+        try:
+            self._stream.close()
+        except IOError:
+            pass
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
+def _is_listening(path):
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(path)
+    except OSError:
+        return False
+    finally:
+        sock.close()
+    return True
+
+
+class Daemon(object):
+    """Runs the commands forwarded by ``forward`` through the socket at
+    ``path``, each on its own thread, with the clients of ``ClientPool``.
+
+    While serving, ``sys.stdout`` and ``sys.stderr`` write to the streams
+    of the client whose command runs on the current thread.
+    """
+
+    ACCEPT_TIMEOUT = 0.5
+
+    def __init__(self, path=None):
+        self.path = path or socket_path()
+        if _is_listening(self.path):
+            raise exceptions.DaemonRunningError(self.path)
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory, mode=0o700)
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+        self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        # Only the user running the daemon can connect to it
+        umask = os.umask(0o177)
+        try:
+            self.socket.bind(self.path)
+        finally:
+            os.umask(umask)
+        self.socket.listen(64)
+        self.socket.settimeout(self.ACCEPT_TIMEOUT)
+
+        self.clients = ClientPool()
+        self.environment = environment_digest()
+        self._stopped = threading.Event()
+        self._stdout = self._stderr = None
+
+    def serve(self):
+        """Serve until ``shutdown`` is called."""
+        self._stdout = sys.stdout = _ThreadStream(sys.stdout)
+        self._stderr = sys.stderr = _ThreadStream(sys.stderr)
+        try:
+            while not self._stopped.is_set():
+                try:
+                    conn, _ = self.socket.accept()
+                except socket.timeout:
+                    continue
+                conn.settimeout(None)
+                threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+        finally:
+            self.socket.close()
+            os.unlink(self.path)
+            sys.stdout, sys.stderr = self._stdout._default, self._stderr._default
+
+    def shutdown(self):
+        self._stopped.set()
+
+    def _handle(self, conn):
+        with conn:
+            request, fds = _receive_message(conn, max_fds=2)
+            if request is None or len(fds) != 2:
+                for fd in fds:
+                    os.close(fd)
+                return
+            if request["environment"] != self.environment:
+                for fd in fds:
+                    os.close(fd)
+                _send_message(conn, {"fallback": True})
+                return
+
+            gone = threading.Event()
+
+            def watch_client():
+                # Clients send nothing else, they just close the socket
+                try:
+                    conn.recv(1)
+                except OSError:
+                    pass
+                gone.set()
+
+            threading.Thread(target=watch_client, daemon=True).start()
+            code = self._run_command(request, fds, gone)
+            try:
+                _send_message(conn, {"exit": code})
+            except OSError:
+                pass
+
+    def _run_command(self, request, fds, gone):
+        """Run the command of ``request`` writing to the client ``fds``.
+        Returns its exit code."""
+        from .bin import run
+
+        streams = [_ClientStream(fd, request["encoding"], gone) for fd in fds]
+        self._stdout.set(streams[0])
+        self._stderr.set(streams[1])
+        try:
+            return run(
+                request["options"], client_factory=self.clients.get, exit=sys.exit
+            )
+        except SystemExit as exc:
+            return exc.code or 0
+        except Exception:
+            traceback.print_exc()
+            return 1
+        finally:
+            for stream in streams:
+                try:
+                    stream.flush()
+                except IOError:
+                    pass
+                stream.close()
+            self._stdout.set(None)
+            self._stderr.set(None)
+
+
+def serve(path=None):
+    """Run an awslogs daemon on ``path`` until interrupted."""
+    daemon = Daemon(path)
+    sys.stderr.write("awslogs daemon listening on {0}\n".format(daemon.path))
+    try:
+        daemon.serve()
+    except KeyboardInterrupt:
+        pass
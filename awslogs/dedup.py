@@ -0,0 +1,72 @@
+from collections import deque
+
+
+class EventIdWindow(object):
+    """Bounded set of the most recently seen event ids.
+
+    Behaves like the ``deque(maxlen=...)`` it replaces: once ``maxlen`` ids
+    have been added, adding a new one evicts the oldest. Membership checks
+    are backed by a ``set`` so they are O(1) instead of a linear scan of
+    the whole window.
+    """
+
+    def __init__(self, maxlen):
+        self.maxlen = maxlen
+        self._order = deque()
+        self._ids = set()
+
+    def __contains__(self, event_id):
+        return event_id in self._ids
+
+    def __len__(self):
+        return len(self._order)
+
+    def __iter__(self):
+        """Yield the ids in the window, oldest first."""
+        return iter(self._order)
+
+    def add(self, event_id):
+        """Remember ``event_id``. Returns ``False`` if it was already seen."""
+        if event_id in self._ids:
+            return False
+        if self.maxlen <= 0:
+            return True
+        if len(self._order) >= self.maxlen:
+            self._ids.discard(self._order.popleft())
+        self._order.append(event_id)
+        self._ids.add(event_id)
+        return True
+
+
+class TimestampedEventIds(object):
+    """Ids of the events seen since a low-water mark, grouped by timestamp.
+
+    Queries starting at the low-water mark never return older events
+    again, so ``prune`` forgets about them and the memory used only depends
+    on the events since the mark, not on how many were ever seen.
+    """
+
+    def __init__(self):
+        self._by_timestamp = {}
+        self.newest = None
+
+    def __len__(self):
+        return sum(len(ids) for ids in self._by_timestamp.values())
+
+    def add(self, timestamp, event_id):
+        """Remember ``event_id`` logged at ``timestamp``. Returns ``False``
+        if it was already seen."""
+        ids = self._by_timestamp.get(timestamp)
+        if ids is None:
+            ids = self._by_timestamp[timestamp] = set()
+        elif event_id in ids:
+            return False
+        ids.add(event_id)
+        if self.newest is None or timestamp > self.newest:
+            self.newest = timestamp
+        return True
+
+    def prune(self, low_water):
+        """Forget the ids of the events logged before ``low_water``."""
+        for timestamp in [t for t in self._by_timestamp if t < low_water]:
+            del self._by_timestamp[timestamp]
@@ -0,0 +1,88 @@
+import sys
+from operator import attrgetter
+
+
+class LogEvent(object):
+    """A ``filter_log_events`` event, tagged with its ``logGroupName``.
+
+    Events are buffered while merging, deduplicating and storing them, so
+    they are kept in slotted objects instead of botocore response dicts,
+    with their stream names interned so that all the events of a stream
+    share the same string. They can still be read like those dicts, by
+    their ``filter_log_events`` keys.
+    """
+
+    __slots__ = (
+        "group",
+        "stream",
+        "timestamp",
+        "ingestion_time",
+        "event_id",
+        "message",
+    )
+
+    # filter_log_events key of every slot
+    KEYS = (
+        ("logGroupName", "group"),
+        ("logStreamName", "stream"),
+        ("timestamp", "timestamp"),
+        ("ingestionTime", "ingestion_time"),
+        ("eventId", "event_id"),
+        ("message", "message"),
+    )
+    _GETTERS = {key: attrgetter(slot) for key, slot in KEYS}
+
+    def __init__(self, group, stream, timestamp, ingestion_time, event_id, message):
+        self.group = group
+        self.stream = stream
+        self.timestamp = timestamp
+        self.ingestion_time = ingestion_time
+        self.event_id = event_id
+        self.message = message
+
+    @classmethod
+    def from_response(cls, event, group=None):
+        """Returns the ``filter_log_events`` ``event`` dict of ``group``
+        as a ``LogEvent``."""
+        ingestion_time = event.get("ingestionTime")
+        return cls(
+            group if group is not None else event.get("logGroupName"),
+            sys.intern(event["logStreamName"]),
+            int(event["timestamp"]),
+            int(ingestion_time) if ingestion_time is not None else None,
+            event["eventId"],
+            event["message"],
+        )
+
+    def __getitem__(self, key):
+        return self._GETTERS[key](self)
+
+    def get(self, key, default=None):
+        getter = self._GETTERS.get(key)
+        value = getter(self) if getter is not None else None
+        return default if value is None else value
+
+    def to_dict(self):
+        """Returns the event as a ``filter_log_events`` event dict."""
+        return {
+            key: getattr(self, slot)
+            for key, slot in self.KEYS
+            if getattr(self, slot) is not None
+        }
+
+    def __eq__(self, other):
+        if not isinstance(other, LogEvent):
+            return NotImplemented
+        return all(
+            getattr(self, slot) == getattr(other, slot) for slot in self.__slots__
+        )
+
+    def __repr__(self):
+        return "LogEvent({0!r})".format(self.to_dict())
+
+
+def event_to_dict(event):
+    """Returns ``event``, a ``LogEvent`` or an event dict, as a dict."""
+    if isinstance(event, LogEvent):
+        return event.to_dict()
+    return event
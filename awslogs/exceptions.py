@@ -35,3 +35,51 @@ class NoStreamsFilteredError(BaseAWSLogsException):
         return (
             "No streams match your pattern '{}' for the given time period."
         ).format(self.args[0])
+
+
+class NoGroupsFilteredError(BaseAWSLogsException):
+
+    code = 8
+
+    def hint(self):
+        return "No groups match your prefix '{}'.".format(self.args[0])
+
+
+class CheckpointMismatchError(BaseAWSLogsException):
+
+    code = 9
+
+    def hint(self):
+        return (
+            "The checkpoint '{}' belongs to a different export. Remove it or "
+            "export to another directory."
+        ).format(self.args[0])
+
+
+class MissingDependencyError(BaseAWSLogsException):
+
+    code = 10
+
+    def hint(self):
+        return (
+            "This option needs the '{}' package. Install it with "
+            "'pip install awslogs[{}]'."
+        ).format(self.args[0], self.args[1])
+
+
+class InsightsQueryError(BaseAWSLogsException):
+
+    code = 11
+
+    def hint(self):
+        return "The Logs Insights query '{}' ended with status '{}'.".format(
+            self.args[0], self.args[1]
+        )
+
+
+class DaemonRunningError(BaseAWSLogsException):
+
+    code = 12
+
+    def hint(self):
+        return "An awslogs daemon is already listening on '{}'.".format(self.args[0])
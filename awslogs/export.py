@@ -0,0 +1,207 @@
+import os
+import gzip
+import json
+
+from . import exceptions
+from .cache import save_json
+
+
+class _CompressedFile(object):
+    """Appends compressed data to the file at ``path``.
+
+    Data is written in independent gzip members or zstd frames, which every
+    decompressor reads back as a single stream. ``sync`` ends the current
+    member so that the file is valid up to the returned offset, and a file
+    can be reopened at such an offset to keep appending to it.
+    """
+
+    def __init__(self, path, compression, offset=0):
+        self.compression = compression
+        if offset and os.path.exists(path):
+            self._raw = open(path, "r+b")
+            self._raw.truncate(offset)
+            self._raw.seek(offset)
+        else:
+            self._raw = open(path, "wb")
+        self._member = None
+
+    def _open_member(self):
+        if self.compression == "gzip":
+            return gzip.GzipFile(fileobj=self._raw, mode="wb", mtime=0)
+        if self.compression == "zstd":
+            import zstandard
+
+            return zstandard.ZstdCompressor().stream_writer(self._raw, closefd=False)
+        return None
+
+    def write(self, data):
+        if self._member is None:
+            self._member = self._open_member() or self._raw
+        self._member.write(data)
+
+    def sync(self):
+        """End the current member, flush, and return the size of the file."""
+        if self._member is not None and self._member is not self._raw:
+            self._member.close()
+        self._member = None
+        self._raw.flush()
+        return self._raw.tell()
+
+    def close(self):
+        self.sync()
+        self._raw.close()
+
+
+class ExportWriter(object):
+    """Writes NDJSON lines into numbered, optionally compressed, files in
+    ``directory``.
+
+    A new file is started once the current one holds ``max_bytes`` bytes
+    before compression, or when an event falls in a different window of
+    ``max_seconds`` seconds than the first event of the file. ``state`` is
+    what ``sync`` returned, to continue a previous export.
+    """
+
+    EXTENSIONS = {"gzip": ".gz", "zstd": ".zst", "none": ""}
+
+    def __init__(
+        self,
+        directory,
+        compression="gzip",
+        max_bytes=None,
+        max_seconds=None,
+        state=None,
+    ):
+        if compression not in self.EXTENSIONS:
+            raise ValueError("Unknown compression '{0}'".format(compression))
+        if compression == "zstd":
+            try:
+                import zstandard  # noqa
+            except ImportError:
+                raise exceptions.MissingDependencyError("zstandard", "zstd")
+
+        self.directory = directory
+        self.compression = compression
+        self.max_bytes = max_bytes
+        self.max_window = max_seconds * 1000 if max_seconds else None
+        state = state or {}
+        self.part = state.get("part", 0)
+        self._offset = state.get("offset", 0)
+        self._size = state.get("size", 0)
+        self._window = state.get("window")
+        self._file = None
+
+    def path(self, part):
+        return os.path.join(
+            self.directory,
+            "part-{0:05d}.jsonl{1}".format(part, self.EXTENSIONS[self.compression]),
+        )
+
+    def _is_full(self, window):
+        return window != self._window or (
+            self.max_bytes and self._size >= self.max_bytes
+        )
+
+    def write(self, timestamp, line):
+        """Write ``line``, the NDJSON of an event logged at ``timestamp``."""
+        window = timestamp // self.max_window if self.max_window else None
+        # ``_offset`` without an open file means resuming a previous export
+        if (self._file is not None or self._offset) and self._is_full(window):
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            self.part += 1
+            self._offset = 0
+
+        if self._file is None:
+            if not os.path.isdir(self.directory):
+                os.makedirs(self.directory)
+            if not self._offset:
+                self._size = 0
+                self._window = window
+            self._file = _CompressedFile(
+                self.path(self.part), self.compression, self._offset
+            )
+
+        data = line.encode("utf-8")
+        self._file.write(data)
+        self._size += len(data)
+
+    def sync(self):
+        """Flush everything written so far. Returns the state to resume
+        writing from."""
+        if self._file is not None:
+            self._offset = self._file.sync()
+        return {
+            "part": self.part,
+            "offset": self._offset,
+            "size": self._size,
+            "window": self._window,
+        }
+
+    def close(self):
+        state = self.sync()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        return state
+
+
+class ExportCheckpoint(object):
+    """Progress of an export, saved to ``path`` after every page.
+
+    Besides the time range being exported and where the output files were
+    left, it holds the ``timestamp`` of the last event written, the
+    ``eventIds`` written at that timestamp and the ``nextToken`` of the last
+    page, if any. ``params`` identify the export, so that a checkpoint is
+    never used to resume a different one.
+    """
+
+    def __init__(self, path, params):
+        self.path = path
+        self.params = params
+        self.timestamp = None
+        self.event_ids = []
+        self.next_token = None
+        self.start = None
+        self.end = None
+        self.writer = None
+        self.complete = False
+
+    def load(self):
+        """Load the checkpoint from disk. Returns ``False`` if there is none."""
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (IOError, OSError):
+            return False
+        except ValueError:
+            raise exceptions.CheckpointMismatchError(self.path)
+
+        if data.get("params") != self.params:
+            raise exceptions.CheckpointMismatchError(self.path)
+
+        self.timestamp = data.get("timestamp")
+        self.event_ids = data.get("event_ids", [])
+        self.next_token = data.get("next_token")
+        self.start = data.get("start")
+        self.end = data.get("end")
+        self.writer = data.get("writer")
+        self.complete = data.get("complete", False)
+        return True
+
+    def save(self):
+        """Atomically write the checkpoint to disk."""
+        save_json(
+            self.path,
+            {
+                "params": self.params,
+                "timestamp": self.timestamp,
+                "event_ids": self.event_ids,
+                "next_token": self.next_token,
+                "start": self.start,
+                "end": self.end,
+                "writer": self.writer,
+                "complete": self.complete,
+            },
+        )
@@ -0,0 +1,263 @@
+import re
+from functools import lru_cache
+
+from .query import json_loads
+
+
+class UnsupportedFilterPattern(ValueError):
+    """Raised for filter patterns that can only be evaluated by AWS."""
+
+
+_TERM = re.compile(r'\s*([?-]?)("(?:[^"\\]|\\.)*"|[^\s"]+)')
+
+_JSON_TOKEN = re.compile(
+    r"""\s*(?:
+        (?P<op>&&|\|\||!=|<=|>=|=|<|>|\(|\))
+        |(?P<string>"(?:[^"\\]|\\.)*")
+        |(?P<word>[^\s=!<>()&|"]+)
+    )""",
+    re.VERBOSE,
+)
+_NUMBER = re.compile(r"^-?\d+(\.\d+)?([eE][-+]?\d+)?$")
+_SELECTOR_PART = re.compile(r"\.([^.\[\]]+)|\[(\d+)\]")
+_MISSING = object()
+
+
+def _unquote(token):
+    if token.startswith('"'):
+        return re.sub(r"\\(.)", r"\1", token[1:-1])
+    return token
+
+
+def _compile_terms(pattern):
+    """Compile a pattern of terms, which all have to be in the message,
+    unless prefixed by ``-`` (must not be) or all prefixed by ``?`` (any of
+    them has to be)."""
+    position = 0
+    terms = []
+    while position < len(pattern.rstrip()):
+        match = _TERM.match(pattern, position)
+        if match is None:
+            raise UnsupportedFilterPattern(pattern)
+        terms.append((match.group(1), _unquote(match.group(2))))
+        position = match.end()
+
+    optional = [term for prefix, term in terms if prefix == "?"]
+    if optional:
+        if len(optional) != len(terms):
+            raise UnsupportedFilterPattern(pattern)
+        return lambda message: any(term in message for term in optional)
+
+    required = tuple(term for prefix, term in terms if prefix != "-")
+    excluded = tuple(term for prefix, term in terms if prefix == "-")
+    if not excluded:
+        if len(required) == 1:
+            (term,) = required
+            return lambda message: term in message
+        return lambda message: all(term in message for term in required)
+
+    def match(message):
+        return all(term in message for term in required) and not any(
+            term in message for term in excluded
+        )
+
+    return match
+
+
+def _compile_selector(selector):
+    """Returns a function looking ``$.a.b[0]`` up in parsed JSON, returning
+    ``_MISSING`` if it isn't there."""
+    if not selector.startswith("$"):
+        raise UnsupportedFilterPattern(selector)
+    keys = []
+    position = 1
+    while position < len(selector):
+        match = _SELECTOR_PART.match(selector, position)
+        if match is None:
+            raise UnsupportedFilterPattern(selector)
+        key, index = match.groups()
+        keys.append(key if key is not None else int(index))
+        position = match.end()
+
+    def lookup(data):
+        for key in keys:
+            if isinstance(key, int):
+                if not isinstance(data, list) or key >= len(data):
+                    return _MISSING
+            elif not isinstance(data, dict) or key not in data:
+                return _MISSING
+            data = data[key]
+        return data
+
+    return lookup
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+_NUMERIC_OPERATORS = {
+    "=": lambda a, b: a == b,
+    "!=": lambda a, b: a != b,
+    "<": lambda a, b: a < b,
+    ">": lambda a, b: a > b,
+    "<=": lambda a, b: a <= b,
+    ">=": lambda a, b: a >= b,
+}
+
+
+def _compile_comparison(lookup, operator, kind, value):
+    if kind not in ("word", "string"):
+        raise UnsupportedFilterPattern(value)
+    if kind == "word" and _NUMBER.match(value):
+        number = float(value)
+        compare = _NUMERIC_OPERATORS[operator]
+
+        def match(data):
+            field = lookup(data)
+            return _is_number(field) and compare(field, number)
+
+        return match
+
+    if operator not in ("=", "!="):
+        raise UnsupportedFilterPattern(value)
+    if kind == "string":
+        value = _unquote(value)
+    if "*" in value:
+        regex = re.compile(
+            "^" + ".*".join(re.escape(part) for part in value.split("*")) + "$",
+            re.DOTALL,
+        )
+
+        def equals(field):
+            return regex.match(field) is not None
+
+    else:
+        equals = value.__eq__
+    negate = operator == "!="
+
+    def match(data):
+        field = lookup(data)
+        if not isinstance(field, str):
+            return False
+        return equals(field) is not negate
+
+    return match
+
+
+class _JSONParser(object):
+    """Recursive descent parser of ``{ ... }`` JSON filter patterns into
+    predicates taking the parsed message."""
+
+    def __init__(self, pattern):
+        self.pattern = pattern
+        self.tokens = []
+        position = 0
+        while position < len(pattern.rstrip()):
+            match = _JSON_TOKEN.match(pattern, position)
+            if match is None:
+                raise UnsupportedFilterPattern(pattern)
+            self.tokens.append((match.lastgroup, match.group(match.lastgroup)))
+            position = match.end()
+        self.position = 0
+
+    def peek(self):
+        if self.position < len(self.tokens):
+            return self.tokens[self.position]
+        return None, None
+
+    def next(self, kind=None, value=None):
+        token = self.peek()
+        if token[0] is None or (kind and token[0] != kind):
+            raise UnsupportedFilterPattern(self.pattern)
+        if value is not None and token[1].upper() != value:
+            raise UnsupportedFilterPattern(self.pattern)
+        self.position += 1
+        return token
+
+    def parse(self):
+        predicate = self.parse_or()
+        if self.position != len(self.tokens):
+            raise UnsupportedFilterPattern(self.pattern)
+        return predicate
+
+    def parse_or(self):
+        predicates = [self.parse_and()]
+        while self.peek() == ("op", "||"):
+            self.next()
+            predicates.append(self.parse_and())
+        if len(predicates) == 1:
+            return predicates[0]
+        return lambda data: any(predicate(data) for predicate in predicates)
+
+    def parse_and(self):
+        predicates = [self.parse_primary()]
+        while self.peek() == ("op", "&&"):
+            self.next()
+            predicates.append(self.parse_primary())
+        if len(predicates) == 1:
+            return predicates[0]
+        return lambda data: all(predicate(data) for predicate in predicates)
+
+    def parse_primary(self):
+        if self.peek() == ("op", "("):
+            self.next()
+            predicate = self.parse_or()
+            self.next("op", ")")
+            return predicate
+
+        lookup = _compile_selector(self.next("word")[1])
+        kind, value = self.next()
+        if kind == "word" and value.upper() == "IS":
+            expected = self.next("word")[1].upper()
+            if expected == "NULL":
+                return lambda data: lookup(data) is None
+            if expected in ("TRUE", "FALSE"):
+                flag = expected == "TRUE"
+                return lambda data: lookup(data) is flag
+            raise UnsupportedFilterPattern(self.pattern)
+        if kind == "word" and value.upper() == "NOT":
+            self.next("word", "EXISTS")
+            return lambda data: lookup(data) is _MISSING
+        if kind != "op" or value in ("(", ")", "&&", "||"):
+            raise UnsupportedFilterPattern(self.pattern)
+        return _compile_comparison(lookup, value, *self.next())
+
+
+def _compile_json(pattern):
+    predicate = _JSONParser(pattern.strip()[1:-1]).parse()
+
+    def match(message):
+        if not message.startswith("{"):
+            return False
+        try:
+            data = json_loads(message)
+        except ValueError:
+            return False
+        return predicate(data)
+
+    return match
+
+
+@lru_cache(maxsize=32)
+def compile_filter_pattern(pattern):
+    """Returns a function telling if a message matches the CloudWatch Logs
+    filter ``pattern``, evaluated locally.
+
+    Supported are terms, quoted phrases, ``-`` excluded terms, ``?``
+    optional terms, and JSON ``{ $.field = value }`` selectors with
+    ``&&``, ``||``, parentheses, ``*`` wildcards, numeric comparisons,
+    ``IS NULL``, ``IS TRUE``, ``IS FALSE`` and ``NOT EXISTS``. Other
+    patterns, like space-delimited ``[...]`` or regular expressions, raise
+    ``UnsupportedFilterPattern``.
+    """
+    stripped = (pattern or "").strip()
+    if not stripped or stripped == '""':
+        return lambda message: True
+    if stripped.startswith("{"):
+        if not stripped.endswith("}"):
+            raise UnsupportedFilterPattern(pattern)
+        return _compile_json(stripped)
+    if stripped[0] in "[%":
+        raise UnsupportedFilterPattern(pattern)
+    return _compile_terms(stripped)
@@ -0,0 +1,248 @@
+import io
+import csv
+import time
+
+from .event import event_to_dict
+from .query import json_dumps_compact, query_message, query_value
+
+
+class _Memo(dict):
+    """Dict computing missing values with ``func``, holding up to
+    ``maxsize`` of them."""
+
+    def __init__(self, func, maxsize=10000):
+        super(_Memo, self).__init__()
+        self.func = func
+        self.maxsize = maxsize
+
+    def __missing__(self, key):
+        if len(self) >= self.maxsize:
+            self.clear()
+        value = self[key] = self.func(key)
+        return value
+
+
+class TimestampFormatter(object):
+    """Formats milliseconds since the epoch.
+
+    ``mode`` can be:
+        ``iso``: UTC ISO 8601, like ``2024-01-01T12:00:00.000Z``.
+        ``local``: local time ISO 8601, like ``2024-01-01T13:00:00.000+01:00``.
+        ``epoch``: the milliseconds themselves.
+
+    Consecutive events mostly share the same second, so the formatted
+    ``YYYY-MM-DDTHH:MM:SS`` of every second is memoized and only the
+    milliseconds are appended to it.
+    """
+
+    ISO = "iso"
+    LOCAL = "local"
+    EPOCH = "epoch"
+    MODES = (ISO, LOCAL, EPOCH)
+
+    _MILLIS = [".{0:03d}".format(i) for i in range(1000)]
+
+    def __init__(self, mode=ISO):
+        self.mode = mode
+        if mode == self.ISO:
+            self._seconds = _Memo(self._format_utc_second, 1024)
+        elif mode == self.LOCAL:
+            self._seconds = _Memo(self._format_local_second, 1024)
+        elif mode != self.EPOCH:
+            raise ValueError("Unknown timestamp format '{0}'".format(mode))
+
+    @staticmethod
+    def _format_utc_second(second):
+        return time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(second)), "Z"
+
+    @staticmethod
+    def _format_local_second(second):
+        local = time.localtime(second)
+        offset = local.tm_gmtoff // 60
+        sign = "-" if offset < 0 else "+"
+        return (
+            time.strftime("%Y-%m-%dT%H:%M:%S", local),
+            "{0}{1:02d}:{2:02d}".format(sign, abs(offset) // 60, abs(offset) % 60),
+        )
+
+    def __call__(self, milis):
+        milis = int(milis)
+        if self.mode == self.EPOCH:
+            return str(milis)
+        second, millis = divmod(milis, 1000)
+        prefix, suffix = self._seconds[second]
+        return prefix + self._MILLIS[millis] + suffix
+
+    def format_many(self, milis_list):
+        """Format a whole page of timestamps at once."""
+        if self.mode == self.EPOCH:
+            return [str(int(milis)) for milis in milis_list]
+
+        seconds = self._seconds
+        millis_suffixes = self._MILLIS
+        formatted = []
+        append = formatted.append
+        for milis in milis_list:
+            second, millis = divmod(int(milis), 1000)
+            prefix, suffix = seconds[second]
+            append(prefix + millis_suffixes[millis] + suffix)
+        return formatted
+
+
+# Formats milliseconds as UTC ISO 8601, shared by everyone importing it
+milis2iso = TimestampFormatter(TimestampFormatter.ISO)
+
+
+def ansi_codes(color, name):
+    """Returns the ``(prefix, suffix)`` that ``color(text, name)`` wraps
+    ``text`` with, so that they can be reused without calling it again."""
+    sentinel = "\0"
+    prefix, suffix = color(sentinel, name).split(sentinel)
+    return prefix, suffix
+
+
+def build_formatter(
+    color,
+    group_length=None,
+    stream_length=None,
+    timestamp=False,
+    ingestion_time=False,
+    query=None,
+    timestamp_format=TimestampFormatter.ISO,
+):
+    """Returns a function formatting an event into an output line.
+
+    Everything that doesn't depend on the event is worked out once here:
+    the ANSI codes of every column, which columns are enabled, and the
+    padded and colored group and stream names, which are memoized.
+    ``color(text, name)`` colors ``text``. Groups and streams are padded to
+    ``group_length`` and ``stream_length`` and not shown if those are
+    ``None``. ``query`` is a compiled query applied to JSON messages.
+    Timestamps are formatted in ``timestamp_format``.
+    """
+    columns = []
+    format_timestamp = TimestampFormatter(timestamp_format)
+
+    if group_length is not None:
+        group_start, group_end = ansi_codes(color, "green")
+        groups = _Memo(
+            lambda name: group_start + name.ljust(group_length, " ") + group_end
+        )
+        columns.append(lambda event: groups[event["logGroupName"]])
+
+    if stream_length is not None:
+        stream_start, stream_end = ansi_codes(color, "cyan")
+        streams = _Memo(
+            lambda name: stream_start + name.ljust(stream_length, " ") + stream_end
+        )
+        columns.append(lambda event: streams[event["logStreamName"]])
+
+    if timestamp:
+        ts_start, ts_end = ansi_codes(color, "yellow")
+        columns.append(
+            lambda event: ts_start + format_timestamp(event["timestamp"]) + ts_end
+        )
+
+    if ingestion_time:
+        it_start, it_end = ansi_codes(color, "blue")
+        columns.append(
+            lambda event: it_start + format_timestamp(event["ingestionTime"]) + it_end
+        )
+
+    if query is not None:
+
+        def message(event):
+            return query_message(query, event["message"]).rstrip()
+
+    else:
+
+        def message(event):
+            return event["message"].rstrip()
+
+    if not columns:
+        return message
+
+    if len(columns) == 1:
+        (column,) = columns
+
+        def format_event(event):
+            return column(event) + " " + message(event)
+
+        return format_event
+
+    def format_event(event):
+        return " ".join([column(event) for column in columns] + [message(event)])
+
+    return format_event
+
+
+TEXT = "text"
+JSONL = "jsonl"
+CSV = "csv"
+RAW = "raw"
+OUTPUT_FORMATS = (TEXT, JSONL, CSV, RAW)
+
+CSV_FIELDS = (
+    "logGroupName",
+    "logStreamName",
+    "timestamp",
+    "ingestionTime",
+    "eventId",
+    "message",
+)
+
+
+def _csv_row_formatter():
+    """Returns a function formatting a list of values as a CSV line, without
+    the line terminator."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="")
+
+    def format_row(values):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerow(values)
+        return buffer.getvalue()
+
+    return format_row
+
+
+def build_record_formatter(output, query=None):
+    """Returns ``(header, format_event)`` to write events in the machine
+    readable ``output`` format, without any color or padding.
+
+    ``jsonl``: one JSON object per event, with the fields of the
+    ``filter_log_events`` event plus ``logGroupName`` and, if ``query`` is
+    given, its result as ``query``.
+    ``csv``: the same fields as CSV, after a header line.
+    ``raw``: just the message, or the result of ``query``.
+    """
+    if output == JSONL:
+        if query is None:
+            return None, lambda event: json_dumps_compact(event_to_dict(event))
+
+        def format_event(event):
+            record = event_to_dict(event)
+            record["query"] = query_value(query, event["message"])
+            return json_dumps_compact(record)
+
+        return None, format_event
+
+    if output == CSV:
+        fields = CSV_FIELDS + (("query",) if query is not None else ())
+        format_row = _csv_row_formatter()
+
+        def format_event(event):
+            values = [event.get(field) for field in CSV_FIELDS]
+            if query is not None:
+                values.append(query_message(query, event["message"]))
+            return format_row(values)
+
+        return format_row(fields), format_event
+
+    if output == RAW:
+        if query is None:
+            return None, lambda event: event["message"].rstrip("\n")
+        return None, lambda event: query_message(query, event["message"]).rstrip("\n")
+
+    raise ValueError("Unknown output format '{0}'".format(output))
@@ -0,0 +1,201 @@
+import re
+import time
+import queue
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from botocore.exceptions import ClientError
+
+from . import exceptions
+from .polling import AdaptivePoller
+
+# Commands whose results can't be computed by querying parts of the time
+# range separately and putting the results together
+_UNSPLITTABLE = re.compile(r"(^|\|)\s*(stats|sort|limit|dedup)\b", re.IGNORECASE)
+
+# Commands that make the rows of partial results change as the query runs,
+# instead of just adding to them
+_RANKED = re.compile(r"(^|\|)\s*(sort|limit)\b", re.IGNORECASE)
+
+_ROWS = "rows"
+_STATISTICS = "statistics"
+_DONE = "done"
+
+
+def result_to_dict(result):
+    """Returns a ``get_query_results`` result, a list of ``field`` and
+    ``value`` pairs, as a dict."""
+    return {field["field"]: field.get("value") for field in result}
+
+
+def split_range(start, end, max_length):
+    """Split the ``[start, end)`` range in contiguous ``(start, end)`` slices
+    no longer than ``max_length``."""
+    slices = []
+    while end - start > max_length:
+        slices.append((start, start + max_length))
+        start += max_length
+    slices.append((start, end))
+    return slices
+
+
+class InsightsQuery(object):
+    """A CloudWatch Logs Insights query over ``groups`` between the ``start``
+    and ``end`` milliseconds.
+
+    Iterating it runs the query and yields its result rows as dicts, as soon
+    as ``get_query_results`` returns them. Rows of queries that return log
+    events are yielded while the query is still running, and the results of
+    aggregations and of queries using ``sort`` or ``limit`` once it
+    completes, as their partial results can still change.
+
+    Insights accepts up to ``MAX_GROUPS_PER_QUERY`` groups per query, so
+    more groups are queried in several sub-queries. Ranges longer than
+    ``slice_seconds`` are split in sub-queries as well, unless the query
+    uses ``stats``, ``sort``, ``limit`` or ``dedup``. Up to ``max_queries`` sub-queries
+    run concurrently, below the account limit of concurrent queries.
+
+    ``statistics`` adds up the statistics of all the sub-queries.
+    """
+
+    MAX_GROUPS_PER_QUERY = 50
+    MAX_QUERIES = 4
+    SLICE_SECONDS = 24 * 3600
+    POLL_MIN_INTERVAL = 0.5
+    POLL_MAX_INTERVAL = 5
+    FAILED_STATUSES = ("Failed", "Cancelled", "Timeout", "Unknown")
+
+    def __init__(
+        self,
+        client,
+        query_string,
+        groups,
+        start,
+        end,
+        limit=None,
+        max_queries=None,
+        slice_seconds=None,
+    ):
+        self.client = client
+        self.query_string = query_string
+        self.groups = groups
+        self.start = start
+        self.end = end
+        self.limit = limit
+        self.max_queries = max_queries or self.MAX_QUERIES
+        self.slice_seconds = slice_seconds or self.SLICE_SECONDS
+        self.statistics = Counter()
+        self.streaming = not _RANKED.search(query_string)
+
+    def subqueries(self):
+        """Returns the ``start_query`` kwargs of every sub-query."""
+        start, end = self.start // 1000, -(-self.end // 1000)
+        if _UNSPLITTABLE.search(self.query_string):
+            ranges = [(start, end)]
+        else:
+            ranges = split_range(start, end, self.slice_seconds)
+
+        limit = self.MAX_GROUPS_PER_QUERY
+        subqueries = []
+        for range_start, range_end in ranges:
+            for i in range(0, len(self.groups), limit):
+                kwargs = {
+                    "logGroupNames": self.groups[i : i + limit],
+                    "startTime": range_start,
+                    "endTime": range_end,
+                    "queryString": self.query_string,
+                }
+                if self.limit:
+                    kwargs["limit"] = self.limit
+                subqueries.append(kwargs)
+        return subqueries
+
+    def __iter__(self):
+        subqueries = self.subqueries()
+        results = queue.Queue()
+        stopped = threading.Event()
+        workers = min(self.max_queries, len(subqueries))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for kwargs in subqueries:
+                executor.submit(self._run, kwargs, results, stopped)
+            try:
+                pending = len(subqueries)
+                while pending:
+                    kind, value = results.get()
+                    if kind == _ROWS:
+                        for row in value:
+                            yield row
+                    elif kind == _STATISTICS:
+                        self.statistics.update(value)
+                    else:
+                        pending -= 1
+                        if value is not None:
+                            raise value
+            finally:
+                stopped.set()
+
+    def _run(self, kwargs, results, stopped):
+        """Run the sub-query for ``kwargs``, putting its rows and
+        statistics in ``results`` and a ``_DONE`` message at the end, along
+        with the exception that stopped it, if any."""
+        try:
+            query_id = self._start_query(kwargs, stopped)
+            if query_id is not None:
+                self._poll_results(query_id, results, stopped)
+        except Exception as exc:
+            results.put((_DONE, exc))
+        else:
+            results.put((_DONE, None))
+
+    def _start_query(self, kwargs, stopped):
+        """Start the query, waiting while there are too many queries
+        running. Returns ``None`` if ``stopped`` is set in the meantime."""
+        while not stopped.is_set():
+            try:
+                return self.client.start_query(**kwargs)["queryId"]
+            except ClientError as exc:
+                if exc.response["Error"]["Code"] != "LimitExceededException":
+                    raise
+            time.sleep(self.POLL_MAX_INTERVAL)
+        return None
+
+    def _poll_results(self, query_id, results, stopped):
+        # Polls again sooner while new rows keep arriving
+        poller = AdaptivePoller(
+            self.POLL_MIN_INTERVAL, self.POLL_MAX_INTERVAL, float("inf")
+        )
+        seen = set()
+        complete = False
+        try:
+            while not stopped.is_set():
+                response = self.client.get_query_results(queryId=query_id)
+                status = response["status"]
+                if status in self.FAILED_STATUSES:
+                    raise exceptions.InsightsQueryError(query_id, status)
+                complete = status == "Complete"
+
+                rows = []
+                for result in response.get("results", []):
+                    row = result_to_dict(result)
+                    # Log events have a unique @ptr, aggregations don't
+                    ptr = row.pop("@ptr", None)
+                    if ptr is None or not self.streaming:
+                        if complete:
+                            rows.append(row)
+                    elif ptr not in seen:
+                        seen.add(ptr)
+                        rows.append(row)
+                if rows:
+                    results.put((_ROWS, rows))
+
+                if complete:
+                    results.put((_STATISTICS, response.get("statistics", {})))
+                    return
+                time.sleep(poller.wait_time(len(rows)))
+        finally:
+            if not complete:
+                try:
+                    self.client.stop_query(queryId=query_id)
+                except ClientError:
+                    pass
@@ -0,0 +1,111 @@
+import heapq
+import threading
+from operator import itemgetter
+from queue import Queue, Empty, Full
+
+
+class _Failure(object):
+    """Wraps an exception raised while fetching pages on a worker thread."""
+
+    def __init__(self, exc):
+        self.exc = exc
+
+
+class PagePrefetcher(object):
+    """Consume an iterator of ``filter_log_events`` pages on a thread.
+
+    Up to ``maxsize`` pages are fetched ahead of the consumer. Page
+    iterators yield ``None`` once they have caught up with the end of the
+    log; the prefetcher then stops fetching until ``resume`` is called, so
+    that watching several sources doesn't poll any of them more often than
+    the consumer asks for.
+    """
+
+    POLL_TIMEOUT = 0.1
+
+    def __init__(self, pages, maxsize=2):
+        self._pages = pages
+        self._queue = Queue(maxsize=maxsize)
+        self._resume = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._resume.set()
+
+    def resume(self):
+        self._resume.set()
+
+    def _put(self, item):
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=self.POLL_TIMEOUT)
+                return True
+            except Full:
+                pass
+        return False
+
+    def _run(self):
+        try:
+            for page in self._pages:
+                if not self._put(page):
+                    return
+                if page is None:
+                    self._resume.wait()
+                    self._resume.clear()
+                if self._stop.is_set():
+                    return
+        except Exception as exc:
+            self._put(_Failure(exc))
+
+    def events(self):
+        """Yield the events of the prefetched pages until caught up."""
+        while True:
+            try:
+                page = self._queue.get(timeout=self.POLL_TIMEOUT)
+            except Empty:
+                if not self._thread.is_alive() and self._queue.empty():
+                    return
+                continue
+            if page is None:
+                return
+            if isinstance(page, _Failure):
+                raise page.exc
+            for event in page.get("events", []):
+                yield event
+
+
+def merge_pages(sources, page_size=1000, maxsize=2):
+    """Merge several ``filter_log_events`` page iterators into one.
+
+    Every source is fetched concurrently on its own thread, and events are
+    merged by timestamp into pages of up to ``page_size`` events. Once all
+    the sources have caught up ``None`` is yielded, just like a single page
+    iterator does, and the sources are polled again on the next round.
+    """
+    prefetchers = [PagePrefetcher(pages, maxsize).start() for pages in sources]
+    try:
+        while True:
+            merged = heapq.merge(
+                *[p.events() for p in prefetchers], key=itemgetter("timestamp")
+            )
+            page = []
+            for event in merged:
+                page.append(event)
+                if len(page) >= page_size:
+                    yield {"events": page}
+                    page = []
+            if page:
+                yield {"events": page}
+            yield None
+
+            for prefetcher in prefetchers:
+                prefetcher.resume()
+    finally:
+        for prefetcher in prefetchers:
+            prefetcher.stop()
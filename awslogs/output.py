@@ -0,0 +1,78 @@
+import sys
+import time
+
+
+class OutputSink(object):
+    """Buffers formatted lines and writes them to ``stream`` in batches.
+
+    Writing and flushing every single event means one syscall per line,
+    which dominates when dumping big ranges to a file or a pipe. Lines are
+    kept in memory and written out once per ``filter_log_events`` page, or
+    earlier if the buffer grows past ``max_bytes`` or holds lines older than
+    ``max_delay`` seconds.
+
+    ``policy`` can be:
+        ``line``: write and flush every line, like ``print`` + ``flush``.
+        ``page``: write once per page or when the buffer limits are hit.
+        ``block``: only write when the buffer limits are hit.
+        ``auto``: ``line`` when watching a terminal, ``page`` otherwise.
+    """
+
+    AUTO = "auto"
+    LINE = "line"
+    PAGE = "page"
+    BLOCK = "block"
+    POLICIES = (AUTO, LINE, PAGE, BLOCK)
+
+    MAX_BUFFER_BYTES = 64 * 1024
+    # Buffer size when writing machine readable output
+    BLOCK_BYTES = 1024 * 1024
+    MAX_BUFFER_DELAY = 1.0
+
+    def __init__(
+        self,
+        stream=None,
+        policy=AUTO,
+        watch=False,
+        max_bytes=MAX_BUFFER_BYTES,
+        max_delay=MAX_BUFFER_DELAY,
+    ):
+        self.stream = stream or sys.stdout
+        if policy == self.AUTO:
+            isatty = getattr(self.stream, "isatty", None)
+            policy = self.LINE if watch and isatty and isatty() else self.PAGE
+        self.policy = policy
+        self.max_bytes = max_bytes
+        self.max_delay = max_delay
+        self._lines = []
+        self._size = 0
+        self._since = None
+
+    def write(self, line):
+        """Queue ``line`` to be written, flushing if any limit is hit."""
+        self._lines.append(line)
+        if self.policy == self.LINE:
+            self.flush()
+            return
+
+        self._size += len(line) + 1
+        now = time.monotonic()
+        if self._since is None:
+            self._since = now
+        if self._size >= self.max_bytes or now - self._since >= self.max_delay:
+            self.flush()
+
+    def end_page(self):
+        """Signal the end of a ``filter_log_events`` page."""
+        if self.policy != self.BLOCK:
+            self.flush()
+
+    def flush(self):
+        """Write all the buffered lines and flush ``stream``."""
+        if self._lines:
+            lines = self._lines
+            self._lines = []
+            self._size = 0
+            self._since = None
+            self.stream.write("\n".join(lines) + "\n")
+        self.stream.flush()
@@ -0,0 +1,49 @@
+import time
+
+
+class AdaptivePoller(object):
+    """Decides how long ``--watch`` waits before polling for new events.
+
+    A poll is a whole round of requests, following ``nextToken`` until the
+    last page, so ``events`` are the new events of all its pages. After a
+    poll that returned at least ``burst_events`` of them the next poll
+    happens right away, as the group is probably still catching up.
+    Any other poll that returned events resets the wait to
+    ``min_interval``, and every poll that returned nothing doubles it, up to
+    ``max_interval``.
+    """
+
+    BACKOFF = 2
+
+    def __init__(self, min_interval, max_interval, burst_events):
+        self.min_interval = min_interval
+        self.max_interval = max(min_interval, max_interval)
+        self.burst_events = burst_events
+        self.interval = min_interval
+        self.polls = 0
+        self.started = time.monotonic()
+
+    def wait_time(self, events):
+        """Returns the seconds to wait after a poll that returned ``events``
+        events."""
+        self.polls += 1
+        if events >= self.burst_events:
+            self.interval = self.min_interval
+            return 0
+        if events:
+            self.interval = self.min_interval
+            return self.interval
+
+        wait = self.interval
+        self.interval = min(self.interval * self.BACKOFF, self.max_interval)
+        return wait
+
+    def poll_rate(self):
+        """Returns the effective number of polls per minute so far."""
+        elapsed = time.monotonic() - self.started
+        return self.polls * 60.0 / elapsed if elapsed > 0 else 0.0
+
+    def summary(self):
+        return "polls: {0}, effective poll rate: {1:.1f}/min, next wait: {2}s".format(
+            self.polls, self.poll_rate(), self.interval
+        )
@@ -0,0 +1,81 @@
+import re
+import json
+from functools import lru_cache
+
+try:
+    import orjson
+
+    json_loads = orjson.loads
+
+    def json_dumps_compact(value):
+        return orjson.dumps(value).decode("utf-8")
+
+except ImportError:
+    try:
+        import ujson
+
+        json_loads = ujson.loads
+    except ImportError:
+        json_loads = json.loads
+
+    def json_dumps_compact(value):
+        return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+
+
+_FIELD_PATH = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*(?:\.[A-Za-z_][A-Za-z0-9_]*)*$")
+
+
+class FieldPath(object):
+    """Fast equivalent of a JMESPath made only of field names, like
+    ``a.b.c``, that looks the fields up directly."""
+
+    def __init__(self, expression):
+        self.expression = expression
+        self.keys = tuple(expression.split("."))
+
+    def search(self, data):
+        for key in self.keys:
+            if not isinstance(data, dict):
+                return None
+            data = data.get(key)
+        return data
+
+
+@lru_cache(maxsize=32)
+def compile_query(expression):
+    """Returns a compiled ``expression`` with a ``search(data)`` method."""
+    if _FIELD_PATH.match(expression):
+        return FieldPath(expression)
+    # jmespath is slow to import, and most queries are just field paths
+    import jmespath
+
+    return jmespath.compile(expression)
+
+
+def query_value(query, message, default=None):
+    """Returns the result of the compiled ``query`` on the JSON ``message``,
+    or ``default`` if ``message`` is not a JSON object."""
+    if not message.startswith("{"):
+        return default
+    try:
+        parsed = json_loads(message)
+    except ValueError:
+        return default
+    return query.search(parsed)
+
+
+_NOT_JSON = object()
+
+
+def query_message(query, message):
+    """Returns the result of the compiled ``query`` on the JSON ``message``.
+
+    Messages that are not JSON objects are returned unchanged. Non string
+    results are serialized back to JSON.
+    """
+    result = query_value(query, message, _NOT_JSON)
+    if result is _NOT_JSON:
+        return message
+    if not isinstance(result, str):
+        result = json.dumps(result)
+    return result
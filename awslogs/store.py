@@ -0,0 +1,191 @@
+import os
+import sys
+import sqlite3
+
+from .cache import cache_path
+from .event import LogEvent
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    group_name TEXT NOT NULL,
+    event_id TEXT NOT NULL,
+    stream TEXT NOT NULL,
+    timestamp INTEGER NOT NULL,
+    ingestion_time INTEGER,
+    message TEXT NOT NULL,
+    PRIMARY KEY (group_name, event_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS events_by_time ON events (group_name, timestamp);
+CREATE INDEX IF NOT EXISTS events_by_stream
+    ON events (group_name, stream, timestamp);
+CREATE TABLE IF NOT EXISTS coverage (
+    group_name TEXT NOT NULL,
+    stream TEXT NOT NULL,
+    start INTEGER NOT NULL,
+    end INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS coverage_by_group ON coverage (group_name, stream);
+"""
+
+
+def merge_ranges(ranges):
+    """Returns the union of the ``(start, end)`` half-open ``ranges``, sorted
+    and without overlapping or adjacent ranges."""
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def subtract_ranges(start, end, ranges):
+    """Returns the parts of the ``[start, end)`` range not in ``ranges``."""
+    missing = []
+    for range_start, range_end in merge_ranges(ranges):
+        if range_end <= start:
+            continue
+        if range_start >= end:
+            break
+        if range_start > start:
+            missing.append((start, range_start))
+        start = max(start, range_end)
+    if start < end:
+        missing.append((start, end))
+    return missing
+
+
+class EventStore(object):
+    """SQLite store of the events fetched from CloudWatch.
+
+    Events are indexed by group, timestamp and stream. The time ranges
+    fetched for every group, or for single streams of it, are recorded as
+    its coverage, so that the events of a covered range can be read back
+    without asking AWS again. Ranges are half-open ``[start, end)``
+    milliseconds.
+    """
+
+    # Name of the coverage of all the streams of a group
+    ALL_STREAMS = ""
+
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.executescript(SCHEMA)
+
+    @classmethod
+    def for_account(cls, key, cache_dir=None):
+        """Returns the store for the account identified by the ``key``
+        tuple, usually the profile, region and endpoint."""
+        return cls(cache_path("store", key, cache_dir) + ".sqlite")
+
+    def close(self):
+        self.db.close()
+
+    def _coverage(self, group, stream):
+        return self.db.execute(
+            "SELECT start, end FROM coverage WHERE group_name = ? AND stream = ?",
+            (group, stream),
+        ).fetchall()
+
+    def missing_ranges(self, group, streams, start, end):
+        """Returns the parts of ``[start, end)`` that have to be fetched for
+        ``streams`` of ``group``, or for all its streams if ``streams`` is
+        empty."""
+        covered = self._coverage(group, self.ALL_STREAMS)
+        missing = []
+        for stream in streams:
+            missing.extend(subtract_ranges(start, end, self._coverage(group, stream)))
+        if not streams:
+            missing = [(start, end)]
+
+        result = []
+        for range_start, range_end in merge_ranges(missing):
+            result.extend(subtract_ranges(range_start, range_end, covered))
+        return result
+
+    def add_events(self, group, events):
+        """Store ``filter_log_events`` ``events`` of ``group``."""
+        with self.db:
+            self.db.executemany(
+                "INSERT OR IGNORE INTO events VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        group,
+                        event["eventId"],
+                        event["logStreamName"],
+                        event["timestamp"],
+                        event.get("ingestionTime"),
+                        event["message"],
+                    )
+                    for event in events
+                ],
+            )
+
+    def add_coverage(self, group, streams, start, end):
+        """Record that ``[start, end)`` was fetched for ``streams`` of
+        ``group``, or for all its streams if ``streams`` is empty."""
+        with self.db:
+            for stream in streams or [self.ALL_STREAMS]:
+                ranges = merge_ranges(self._coverage(group, stream) + [(start, end)])
+                self.db.execute(
+                    "DELETE FROM coverage WHERE group_name = ? AND stream = ?",
+                    (group, stream),
+                )
+                self.db.executemany(
+                    "INSERT INTO coverage VALUES (?, ?, ?, ?)",
+                    [(group, stream, s, e) for s, e in ranges],
+                )
+
+    def iter_events(self, groups, streams, start, end, page_size=1000):
+        """Yield pages of the stored events of ``groups`` in ``[start, end)``
+        ordered by timestamp, as ``LogEvent``.
+
+        ``streams`` maps groups to the only streams to return of them.
+        """
+        conditions = []
+        params = []
+        with self.db:
+            self.db.execute("DROP TABLE IF EXISTS temp.selected")
+            self.db.execute("CREATE TEMP TABLE selected (group_name, stream)")
+            for group in groups:
+                group_streams = streams.get(group)
+                if group_streams:
+                    self.db.executemany(
+                        "INSERT INTO temp.selected VALUES (?, ?)",
+                        [(group, stream) for stream in group_streams],
+                    )
+                else:
+                    conditions.append("group_name = ?")
+                    params.append(group)
+        conditions.append(
+            "(group_name, stream) IN (SELECT group_name, stream FROM temp.selected)"
+        )
+
+        cursor = self.db.execute(
+            "SELECT group_name, event_id, stream, timestamp, ingestion_time, "
+            "message FROM events WHERE timestamp >= ? AND timestamp < ? "
+            "AND ({0}) ORDER BY timestamp, event_id".format(" OR ".join(conditions)),
+            [start, end] + params,
+        )
+        while True:
+            rows = cursor.fetchmany(page_size)
+            if not rows:
+                return
+            yield {
+                "events": [
+                    LogEvent(
+                        group,
+                        sys.intern(stream),
+                        timestamp,
+                        ingestion_time,
+                        event_id,
+                        message,
+                    )
+                    for group, event_id, stream, timestamp, ingestion_time, message in rows
+                ]
+            }
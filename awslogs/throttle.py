@@ -0,0 +1,159 @@
+import time
+import random
+import threading
+from collections import Counter
+from functools import partial
+
+from botocore.exceptions import ClientError, ConnectionError, HTTPClientError
+
+
+class TokenBucket(object):
+    """Thread safe token bucket allowing ``rate`` acquisitions per second.
+
+    The rate adapts to throttling: it is halved every time AWS throttles a
+    request (down to a sixteenth of ``rate``) and grows back slowly while
+    requests succeed.
+    """
+
+    MIN_RATE_RATIO = 1 / 16.0
+    RECOVERY_RATIO = 1 / 20.0
+
+    def __init__(self, rate, capacity=None):
+        self.max_rate = float(rate)
+        self.rate = self.max_rate
+        self.capacity = capacity or max(1.0, self.max_rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available and take it."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(
+                    self.capacity, self.tokens + (now - self.updated) * self.rate
+                )
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def throttled(self):
+        with self._lock:
+            self.rate = max(self.max_rate * self.MIN_RATE_RATIO, self.rate / 2)
+
+    def succeeded(self):
+        with self._lock:
+            if self.rate < self.max_rate:
+                self.rate = min(
+                    self.max_rate, self.rate + self.max_rate * self.RECOVERY_RATIO
+                )
+
+
+class _Paginator(object):
+    """Paginator for the ``nextToken`` based logs operations that issues
+    every request through a rate limited ``method``."""
+
+    def __init__(self, method):
+        self._method = method
+
+    def paginate(self, **kwargs):
+        kwargs = dict(kwargs)
+        while True:
+            page = self._method(**kwargs)
+            yield page
+            token = page.get("nextToken")
+            if not token or token == kwargs.get("nextToken"):
+                return
+            kwargs["nextToken"] = token
+
+
+class ThrottledClient(object):
+    """Wraps a boto3 ``logs`` client to rate limit and retry its requests.
+
+    Every operation in ``RATE_LIMITS`` gets a shared token bucket, so all
+    the threads using the client stay within the rate. Throttled requests
+    are retried up to ``MAX_RETRIES`` times, sleeping with decorrelated
+    jitter in between, and counted in ``throttles``. Anything else is
+    forwarded to the wrapped client untouched.
+
+    The wrapped client is expected to be made without botocore retries
+    (see ``boto3_client``), or throttles are only seen here once botocore
+    gave up on them. Server and connection errors, which botocore would
+    otherwise retry, are then retried here as well, without slowing down
+    the rate.
+    """
+
+    RATE_LIMITS = {
+        "filter_log_events": 10,
+        "describe_log_streams": 25,
+        "describe_log_groups": 10,
+        "start_query": 5,
+        "get_query_results": 5,
+    }
+    THROTTLING_ERRORS = (
+        "Throttling",
+        "ThrottlingException",
+        "TooManyRequestsException",
+    )
+    MAX_RETRIES = 8
+    BASE_DELAY = 0.2
+    MAX_DELAY = 20.0
+
+    def __init__(self, client, rate_limits=None):
+        self._client = client
+        limits = dict(self.RATE_LIMITS, **(rate_limits or {}))
+        self._buckets = {
+            operation: TokenBucket(rate) for operation, rate in limits.items() if rate
+        }
+        self._lock = threading.Lock()
+        self.throttles = Counter()
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if name in self._buckets:
+            return partial(self._call, name, attr)
+        return attr
+
+    def get_paginator(self, operation_name):
+        if operation_name in self._buckets:
+            return _Paginator(getattr(self, operation_name))
+        return self._client.get_paginator(operation_name)
+
+    def _call(self, operation_name, method, **kwargs):
+        bucket = self._buckets[operation_name]
+        delay = self.BASE_DELAY
+        retries = 0
+        while True:
+            bucket.acquire()
+            try:
+                response = method(**kwargs)
+            except (ClientError, ConnectionError, HTTPClientError) as exc:
+                if not self._retryable(operation_name, bucket, exc):
+                    raise
+                if retries >= self.MAX_RETRIES:
+                    raise
+                retries += 1
+                # "Decorrelated jitter", see
+                # https://aws.amazon.com/blogs/architecture/exponential-backoff-and-jitter/
+                delay = min(self.MAX_DELAY, random.uniform(self.BASE_DELAY, delay * 3))
+                time.sleep(delay)
+            else:
+                bucket.succeeded()
+                return response
+
+    def _retryable(self, operation_name, bucket, exc):
+        """Returns whether the request that failed with ``exc`` can be
+        retried, slowing down ``bucket`` if it was throttled."""
+        if not isinstance(exc, ClientError):
+            return True
+        if exc.response.get("Error", {}).get("Code") in self.THROTTLING_ERRORS:
+            with self._lock:
+                self.throttles[operation_name] += 1
+            bucket.throttled()
+            return True
+        status = exc.response.get("ResponseMetadata", {}).get("HTTPStatusCode")
+        return status is not None and status >= 500
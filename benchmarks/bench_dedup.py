@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for the event deduplication window used by list_logs.
+
+Compares the old ``deque(maxlen=N)`` linear membership check with
+``EventIdWindow`` for 10k and 100k window sizes and reports events/sec.
+
+    python benchmarks/bench_dedup.py
+"""
+
+import os
+import sys
+import time
+from collections import deque
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from awslogs.dedup import EventIdWindow  # noqa: E402
+
+
+def make_deque(size):
+    seen = deque(maxlen=size)
+    seen.extend("old-{}".format(i) for i in range(size))
+    return seen
+
+
+def run_deque(seen, event_ids):
+    for event_id in event_ids:
+        if event_id not in seen:
+            seen.append(event_id)
+
+
+def make_window(size):
+    seen = EventIdWindow(size)
+    for i in range(size):
+        seen.add("old-{}".format(i))
+    return seen
+
+
+def run_window(seen, event_ids):
+    for event_id in event_ids:
+        seen.add(event_id)
+
+
+def make_event_ids(count):
+    # 10% of the events are duplicates, like interleaved responses return
+    ids = []
+    for i in range(count):
+        ids.append("evt-{}".format(i))
+        if i % 10 == 0 and i:
+            ids.append("evt-{}".format(i - 1))
+    return ids
+
+
+def bench(make, run, size, count):
+    # Time only the steady state, with the window already full
+    seen = make(size)
+    event_ids = make_event_ids(count)
+    started = time.perf_counter()
+    run(seen, event_ids)
+    elapsed = time.perf_counter() - started
+    return len(event_ids) / elapsed
+
+
+def main():
+    print("{:>8}  {:>16}  {:>16}".format("window", "deque ev/s", "window ev/s"))
+    for size in (10000, 100000):
+        print(
+            "{:>8}  {:>16,.0f}  {:>16,.0f}".format(
+                size,
+                # The deque is too slow to push many events through
+                bench(make_deque, run_deque, size, 2000),
+                bench(make_window, run_window, size, 1000000),
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Memory benchmark for the events buffered while merging and deduplicating.
+
+Builds a synthetic list of events (1M by default), once as the botocore
+response dicts the fetch path used to pass around and once as ``LogEvent``,
+and reports the bytes allocated per buffered event.
+
+    python benchmarks/bench_events.py [EVENTS]
+"""
+
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from awslogs.event import LogEvent  # noqa: E402
+
+
+def make_responses(count):
+    # Stream names arrive as new strings in every response, like botocore
+    # parses them out of the JSON of every page
+    start = 1700000000000
+    for i in range(count):
+        yield {
+            "eventId": "{:056d}".format(i),
+            "logStreamName": "2024/01/01/[$LATEST]{:032x}".format(i % 50),
+            "timestamp": start + i // 10,
+            "ingestionTime": start + i // 10 + 150,
+            "message": "START RequestId: {:08x} Version: $LATEST\n".format(i),
+        }
+
+
+def tag_dict(event, group):
+    event["logGroupName"] = group
+    return event
+
+
+def bench(convert, count):
+    group = "/aws/lambda/my-function"
+    tracemalloc.start()
+    events = [convert(event, group) for event in make_responses(count)]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    assert len(events) == count
+    return size / count
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    print("{:>10}  {:>14}".format("record", "bytes/event"))
+    for name, convert in (("dict", tag_dict), ("LogEvent", LogEvent.from_response)):
+        print("{:>10}  {:>14,.0f}".format(name, bench(convert, count)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the list_logs line formatter.
+
+Formats a synthetic stream of events (1M by default) with every
+combination of --no-group, --no-stream, --timestamp and --ingestion-time
+and reports lines/sec for the per-event formatting list_logs used to do
+and for build_formatter.
+
+    python benchmarks/bench_formatting.py [EVENTS]
+"""
+
+import os
+import sys
+import time
+import itertools
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from termcolor import colored  # noqa: E402
+
+from awslogs.formatting import build_formatter  # noqa: E402
+
+
+def color(text, name):
+    return colored(text, name)
+
+
+def make_events(count):
+    streams = ["2024/01/01/[$LATEST]{:032x}".format(i) for i in range(50)]
+    start = 1700000000000
+    for i in range(count):
+        yield {
+            "logGroupName": "/aws/lambda/my-function",
+            "logStreamName": streams[i % len(streams)],
+            "timestamp": start + i // 10,
+            "ingestionTime": start + i // 10 + 150,
+            "message": "START RequestId: {:08x} Version: $LATEST\n".format(i),
+        }
+
+
+def legacy_milis2iso(milis):
+    res = datetime.utcfromtimestamp(milis / 1000.0).isoformat()
+    return (res + ".000")[:23] + "Z"
+
+
+def legacy_formatter(group, stream, timestamp, ingestion_time):
+    # What list_logs did for every event before build_formatter
+    group_length, stream_length = 23, 48
+
+    def format_event(event):
+        output = []
+        if group:
+            output.append(
+                color(event["logGroupName"].ljust(group_length, " "), "green")
+            )
+        if stream:
+            output.append(
+                color(event["logStreamName"].ljust(stream_length, " "), "cyan")
+            )
+        if timestamp:
+            output.append(color(legacy_milis2iso(event["timestamp"]), "yellow"))
+        if ingestion_time:
+            output.append(color(legacy_milis2iso(event["ingestionTime"]), "blue"))
+        output.append(event["message"].rstrip())
+        return " ".join(output)
+
+    return format_event
+
+
+def compiled_formatter(group, stream, timestamp, ingestion_time):
+    return build_formatter(
+        color,
+        group_length=23 if group else None,
+        stream_length=48 if stream else None,
+        timestamp=timestamp,
+        ingestion_time=ingestion_time,
+    )
+
+
+def bench(format_event, events):
+    started = time.perf_counter()
+    for event in events:
+        format_event(event)
+    return len(events) / (time.perf_counter() - started)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    events = list(make_events(count))
+    print(
+        "{:>6} {:>7} {:>10} {:>10}  {:>14}  {:>14}".format(
+            "group", "stream", "timestamp", "ingestion", "legacy lines/s", "lines/s"
+        )
+    )
+    for flags in itertools.product((True, False), repeat=4):
+        print(
+            "{:>6} {:>7} {:>10} {:>10}  {:>14,.0f}  {:>14,.0f}".format(
+                *[str(flag) for flag in flags],
+                bench(legacy_formatter(*flags), events),
+                bench(compiled_formatter(*flags), events),
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
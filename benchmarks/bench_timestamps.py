@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Benchmark for timestamp rendering.
+
+Compares the datetime based milis2iso awslogs used to have with
+TimestampFormatter, called per event and per page with format_many, over
+a synthetic page stream where ~10 events share every second.
+
+    python benchmarks/bench_timestamps.py [EVENTS]
+"""
+
+import os
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from awslogs.formatting import TimestampFormatter  # noqa: E402
+
+
+def legacy_milis2iso(milis):
+    res = datetime.utcfromtimestamp(milis / 1000.0).isoformat()
+    return (res + ".000")[:23] + "Z"
+
+
+def bench(func, pages, count):
+    started = time.perf_counter()
+    for page in pages:
+        func(page)
+    return count / (time.perf_counter() - started)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    start = 1700000000000
+    timestamps = [start + i * 97 for i in range(count)]
+    pages = [timestamps[i : i + 10000] for i in range(0, count, 10000)]
+
+    def per_event(formatter):
+        def format_page(page):
+            for milis in page:
+                formatter(milis)
+
+        return format_page
+
+    print("{:<28} {:>16}".format("", "timestamps/s"))
+    print(
+        "{:<28} {:>16,.0f}".format(
+            "datetime milis2iso", bench(per_event(legacy_milis2iso), pages, count)
+        )
+    )
+    for mode in TimestampFormatter.MODES:
+        formatter = TimestampFormatter(mode)
+        print(
+            "{:<28} {:>16,.0f}".format(
+                "{} per event".format(mode), bench(per_event(formatter), pages, count)
+            )
+        )
+        print(
+            "{:<28} {:>16,.0f}".format(
+                "{} format_many".format(mode),
+                bench(formatter.format_many, pages, count),
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
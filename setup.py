@@ -23,6 +23,7 @@ setup(
     platforms="any",
     python_requires=">=3.7",
     install_requires=install_requires,
+    extras_require={"fast": ["orjson"], "zstd": ["zstandard"]},
     test_suite="tests",
     classifiers=[
         "Programming Language :: Python :: 3",
@@ -0,0 +1,129 @@
+import asyncio
+import unittest
+from unittest.mock import MagicMock, patch
+from botocore.exceptions import ClientError
+from awslogs.aio import AsyncAWSLogs
+from awslogs.exceptions import NoStreamsFilteredError
+
+
+def collect(logs, limit=None):
+    async def run():
+        events = []
+        async with logs:
+            async for event in logs.iter_events():
+                events.append(event)
+                if limit and len(events) == limit:
+                    break
+        return events
+    return asyncio.run(run())
+
+
+class TestAsyncAWSLogs(unittest.TestCase):
+    def setUp(self):
+        self.mock_client = MagicMock()
+        self.patcher = patch('awslogs.core.boto3_client', return_value=self.mock_client)
+        self.patcher.start()
+
+    def tearDown(self):
+        self.patcher.stop()
+
+    def test_iter_events_merges_groups(self):
+        mock_paginator = MagicMock()
+        mock_paginator.paginate.return_value = [
+            {'logGroups': [{'logGroupName': 'svc-api'},
+                           {'logGroupName': 'svc-worker'}]}
+        ]
+        self.mock_client.get_paginator.return_value = mock_paginator
+
+        def filter_log_events(**kwargs):
+            group = kwargs['logGroupName']
+            offset = {'svc-api': 0, 'svc-worker': 1}[group]
+            timestamps = range(offset, 6, 2)
+            if 'nextToken' in kwargs:
+                timestamps = range(offset + 6, 12, 2)
+            response = {'events': [
+                {'eventId': '{}-{}'.format(group, ts), 'logStreamName': 's',
+                 'message': str(ts), 'timestamp': ts}
+                for ts in timestamps
+            ]}
+            if 'nextToken' not in kwargs:
+                response['nextToken'] = 'next'
+            return response
+        self.mock_client.filter_log_events.side_effect = filter_log_events
+
+        logs = AsyncAWSLogs(aws_region="us-east-1", log_group_prefix="svc-",
+                            log_stream_name="ALL")
+        events = collect(logs)
+
+        self.assertEqual([event['timestamp'] for event in events], list(range(12)))
+        self.assertEqual(events[0]['logGroupName'], 'svc-api')
+        self.assertEqual(events[1]['logGroupName'], 'svc-worker')
+        self.assertEqual(self.mock_client.filter_log_events.call_count, 4)
+
+    def test_iter_events_lists_streams_concurrently(self):
+        def paginate(**kwargs):
+            if 'logGroupName' not in kwargs:
+                return [{'logGroups': [{'logGroupName': 'a'},
+                                       {'logGroupName': 'b'}]}]
+            group = kwargs['logGroupName']
+            return [{'logStreams': [{'logStreamName': 'web-' + group},
+                                    {'logStreamName': 'cron-' + group}]}]
+        mock_paginator = MagicMock()
+        mock_paginator.paginate.side_effect = paginate
+        self.mock_client.get_paginator.return_value = mock_paginator
+        self.mock_client.filter_log_events.side_effect = lambda **kwargs: {
+            'events': [
+                {'eventId': name, 'logStreamName': name, 'message': name,
+                 'timestamp': 1}
+                for name in kwargs['logStreamNames']
+            ]
+        }
+
+        logs = AsyncAWSLogs(aws_region="us-east-1", log_group_name="a,b",
+                            log_stream_name="web")
+        events = collect(logs)
+
+        self.assertEqual(sorted(event['message'] for event in events),
+                         ['web-a', 'web-b'])
+
+        logs = AsyncAWSLogs(aws_region="us-east-1", log_group_name="a,b",
+                            log_stream_name="db")
+        with self.assertRaises(NoStreamsFilteredError):
+            collect(logs)
+
+    def test_iter_events_watch(self):
+        def event(i):
+            return {'eventId': str(i), 'logStreamName': 's', 'message': str(i),
+                    'timestamp': i}
+        self.mock_client.filter_log_events.side_effect = [
+            {'events': [event(1), event(2)]},
+            {'events': [event(2)]},
+            {'events': [event(2), event(3)]},
+        ]
+        sleeps = []
+
+        async def sleep(seconds):
+            sleeps.append(seconds)
+
+        logs = AsyncAWSLogs(aws_region="us-east-1", log_group_name="test-group",
+                            log_stream_name="ALL", watch=True, watch_interval=1,
+                            watch_max_interval=4)
+        with patch('awslogs.aio.asyncio.sleep', side_effect=sleep):
+            events = collect(logs, limit=3)
+
+        self.assertEqual([event['eventId'] for event in events], ['1', '2', '3'])
+        self.assertEqual(sleeps, [1, 1])
+
+    def test_iter_events_raises_errors(self):
+        self.mock_client.filter_log_events.side_effect = ClientError(
+            {'Error': {'Code': 'ResourceNotFoundException', 'Message': 'gone'}},
+            'FilterLogEvents',
+        )
+        logs = AsyncAWSLogs(aws_region="us-east-1", log_group_name="test-group",
+                            log_stream_name="ALL")
+        with self.assertRaises(ClientError):
+            collect(logs)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,9 +2,16 @@ import unittest
 from unittest.mock import patch, MagicMock
 import sys
 import os
+import errno
 from awslogs.bin import main
 
 class TestBin(unittest.TestCase):
+    def setUp(self):
+        # Run every command in-process, even with an awslogs daemon running
+        patcher = patch('awslogs.daemon.forward', return_value=None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
     def test_main_help(self):
         # Test with no arguments (should display help)
         with patch('sys.stderr'), patch('sys.stdout'), patch('sys.argv', ['awslogs']):
@@ -98,6 +105,20 @@ class TestBin(unittest.TestCase):
                 mock_instance.list_logs.assert_called_once()
                 self.assertEqual(exit_code, 0)  # Should exit with code 0
     
+    def test_get_command_interrupted(self):
+        with patch('sys.argv', ['awslogs', 'get', 'my-log-group', '--watch']), \
+                patch('awslogs.bin.AWSLogs') as mock_awslogs, \
+                patch('awslogs.bin.os._exit') as mock_exit:
+            mock_awslogs.return_value.list_logs.side_effect = KeyboardInterrupt
+            main()
+            mock_exit.assert_called_once_with(0)
+
+            mock_exit.reset_mock()
+            mock_awslogs.return_value.list_logs.side_effect = BrokenPipeError(
+                errno.EPIPE, 'Broken pipe')
+            main()
+            mock_exit.assert_called_once_with(0)
+
     def test_environment_variables(self):
         # Test environment variables are used
         original_env = os.environ.copy()
@@ -126,5 +147,29 @@ class TestBin(unittest.TestCase):
             os.environ.clear()
             os.environ.update(original_env)
 
+    def test_client_config_arguments(self):
+        original_env = os.environ.copy()
+        try:
+            os.environ['AWSLOGS_MAX_POOL_CONNECTIONS'] = '64'
+            os.environ['AWSLOGS_READ_TIMEOUT'] = '30'
+            os.environ['AWSLOGS_TCP_KEEPALIVE'] = 'true'
+            os.environ['AWS_RETRY_MODE'] = 'standard'
+
+            with patch('sys.argv', ['awslogs', 'groups', '--retry-mode',
+                                    'adaptive', '--connect-timeout', '2']), \
+                    patch('awslogs.bin.AWSLogs') as mock_awslogs:
+                self.assertEqual(main(), 0)
+
+            kwargs = mock_awslogs.call_args[1]
+            self.assertEqual(kwargs['max_pool_connections'], 64)
+            self.assertEqual(kwargs['read_timeout'], 30.0)
+            self.assertEqual(kwargs['connect_timeout'], 2.0)
+            self.assertEqual(kwargs['retry_mode'], 'adaptive')
+            self.assertIsNone(kwargs['max_attempts'])
+            self.assertTrue(kwargs['tcp_keepalive'])
+        finally:
+            os.environ.clear()
+            os.environ.update(original_env)
+
 if __name__ == '__main__':
     unittest.main() 
\ No newline at end of file
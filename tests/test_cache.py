@@ -0,0 +1,94 @@
+import os
+import shutil
+import json
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+from awslogs.cache import StreamCache, save_json
+
+
+class TestStreamCache(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def make_cache(self, key=("default", "us-east-1", None, "group"), ttl=60):
+        return StreamCache.for_group(key, ttl, self.cache_dir)
+
+    def test_save_and_load(self):
+        cache = self.make_cache()
+        self.assertFalse(cache.load())
+
+        cache.reset()
+        cache.update({'logStreamName': 'b', 'firstEventTimestamp': 1,
+                      'lastEventTimestamp': 5, 'lastIngestionTime': 6,
+                      'arn': 'ignored'})
+        cache.update({'logStreamName': 'a'})
+        cache.save()
+
+        loaded = self.make_cache()
+        self.assertTrue(loaded.load())
+        self.assertEqual(loaded.high_water, 5)
+        self.assertEqual(list(loaded), [
+            {'logStreamName': 'a'},
+            {'logStreamName': 'b', 'firstEventTimestamp': 1,
+             'lastEventTimestamp': 5, 'lastIngestionTime': 6},
+        ])
+
+    def test_keys_use_different_files(self):
+        one = self.make_cache(key=("default", "us-east-1", None, "group"))
+        other = self.make_cache(key=("default", "eu-west-1", None, "group"))
+        self.assertNotEqual(one.path, other.path)
+        self.assertTrue(one.path.startswith(self.cache_dir))
+
+    def test_expired_cache_is_not_loaded(self):
+        cache = self.make_cache(ttl=60)
+        with patch('awslogs.cache.time.time', return_value=1000):
+            cache.reset()
+        cache.save()
+
+        with patch('awslogs.cache.time.time', return_value=1059):
+            self.assertTrue(self.make_cache(ttl=60).load())
+        with patch('awslogs.cache.time.time', return_value=1061):
+            self.assertFalse(self.make_cache(ttl=60).load())
+
+    def test_corrupted_cache_is_not_loaded(self):
+        cache = self.make_cache()
+        os.makedirs(os.path.dirname(cache.path))
+        with open(cache.path, 'w') as f:
+            f.write('{not json')
+        self.assertFalse(cache.load())
+
+
+
+class TestSaveJson(unittest.TestCase):
+    def test_concurrent_saves(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'streams', 'group.json')
+        errors = []
+
+        def save(value):
+            try:
+                for _ in range(100):
+                    save_json(path, {'value': value})
+            except Exception as exc:
+                errors.append(exc)
+
+        threads = [threading.Thread(target=save, args=(i,)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        with open(path) as f:
+            self.assertIn(json.load(f)['value'], range(4))
+        self.assertEqual(os.listdir(os.path.dirname(path)), ['group.json'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,8 +1,17 @@
+import io
+import os
+import json
+import shutil
+import tempfile
 import unittest
 from unittest.mock import MagicMock, patch, call
+from botocore.exceptions import ClientError
 from datetime import datetime, timedelta
-from awslogs.core import AWSLogs
-from awslogs.exceptions import NoStreamsFilteredError, TooManyStreamsFilteredError
+from awslogs.core import AWSLogs, boto3_client, split_literal_prefix, split_time_range
+from awslogs.throttle import ThrottledClient
+from awslogs.exceptions import (
+    NoGroupsFilteredError, NoStreamsFilteredError, TooManyStreamsFilteredError
+)
 
 class TestAWSLogs(unittest.TestCase):
     def setUp(self):
@@ -36,7 +45,52 @@ class TestAWSLogs(unittest.TestCase):
         self.assertEqual(logs.log_group_name, "test-group")
         self.assertEqual(logs.log_stream_name, "test-stream")
         self.assertTrue(logs.watch)
-        
+
+    def test_stream_cache_ttl(self):
+        logs = AWSLogs(aws_region="us-east-1")
+        self.assertEqual(logs.stream_cache_ttl, AWSLogs.STREAM_CACHE_TTL)
+        # Zero rebuilds the cache every time
+        logs = AWSLogs(aws_region="us-east-1", stream_cache_ttl=0)
+        self.assertEqual(logs.stream_cache_ttl, 0)
+
+    def test_client_config(self):
+        AWSLogs(aws_region="us-east-1")
+        config = self.mock_boto3_client.call_args[0][-1]
+        self.assertEqual(config, {'max_pool_connections': 10})
+
+        # The pool is sized for the concurrent requests
+        AWSLogs(aws_region="us-east-1", max_in_flight=32, parallel=16)
+        config = self.mock_boto3_client.call_args[0][-1]
+        self.assertEqual(config, {'max_pool_connections': 32})
+
+        AWSLogs(aws_region="us-east-1", max_in_flight=32,
+                max_pool_connections=50, connect_timeout=2, read_timeout=30,
+                retry_mode="adaptive", max_attempts=5, tcp_keepalive=True)
+        config = self.mock_boto3_client.call_args[0][-1]
+        self.assertEqual(config, {
+            'max_pool_connections': 50,
+            'connect_timeout': 2,
+            'read_timeout': 30,
+            'retries': {'mode': 'adaptive', 'total_max_attempts': 5},
+            'tcp_keepalive': True,
+        })
+
+    def test_boto3_client_config(self):
+        self.patcher.stop()
+        try:
+            client = boto3_client(
+                None, "key", "secret", None, "us-east-1", None, None,
+                {'max_pool_connections': 50, 'read_timeout': 30,
+                 'retries': {'mode': 'standard'}, 'tcp_keepalive': True},
+            )
+        finally:
+            self.patcher.start()
+        config = client.meta.config
+        self.assertEqual(config.max_pool_connections, 50)
+        self.assertEqual(config.read_timeout, 30)
+        self.assertEqual(config.retries['mode'], 'standard')
+        self.assertTrue(config.tcp_keepalive)
+
     def test_parse_datetime(self):
         logs = AWSLogs(aws_region="us-east-1")
         
@@ -201,6 +255,722 @@ class TestAWSLogs(unittest.TestCase):
         self.assertEqual(list(streams), ['test-stream'])
         mock_get_streams.assert_called_once_with("test-group", ".*test.*")
     
+    def test_list_logs_deduplicates_events(self):
+        self.mock_client.filter_log_events.side_effect = [
+            {
+                'events': [
+                    {'eventId': '1', 'logStreamName': 's1', 'message': 'one',
+                     'timestamp': 1, 'ingestionTime': 1},
+                    {'eventId': '2', 'logStreamName': 's1', 'message': 'two',
+                     'timestamp': 2, 'ingestionTime': 2},
+                ],
+                'nextToken': 'token'
+            },
+            {
+                'events': [
+                    {'eventId': '2', 'logStreamName': 's1', 'message': 'two',
+                     'timestamp': 2, 'ingestionTime': 2},
+                    {'eventId': '3', 'logStreamName': 's1', 'message': 'three',
+                     'timestamp': 3, 'ingestionTime': 3},
+                ]
+            },
+        ]
+
+        logs = AWSLogs(
+            aws_region="us-east-1",
+            log_group_name="test-group",
+            log_stream_name="ALL",
+            color="never",
+            dedup_window=5,
+        )
+        with patch('sys.stdout', new_callable=io.StringIO) as mock_stdout:
+            logs.list_logs()
+
+        self.assertEqual(mock_stdout.getvalue(), 'one\ntwo\nthree\n')
+        self.assertEqual(logs.dedup_window, 5)
+
+    def test_iter_events(self):
+        self.mock_client.filter_log_events.side_effect = [
+            {'events': [
+                {'eventId': '1', 'logStreamName': 's1', 'message': 'one',
+                 'timestamp': 1},
+                {'eventId': '2', 'logStreamName': 's1', 'message': 'two',
+                 'timestamp': 2},
+            ], 'nextToken': 'token'},
+            {'events': [
+                {'eventId': '2', 'logStreamName': 's1', 'message': 'two',
+                 'timestamp': 2},
+            ]},
+        ]
+
+        logs = AWSLogs(aws_region="us-east-1", log_group_name="test-group",
+                       log_stream_name="ALL")
+        with patch('sys.stdout', new_callable=io.StringIO) as mock_stdout:
+            pages = list(logs.iter_pages())
+
+        self.assertEqual(mock_stdout.getvalue(), '')
+        self.assertEqual([[e['eventId'] for e in page] for page in pages],
+                         [['1', '2'], []])
+        self.assertEqual(pages[0][0]['logGroupName'], 'test-group')
+
+        self.mock_client.filter_log_events.side_effect = None
+        self.mock_client.filter_log_events.return_value = {'events': [
+            {'eventId': '3', 'logStreamName': 's1', 'message': 'three',
+             'timestamp': 3},
+        ]}
+        self.assertEqual([e['message'] for e in logs.iter_events()], ['three'])
+
+    def _fake_filter_log_events(self, events, page_size):
+        # Serves ``events`` honouring startTime/endTime and paginating
+        def filter_log_events(**kwargs):
+            matching = [
+                e for e in events
+                if kwargs.get('startTime', 0) <= e['timestamp']
+                <= kwargs.get('endTime', float('inf'))
+            ]
+            offset = int(kwargs.get('nextToken', 0))
+            response = {'events': matching[offset:offset + page_size]}
+            if offset + page_size < len(matching):
+                response['nextToken'] = str(offset + page_size)
+            return response
+        return filter_log_events
+
+    def test_split_time_range(self):
+        self.assertEqual(split_time_range(0, 10, 2), [(0, 5), (5, 10)])
+        self.assertEqual(split_time_range(0, 10, 3), [(0, 3), (3, 6), (6, 10)])
+        self.assertEqual(split_time_range(0, 2, 5), [(0, 1), (1, 2)])
+        self.assertEqual(split_time_range(5, 5, 2), [(5, 5)])
+
+    def test_list_logs_parallel(self):
+        events = [
+            {'eventId': str(i), 'logStreamName': 's1', 'message': str(i),
+             'timestamp': 1000 + i // 2, 'ingestionTime': 1000 + i // 2}
+            for i in range(400)
+        ]
+        self.mock_client.filter_log_events.side_effect = \
+            self._fake_filter_log_events(events, page_size=3)
+
+        logs = AWSLogs(
+            aws_region="us-east-1",
+            log_group_name="test-group",
+            log_stream_name="ALL",
+            color="never",
+            parallel=3,
+        )
+        logs.start = 1000
+        logs.end = 1199
+        with patch('sys.stdout', new_callable=io.StringIO) as mock_stdout:
+            logs.list_logs()
+
+        # Every event comes out once and in order even though the slices
+        # were fetched concurrently and the busiest ones were split.
+        self.assertEqual(
+            mock_stdout.getvalue().splitlines(),
+            [str(i) for i in range(400)]
+        )
+        for c in self.mock_client.filter_log_events.call_args_list:
+            self.assertGreaterEqual(c[1]['startTime'], 1000)
+            self.assertLessEqual(c[1]['endTime'], 1199)
+
+    def test_fetch_slice_splits_busy_slices(self):
+        events = [
+            {'eventId': str(i), 'timestamp': i // 3} for i in range(60)
+        ]
+        self.mock_client.filter_log_events.side_effect = \
+            self._fake_filter_log_events(events, page_size=4)
+        logs = AWSLogs(aws_region="us-east-1")
+        logs.SLICE_MAX_PAGES = 2
+
+        fetched, rest = logs._fetch_slice({'startTime': 0}, 0, 20)
+        # 8 events fetched, the ones sharing the last timestamp are left
+        self.assertEqual([e['eventId'] for e in fetched],
+                         [str(i) for i in range(6)])
+        self.assertEqual(rest, (2, 20))
+
+        fetched, rest = logs._fetch_slice({'startTime': 0}, 18, 20)
+        self.assertEqual(len(fetched), 6)
+        self.assertIsNone(rest)
+
+    def test_list_logs_shards_streams(self):
+        stream_names = ['stream-{:03}'.format(i) for i in range(250)]
+        mock_paginator = MagicMock()
+        mock_paginator.paginate.return_value = [
+            {'logStreams': [{'logStreamName': name} for name in stream_names]}
+        ]
+        self.mock_client.get_paginator.return_value = mock_paginator
+
+        def timestamp(name):
+            return int(name[-3:]) % 7 * 1000 + int(name[-3:])
+
+        def filter_log_events(**kwargs):
+            # One event per stream, timestamps interleaved across shards
+            return {'events': [
+                {'eventId': name, 'logStreamName': name, 'message': name,
+                 'timestamp': timestamp(name)}
+                for name in sorted(kwargs['logStreamNames'], key=timestamp)
+            ]}
+        self.mock_client.filter_log_events.side_effect = filter_log_events
+
+        logs = AWSLogs(
+            aws_region="us-east-1",
+            log_group_name="test-group",
+            log_stream_name="stream-",
+            color="never",
+            output_stream_enabled=False,
+            max_in_flight=2,
+        )
+        with patch('sys.stdout', new_callable=io.StringIO) as mock_stdout:
+            logs.list_logs()
+
+        shards = [
+            c[1]['logStreamNames']
+            for c in self.mock_client.filter_log_events.call_args_list
+        ]
+        self.assertEqual([len(shard) for shard in sorted(shards, key=len)],
+                         [50, 100, 100])
+        self.assertEqual(
+            mock_stdout.getvalue().splitlines(),
+            sorted(stream_names, key=timestamp)
+        )
+
+    def test_list_logs_multiple_groups(self):
+        mock_paginator = MagicMock()
+        mock_paginator.paginate.return_value = [
+            {'logGroups': [{'logGroupName': 'svc-api'},
+                           {'logGroupName': 'svc-worker'}]}
+        ]
+        self.mock_client.get_paginator.return_value = mock_paginator
+
+        def filter_log_events(**kwargs):
+            group = kwargs['logGroupName']
+            offset = {'svc-db': 0, 'svc-api': 1, 'svc-worker': 2}[group]
+            return {'events': [
+                {'eventId': '{}-{}'.format(group, ts), 'logStreamName': 's',
+                 'message': '{}@{}'.format(group, ts), 'timestamp': ts}
+                for ts in range(offset, 9, 3)
+            ]}
+        self.mock_client.filter_log_events.side_effect = filter_log_events
+
+        logs = AWSLogs(
+            aws_region="us-east-1",
+            log_group_name="svc-db,svc-api",
+            log_group_prefix="svc-",
+            log_stream_name="ALL",
+            color="never",
+            output_group_enabled=True,
+        )
+        with patch('sys.stdout', new_callable=io.StringIO) as mock_stdout, \
+                patch('awslogs.core.colored', side_effect=lambda text, *a, **kw: text):
+            logs.list_logs()
+
+        mock_paginator.paginate.assert_called_once_with(logGroupNamePrefix='svc-')
+        self.assertEqual(self.mock_client.filter_log_events.call_count, 3)
+        self.assertEqual(mock_stdout.getvalue().splitlines(), [
+            'svc-db     svc-db@0',
+            'svc-api    svc-api@1',
+            'svc-worker svc-worker@2',
+            'svc-db     svc-db@3',
+            'svc-api    svc-api@4',
+            'svc-worker svc-worker@5',
+            'svc-db     svc-db@6',
+            'svc-api    svc-api@7',
+            'svc-worker svc-worker@8',
+        ])
+
+    def test_list_logs_jsonl_output(self):
+        events = [
+            {'eventId': str(i), 'logStreamName': 's1',
+             'message': '{"n": %d}\n' % i,
+             'timestamp': 1000 + i, 'ingestionTime': 2000 + i}
+            for i in range(5)
+        ]
+        self.mock_client.filter_log_events.side_effect = \
+            self._fake_filter_log_events(events, page_size=2)
+
+        logs = AWSLogs(
+            aws_region="us-east-1",
+            log_group_name="test-group",
+            log_stream_name="ALL",
+            color="always",
+            output_group_enabled=True,
+            output_timestamp_enabled=True,
+            output_format="jsonl",
+            query="n",
+        )
+        with patch('sys.stdout', new_callable=io.StringIO) as mock_stdout:
+            logs.list_logs()
+
+        self.assertEqual(
+            [json.loads(line) for line in mock_stdout.getvalue().splitlines()],
+            [dict(event, logGroupName='test-group', query=i)
+             for i, event in enumerate(events)]
+        )
+
+    def test_list_logs_csv_output(self):
+        self.mock_client.filter_log_events.side_effect = [
+            {'events': [
+                {'eventId': '1', 'logStreamName': 's1', 'message': 'a, b',
+                 'timestamp': 1000, 'ingestionTime': 2000}
+            ]}
+        ]
+        logs = AWSLogs(
+            aws_region="us-east-1",
+            log_group_name="test-group",
+            log_stream_name="ALL",
+            output_format="csv",
+        )
+        with patch('sys.stdout', new_callable=io.StringIO) as mock_stdout:
+            logs.list_logs()
+
+        self.assertEqual(mock_stdout.getvalue().splitlines(), [
+            'logGroupName,logStreamName,timestamp,ingestionTime,eventId,message',
+            'test-group,s1,1000,2000,1,"a, b"',
+        ])
+
+    def _export(self, export_dir, filter_log_events, start=1000,
+                log_stream_name="ALL"):
+        self.mock_client.filter_log_events.reset_mock()
+        self.mock_client.filter_log_events.side_effect = filter_log_events
+        logs = AWSLogs(
+            aws_region="us-east-1",
+            log_group_name="test-group",
+            log_stream_name=log_stream_name,
+            export_dir=export_dir,
+            compression="none",
+        )
+        logs.start = start
+        logs.end = 1100
+        with patch('sys.stderr', new_callable=io.StringIO):
+            logs.export_logs()
+
+    def _exported(self, export_dir):
+        with open(os.path.join(export_dir, 'part-00000.jsonl')) as f:
+            return [json.loads(line)['eventId'] for line in f]
+
+    def test_export_logs_resumes_with_next_token(self):
+        export_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, export_dir)
+        events = [
+            {'eventId': str(i), 'logStreamName': 's1', 'message': str(i),
+             'timestamp': 1000 + i // 2}
+            for i in range(10)
+        ]
+        fake = self._fake_filter_log_events(events, page_size=3)
+
+        def interrupted(**kwargs):
+            if kwargs.get('nextToken') == '6':
+                raise RuntimeError('connection lost')
+            return fake(**kwargs)
+
+        with self.assertRaises(RuntimeError):
+            self._export(export_dir, interrupted)
+        self.assertEqual(self._exported(export_dir), [str(i) for i in range(6)])
+
+        self._export(export_dir, fake)
+        calls = self.mock_client.filter_log_events.call_args_list
+        self.assertEqual(calls[0][1]['nextToken'], '6')
+        self.assertEqual(calls[0][1]['startTime'], 1000)
+        self.assertEqual(calls[0][1]['endTime'], 1100)
+        self.assertEqual(self._exported(export_dir), [str(i) for i in range(10)])
+
+        # Running a complete export again doesn't fetch anything
+        self._export(export_dir, fake)
+        self.mock_client.filter_log_events.assert_not_called()
+
+    def test_export_logs_resumes_from_timestamp(self):
+        export_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, export_dir)
+        events = [
+            {'eventId': str(i), 'logStreamName': 's1', 'message': str(i),
+             'timestamp': 1000 + i // 2}
+            for i in range(10)
+        ]
+        fake = self._fake_filter_log_events(events, page_size=3)
+
+        def interrupted(**kwargs):
+            if kwargs.get('nextToken') == '6':
+                raise RuntimeError('connection lost')
+            return fake(**kwargs)
+
+        def expired_token(**kwargs):
+            if 'nextToken' in kwargs and kwargs['startTime'] == 1000:
+                raise ClientError(
+                    {'Error': {'Code': 'InvalidParameterException'}},
+                    'FilterLogEvents'
+                )
+            return fake(**kwargs)
+
+        with self.assertRaises(RuntimeError):
+            self._export(export_dir, interrupted)
+
+        self._export(export_dir, expired_token)
+        calls = self.mock_client.filter_log_events.call_args_list
+        # Events 4 and 5, logged at 1002, were already exported
+        self.assertEqual(calls[1][1]['startTime'], 1002)
+        self.assertNotIn('nextToken', calls[1][1])
+        self.assertEqual(self._exported(export_dir), [str(i) for i in range(10)])
+
+    def test_export_logs_resumes_with_the_same_streams(self):
+        export_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, export_dir)
+        # app/a went quiet before the resumed export is run
+        self.mock_client.get_paginator.return_value.paginate.return_value = [
+            {'logStreams': [
+                {'logStreamName': 'app/a', 'firstEventTimestamp': 1000,
+                 'lastIngestionTime': 1050},
+                {'logStreamName': 'app/b', 'firstEventTimestamp': 1000,
+                 'lastIngestionTime': 9000},
+            ]}
+        ]
+        events = [
+            {'eventId': str(i), 'logStreamName': 'app/a', 'message': str(i),
+             'timestamp': 1000 + i}
+            for i in range(10)
+        ]
+        fake = self._fake_filter_log_events(events, page_size=3)
+
+        def interrupted(**kwargs):
+            if kwargs.get('nextToken') == '6':
+                raise RuntimeError('connection lost')
+            return fake(**kwargs)
+
+        with self.assertRaises(RuntimeError):
+            self._export(export_dir, interrupted, log_stream_name='app/')
+
+        self._export(export_dir, fake, start=5000, log_stream_name='app/')
+        calls = self.mock_client.filter_log_events.call_args_list
+        self.assertEqual(calls[0][1]['logStreamNames'], ['app/a', 'app/b'])
+        self.assertEqual(calls[0][1]['startTime'], 1000)
+        self.assertEqual(calls[0][1]['nextToken'], '6')
+        self.assertEqual(self._exported(export_dir), [str(i) for i in range(10)])
+
+    def test_list_logs_store(self):
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir)
+        events = [
+            {'eventId': str(i), 'logStreamName': 's1', 'message': str(i),
+             'timestamp': 1000 + i * 100, 'ingestionTime': 1000 + i * 100}
+            for i in range(10)
+        ]
+        self.mock_client.filter_log_events.side_effect = \
+            self._fake_filter_log_events(events, page_size=3)
+
+        def get(start, end):
+            self.mock_client.filter_log_events.reset_mock()
+            logs = AWSLogs(aws_region="us-east-1", log_group_name="test-group",
+                           log_stream_name="ALL", store=True,
+                           cache_dir=cache_dir)
+            logs.start = start
+            logs.end = end
+            with patch('sys.stdout', new_callable=io.StringIO) as mock_stdout:
+                logs.list_logs()
+            return mock_stdout.getvalue().splitlines()
+
+        self.assertEqual(get(1000, 1499), ['0', '1', '2', '3', '4'])
+        self.assertEqual(self.mock_client.filter_log_events.call_count, 2)
+
+        # Answered from the store
+        self.assertEqual(get(1100, 1299), ['1', '2'])
+        self.mock_client.filter_log_events.assert_not_called()
+
+        # Only the range the store doesn't have is fetched
+        self.assertEqual(get(1200, 1799), ['2', '3', '4', '5', '6', '7'])
+        calls = self.mock_client.filter_log_events.call_args_list
+        self.assertEqual(calls[0][1]['startTime'], 1500)
+        self.assertEqual(calls[0][1]['endTime'], 1799)
+
+    def test_list_logs_store_filter_pattern(self):
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir)
+        events = [
+            {'eventId': str(i), 'logStreamName': 's1',
+             'message': 'ERROR {}'.format(i) if i % 3 == 0 else 'INFO {}'.format(i),
+             'timestamp': 1000 + i * 100, 'ingestionTime': 1000 + i * 100}
+            for i in range(10)
+        ]
+        self.mock_client.filter_log_events.side_effect = \
+            self._fake_filter_log_events(events, page_size=3)
+
+        def get(filter_pattern):
+            self.mock_client.filter_log_events.reset_mock()
+            logs = AWSLogs(aws_region="us-east-1", log_group_name="test-group",
+                           log_stream_name="ALL", store=True,
+                           cache_dir=cache_dir, filter_pattern=filter_pattern)
+            logs.start = 1000
+            logs.end = 1999
+            with patch('sys.stdout', new_callable=io.StringIO) as mock_stdout:
+                logs.list_logs()
+            return mock_stdout.getvalue().splitlines()
+
+        # The store is filled with all the events, and filtered locally
+        self.assertEqual(get('ERROR'), ['ERROR 0', 'ERROR 3', 'ERROR 6', 'ERROR 9'])
+        for c in self.mock_client.filter_log_events.call_args_list:
+            self.assertNotIn('filterPattern', c[1])
+
+        self.assertEqual(get('?"INFO 1" ?"INFO 2"'), ['INFO 1', 'INFO 2'])
+        self.mock_client.filter_log_events.assert_not_called()
+
+        # Patterns that can't be evaluated locally are left to AWS
+        get('[level, number=1]')
+        self.assertEqual(
+            self.mock_client.filter_log_events.call_args[1]['filterPattern'],
+            '[level, number=1]'
+        )
+
+    def test_list_logs_no_groups_for_prefix(self):
+        mock_paginator = MagicMock()
+        mock_paginator.paginate.return_value = [{'logGroups': []}]
+        self.mock_client.get_paginator.return_value = mock_paginator
+
+        logs = AWSLogs(aws_region="us-east-1", log_group_prefix="nope-",
+                       log_group_name="ALL", log_stream_name="ALL")
+        with self.assertRaises(NoGroupsFilteredError):
+            logs.list_logs()
+
+    def test_get_streams_cached(self):
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir)
+        mock_paginator = MagicMock()
+        self.mock_client.get_paginator.return_value = mock_paginator
+
+        def stream(name, last_event):
+            return {'logStreamName': name, 'firstEventTimestamp': 0,
+                    'lastEventTimestamp': last_event,
+                    'lastIngestionTime': last_event}
+
+        logs = AWSLogs(aws_region="us-east-1", log_group_name="test-group",
+                       stream_cache=True, cache_dir=cache_dir)
+        logs.STREAM_CACHE_LAG = 10
+
+        # The first call fills the cache with all the streams
+        mock_paginator.paginate.return_value = [
+            {'logStreams': [stream('a', 100), stream('b', 200)]}
+        ]
+        self.assertEqual(list(logs.get_streams()), ['a', 'b'])
+        mock_paginator.paginate.assert_called_once_with(logGroupName='test-group')
+
+        # Later calls only walk streams written since the high-water mark
+        consumed = []
+
+        def recent_first(**kwargs):
+            for page in ([stream('c', 300), stream('b', 250)],
+                         [stream('a', 100)]):
+                consumed.append(page)
+                yield {'logStreams': page}
+        mock_paginator.paginate.side_effect = recent_first
+        self.assertEqual(list(logs.get_streams()), ['a', 'b', 'c'])
+        mock_paginator.paginate.assert_called_with(
+            logGroupName='test-group', orderBy='LastEventTime', descending=True
+        )
+        self.assertEqual(len(consumed), 2)
+
+    def test_split_literal_prefix(self):
+        self.assertEqual(split_literal_prefix('ecs/api/'), ('ecs/api/', ''))
+        self.assertEqual(split_literal_prefix(r'ecs/api\.v2/[0-9]+'),
+                         ('ecs/api.v2/', '[0-9]+'))
+        self.assertEqual(split_literal_prefix('.*'), ('', '.*'))
+        self.assertEqual(split_literal_prefix('web-(a|b)'), ('web-', '(a|b)'))
+        self.assertEqual(split_literal_prefix(r'\d+'), ('', r'\d+'))
+        self.assertEqual(split_literal_prefix('(?i)web'), ('', '(?i)web'))
+        # Quantified characters may not be there at all
+        self.assertEqual(split_literal_prefix('webs?'), ('web', 's?'))
+        self.assertEqual(split_literal_prefix('webs+'), ('web', 's+'))
+        self.assertEqual(split_literal_prefix('ab{2}'), ('a', 'b{2}'))
+        # Top level alternations have no common prefix
+        self.assertEqual(split_literal_prefix('web|api'), ('', 'web|api'))
+        self.assertEqual(split_literal_prefix('web[|]x'), ('web', '[|]x'))
+
+    def test_get_streams_from_pattern_uses_prefix(self):
+        mock_paginator = MagicMock()
+        mock_paginator.paginate.return_value = [
+            {'logStreams': [{'logStreamName': 'ecs/api/1'},
+                            {'logStreamName': 'ecs/api/x'},
+                            {'logStreamName': 'ecs/api/22'}]}
+        ]
+        self.mock_client.get_paginator.return_value = mock_paginator
+
+        logs = AWSLogs(aws_region="us-east-1")
+        streams = list(logs._get_streams_from_pattern("test-group", "ecs/api/[0-9]+"))
+
+        self.assertEqual(streams, ['ecs/api/1', 'ecs/api/22'])
+        mock_paginator.paginate.assert_called_once_with(
+            logGroupName='test-group', logStreamNamePrefix='ecs/api/'
+        )
+
+    def test_list_logs_watch_backs_off(self):
+        def event(i):
+            return {'eventId': str(i), 'logStreamName': 's', 'message': str(i),
+                    'timestamp': i}
+        self.mock_client.filter_log_events.side_effect = [
+            {'events': [event(1)]},
+            {'events': []},
+            {'events': []},
+            {'events': [event(2)]},
+            {'events': []},
+        ]
+        sleeps = []
+
+        def sleep(seconds):
+            sleeps.append(seconds)
+            if len(sleeps) == 5:
+                raise KeyboardInterrupt
+
+        logs = AWSLogs(aws_region="us-east-1", log_group_name="test-group",
+                       log_stream_name="ALL", watch=True, watch_interval=1,
+                       watch_max_interval=3, stats=True)
+        with patch('awslogs.core.time.sleep', side_effect=sleep), \
+                patch('sys.stdout', new_callable=io.StringIO), \
+                patch('sys.stderr', new_callable=io.StringIO) as mock_stderr, \
+                self.assertRaises(KeyboardInterrupt):
+            logs.list_logs()
+
+        self.assertEqual(sleeps, [1, 1, 2, 1, 1])
+        self.assertIn("polls: 5", mock_stderr.getvalue())
+
+    def test_list_logs_stats_of_shared_client(self):
+        inner = MagicMock()
+        inner.filter_log_events.side_effect = [
+            ClientError({'Error': {'Code': 'ThrottlingException'}},
+                        'FilterLogEvents'),
+            {'events': []},
+        ]
+        client = ThrottledClient(inner)
+        # Throttles of the commands run before with the same client
+        client.throttles['filter_log_events'] = 3
+        self.mock_boto3_client.return_value = client
+
+        logs = AWSLogs(aws_region="us-east-1", log_group_name="test-group",
+                       log_stream_name="ALL", stats=True)
+        with patch('awslogs.throttle.time.sleep'), \
+                patch('sys.stdout', new_callable=io.StringIO), \
+                patch('sys.stderr', new_callable=io.StringIO) as mock_stderr:
+            logs.list_logs()
+
+        self.assertEqual(mock_stderr.getvalue(),
+                         'throttled requests: filter_log_events=1\n')
+
+    def test_list_logs_watch_moves_low_water_mark(self):
+        def event(i, timestamp):
+            return {'eventId': str(i), 'logStreamName': 's', 'message': str(i),
+                    'timestamp': timestamp}
+        self.mock_client.filter_log_events.side_effect = [
+            {'events': [event(1, 1000)], 'nextToken': 'token'},
+            {'events': [event(2, 9000), event(3, 10000)]},
+            {'events': [event(2, 9000), event(3, 10000), event(4, 10000)]},
+            {'events': [event(4, 10000), event(5, 12000)]},
+        ]
+        sleeps = []
+
+        def sleep(seconds):
+            sleeps.append(seconds)
+            if len(sleeps) == 3:
+                raise KeyboardInterrupt
+
+        # A window of a single id can't drop the replayed events by itself
+        logs = AWSLogs(aws_region="us-east-1", log_group_name="test-group",
+                       log_stream_name="ALL", watch=True, watch_skew=2,
+                       dedup_window=1)
+        logs.start = 500
+        with patch('awslogs.core.time.sleep', side_effect=sleep), \
+                patch('sys.stdout', new_callable=io.StringIO) as mock_stdout, \
+                self.assertRaises(KeyboardInterrupt):
+            logs.list_logs()
+
+        self.assertEqual(mock_stdout.getvalue().splitlines()[:5],
+                         ['1', '2', '3', '4', '5'])
+        calls = [c[1] for c in self.mock_client.filter_log_events.call_args_list]
+        self.assertEqual(calls[1]['nextToken'], 'token')
+        self.assertEqual(calls[2]['startTime'], 8000)
+        self.assertNotIn('nextToken', calls[2])
+        self.assertEqual(calls[3]['startTime'], 8000)
+
+    def test_list_logs_cursor(self):
+        cursor_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cursor_dir)
+        cursor = os.path.join(cursor_dir, 'cursor.json')
+
+        def event(i, timestamp):
+            return {'eventId': str(i), 'logStreamName': 's', 'message': str(i),
+                    'timestamp': timestamp}
+
+        def watch(responses):
+            self.mock_client.filter_log_events.reset_mock()
+            self.mock_client.filter_log_events.side_effect = responses
+            logs = AWSLogs(aws_region="us-east-1", log_group_name="test-group",
+                           log_stream_name="ALL", watch=True, cursor=cursor,
+                           start='1h')
+            with patch('awslogs.core.time.sleep', side_effect=KeyboardInterrupt), \
+                    patch('sys.stdout', new_callable=io.StringIO) as mock_stdout, \
+                    self.assertRaises(KeyboardInterrupt):
+                logs.list_logs()
+            return mock_stdout.getvalue().splitlines()
+
+        self.assertEqual(
+            watch([{'events': [event(1, 1000), event(2, 2000), event(3, 2000)]}]),
+            ['1', '2', '3', 'Closing...', '']
+        )
+
+        # The restarted tail starts from the last timestamp printed and
+        # skips the events it already printed
+        self.assertEqual(
+            watch([{'events': [event(2, 2000), event(3, 2000), event(4, 2000),
+                               event(5, 3000)]}]),
+            ['4', '5', 'Closing...', '']
+        )
+        kwargs = self.mock_client.filter_log_events.call_args[1]
+        self.assertEqual(kwargs['startTime'], 2000)
+
+    def test_list_logs_cursor_streams(self):
+        cursor_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cursor_dir)
+        cursor = os.path.join(cursor_dir, 'cursor.json')
+        with open(cursor, 'w') as f:
+            json.dump({'timestamp': 1000, 'event_ids': []}, f)
+        # app/a only logged between the cursor and the last hour
+        self.mock_client.get_paginator.return_value.paginate.return_value = [
+            {'logStreams': [
+                {'logStreamName': 'app/a', 'firstEventTimestamp': 500,
+                 'lastIngestionTime': 1500},
+            ]}
+        ]
+        self.mock_client.filter_log_events.return_value = {'events': []}
+        logs = AWSLogs(aws_region="us-east-1", log_group_name="test-group",
+                       log_stream_name="app/", cursor=cursor, start='1h')
+        with patch('sys.stdout', new_callable=io.StringIO):
+            logs.list_logs()
+
+        kwargs = self.mock_client.filter_log_events.call_args[1]
+        self.assertEqual(kwargs['logStreamNames'], ['app/a'])
+        self.assertEqual(kwargs['startTime'], 1000)
+
+    def test_list_query_results(self):
+        self.mock_client.start_query.return_value = {'queryId': 'q1'}
+        self.mock_client.get_query_results.return_value = {
+            'status': 'Complete',
+            'results': [
+                [{'field': '@timestamp', 'value': '2024-01-01 00:00:00.000'},
+                 {'field': '@message', 'value': 'hello'},
+                 {'field': '@ptr', 'value': 'p1'}],
+            ],
+            'statistics': {'recordsMatched': 1.0},
+        }
+        logs = AWSLogs(aws_region="us-east-1", log_group_name="g1,g2",
+                       query_string="fields @timestamp, @message",
+                       start="2024-01-01", end="2024-01-02", stats=True)
+        with patch('sys.stdout', new_callable=io.StringIO) as mock_stdout, \
+                patch('sys.stderr', new_callable=io.StringIO) as mock_stderr:
+            logs.list_query_results()
+
+        self.assertEqual(mock_stdout.getvalue(),
+                         '2024-01-01 00:00:00.000\thello\n')
+        self.assertEqual(mock_stderr.getvalue(), 'recordsMatched: 1\n')
+        self.mock_client.start_query.assert_called_once_with(
+            logGroupNames=['g1', 'g2'],
+            startTime=logs.start // 1000,
+            endTime=logs.end // 1000,
+            queryString="fields @timestamp, @message",
+        )
+
     def test_color_method(self):
         # Test the color method with different preferences
         logs = AWSLogs(aws_region="us-east-1", color="auto")
@@ -0,0 +1,36 @@
+import os
+import shutil
+import tempfile
+import unittest
+from awslogs.cursor import WatchCursor
+
+
+class TestWatchCursor(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.path = os.path.join(self.directory, 'cursor.json')
+
+    def test_save_and_load(self):
+        cursor = WatchCursor(self.path)
+        self.assertFalse(cursor.load())
+        cursor.advance(1000, 'a')
+        cursor.advance(2000, 'c')
+        cursor.advance(1000, 'b')
+        cursor.advance(2000, 'd')
+        cursor.save()
+
+        # Only the ids at the newest timestamp are needed to restart there
+        loaded = WatchCursor(self.path)
+        self.assertTrue(loaded.load())
+        self.assertEqual(loaded.timestamp, 2000)
+        self.assertEqual(loaded.event_ids, {'c', 'd'})
+
+    def test_corrupted(self):
+        with open(self.path, 'w') as f:
+            f.write('{"timestamp": 1')
+        self.assertFalse(WatchCursor(self.path).load())
+
+
+if __name__ == '__main__':
+    unittest.main()
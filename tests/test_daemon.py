@@ -0,0 +1,83 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+from unittest.mock import MagicMock, patch
+from awslogs import daemon
+from awslogs.exceptions import DaemonRunningError
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestDaemon(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.path = os.path.join(self.directory, 'daemon.sock')
+
+        def paginate(**kwargs):
+            if kwargs.get('logGroupNamePrefix'):
+                return [{'logGroups': []}]
+            return [{'logGroups': [{'logGroupName': 'group-a'},
+                                   {'logGroupName': 'group-b'}]}]
+        self.mock_client = MagicMock()
+        self.mock_client.get_paginator.return_value.paginate.side_effect = paginate
+        patcher = patch('awslogs.core.boto3_client', return_value=self.mock_client)
+        self.mock_boto3_client = patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.daemon = daemon.Daemon(self.path)
+        thread = threading.Thread(target=self.daemon.serve)
+        thread.start()
+        self.addCleanup(thread.join)
+        self.addCleanup(self.daemon.shutdown)
+
+    def awslogs(self, *args):
+        return subprocess.run(
+            [sys.executable, '-c',
+             'import sys; from awslogs.bin import main; sys.exit(main(sys.argv))']
+            + list(args),
+            cwd=ROOT, capture_output=True, text=True, timeout=30,
+            env=dict(os.environ, AWSLOGS_SOCKET=self.path),
+        )
+
+    def test_runs_commands_with_warm_clients(self):
+        for _ in range(2):
+            result = self.awslogs('groups', '--aws-region', 'us-east-1')
+            self.assertEqual(result.returncode, 0, result.stderr)
+            self.assertEqual(result.stdout.splitlines(), ['group-a', 'group-b'])
+        self.mock_boto3_client.assert_called_once()
+
+    def test_reports_errors(self):
+        result = self.awslogs('get', '--log-group-prefix', 'missing-', 'ALL', 'ALL',
+                              '--aws-region', 'us-east-1')
+        self.assertEqual(result.returncode, 8)
+        self.assertIn('missing-', result.stderr)
+
+    def test_falls_back_to_in_process(self):
+        options = {'func': 'list_groups'}
+        with tempfile.TemporaryFile('w') as stdout, patch('sys.stdout', stdout):
+            self.assertIsNone(daemon.forward(
+                options, os.path.join(self.directory, 'missing.sock')))
+            self.assertIsNone(daemon.forward(
+                {'func': 'list_logs', 'watch': True}, self.path))
+            self.assertIsNone(daemon.forward({'func': 'export_logs'}, self.path))
+            # The daemon would resolve credentials differently
+            with patch.dict(os.environ, {'AWS_PROFILE': 'other-profile'}):
+                self.assertIsNone(daemon.forward(options, self.path))
+            # Or read other AWS config files, caches or time zone
+            for name in ('HOME', 'XDG_CACHE_HOME', 'TZ'):
+                with patch.dict(os.environ, {name: '/elsewhere'}):
+                    self.assertIsNone(daemon.forward(options, self.path))
+        self.mock_boto3_client.assert_not_called()
+
+    def test_only_one_daemon(self):
+        with self.assertRaises(DaemonRunningError):
+            daemon.Daemon(self.path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+from awslogs.dedup import EventIdWindow, TimestampedEventIds
+
+
+class TestEventIdWindow(unittest.TestCase):
+    def test_add_and_contains(self):
+        window = EventIdWindow(10)
+        self.assertTrue(window.add("a"))
+        self.assertFalse(window.add("a"))
+        self.assertIn("a", window)
+        self.assertNotIn("b", window)
+        self.assertEqual(len(window), 1)
+
+    def test_evicts_oldest(self):
+        # Same eviction order as the deque(maxlen=...) it replaces
+        window = EventIdWindow(3)
+        for event_id in ("a", "b", "c", "d"):
+            window.add(event_id)
+        self.assertNotIn("a", window)
+        self.assertEqual(len(window), 3)
+        for event_id in ("b", "c", "d"):
+            self.assertIn(event_id, window)
+
+        # An evicted id is accepted again
+        self.assertTrue(window.add("a"))
+        self.assertNotIn("b", window)
+        self.assertEqual(list(window), ["c", "d", "a"])
+
+    def test_zero_size_window(self):
+        window = EventIdWindow(0)
+        self.assertTrue(window.add("a"))
+        self.assertTrue(window.add("a"))
+        self.assertEqual(len(window), 0)
+
+
+class TestTimestampedEventIds(unittest.TestCase):
+    def test_add(self):
+        seen = TimestampedEventIds()
+        self.assertIsNone(seen.newest)
+        self.assertTrue(seen.add(2000, "a"))
+        self.assertTrue(seen.add(2000, "b"))
+        self.assertTrue(seen.add(1000, "c"))
+        self.assertFalse(seen.add(2000, "a"))
+        self.assertEqual(seen.newest, 2000)
+        self.assertEqual(len(seen), 3)
+
+    def test_prune(self):
+        seen = TimestampedEventIds()
+        for timestamp in range(10):
+            seen.add(timestamp, str(timestamp))
+        seen.prune(8)
+        self.assertEqual(len(seen), 2)
+        self.assertFalse(seen.add(8, "8"))
+        # Older ids are forgotten
+        self.assertTrue(seen.add(3, "3"))
+
+
+if __name__ == '__main__':
+    unittest.main()
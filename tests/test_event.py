@@ -0,0 +1,58 @@
+import unittest
+from awslogs.event import LogEvent, event_to_dict
+
+
+RESPONSE_EVENT = {
+    'logStreamName': 'stream',
+    'timestamp': 1000,
+    'message': 'hello\n',
+    'ingestionTime': 1500,
+    'eventId': '42',
+}
+
+
+class TestLogEvent(unittest.TestCase):
+    def test_from_response(self):
+        event = LogEvent.from_response(dict(RESPONSE_EVENT), 'group')
+        self.assertEqual(event.group, 'group')
+        self.assertEqual(event.stream, 'stream')
+        self.assertEqual(event.timestamp, 1000)
+        self.assertEqual(event.ingestion_time, 1500)
+        self.assertEqual(event.event_id, '42')
+        self.assertEqual(event.message, 'hello\n')
+        self.assertFalse(hasattr(event, '__dict__'))
+
+    def test_stream_names_are_interned(self):
+        first = LogEvent.from_response(dict(RESPONSE_EVENT, logStreamName=''.join(['str', 'eam'])))
+        second = LogEvent.from_response(dict(RESPONSE_EVENT, logStreamName=''.join(['stre', 'am'])))
+        self.assertIs(first.stream, second.stream)
+
+    def test_reads_like_a_dict(self):
+        event = LogEvent.from_response(dict(RESPONSE_EVENT), 'group')
+        self.assertEqual(event['logGroupName'], 'group')
+        self.assertEqual(event['eventId'], '42')
+        self.assertEqual(event.get('ingestionTime'), 1500)
+        self.assertEqual(event.get('unknown', 'default'), 'default')
+        with self.assertRaises(KeyError):
+            event['unknown']
+
+    def test_to_dict(self):
+        event = LogEvent.from_response(dict(RESPONSE_EVENT), 'group')
+        self.assertEqual(event.to_dict(), dict(RESPONSE_EVENT, logGroupName='group'))
+        self.assertEqual(event_to_dict(event), event.to_dict())
+        self.assertIs(event_to_dict(RESPONSE_EVENT), RESPONSE_EVENT)
+
+        untagged = LogEvent.from_response(
+            {k: v for k, v in RESPONSE_EVENT.items() if k != 'ingestionTime'})
+        self.assertEqual(untagged.to_dict(),
+                         {k: v for k, v in RESPONSE_EVENT.items() if k != 'ingestionTime'})
+
+    def test_equality(self):
+        self.assertEqual(LogEvent.from_response(RESPONSE_EVENT, 'group'),
+                         LogEvent.from_response(RESPONSE_EVENT, 'group'))
+        self.assertNotEqual(LogEvent.from_response(RESPONSE_EVENT, 'group'),
+                            LogEvent.from_response(RESPONSE_EVENT, 'other'))
+
+
+if __name__ == '__main__':
+    unittest.main()
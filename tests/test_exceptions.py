@@ -3,7 +3,11 @@ from awslogs.exceptions import (
     BaseAWSLogsException, 
     UnknownDateError, 
     TooManyStreamsFilteredError, 
-    NoStreamsFilteredError
+    NoStreamsFilteredError,
+    NoGroupsFilteredError,
+    CheckpointMismatchError,
+    MissingDependencyError,
+    DaemonRunningError
 )
 
 class TestExceptions(unittest.TestCase):
@@ -37,6 +41,26 @@ class TestExceptions(unittest.TestCase):
         exception = NoStreamsFilteredError(pattern)
         self.assertEqual(exception.code, 7)
         self.assertIn(pattern, exception.hint())
+    def test_no_groups_filtered_error(self):
+        prefix = "non-existent-prefix"
+        exception = NoGroupsFilteredError(prefix)
+        self.assertEqual(exception.code, 8)
+        self.assertIn(prefix, exception.hint())
+
+    def test_checkpoint_mismatch_error(self):
+        exception = CheckpointMismatchError("/tmp/checkpoint.json")
+        self.assertEqual(exception.code, 9)
+        self.assertIn("/tmp/checkpoint.json", exception.hint())
+
+    def test_missing_dependency_error(self):
+        exception = MissingDependencyError("zstandard", "zstd")
+        self.assertEqual(exception.code, 10)
+        self.assertIn("awslogs[zstd]", exception.hint())
+
+    def test_daemon_running_error(self):
+        exception = DaemonRunningError("/tmp/daemon.sock")
+        self.assertEqual(exception.code, 12)
+        self.assertIn("/tmp/daemon.sock", exception.hint())
 
 if __name__ == '__main__':
     unittest.main() 
\ No newline at end of file
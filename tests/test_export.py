@@ -0,0 +1,124 @@
+import gzip
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+from awslogs.exceptions import CheckpointMismatchError, MissingDependencyError
+from awslogs.export import ExportCheckpoint, ExportWriter
+
+
+def read_lines(path):
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt') as f:
+        return f.read().splitlines()
+
+
+class TestExportWriter(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def test_gzip(self):
+        writer = ExportWriter(self.directory)
+        writer.write(1000, 'one\n')
+        writer.sync()
+        writer.write(2000, 'two\n')
+        state = writer.close()
+
+        self.assertEqual(state['part'], 0)
+        path = writer.path(0)
+        self.assertTrue(path.endswith('part-00000.jsonl.gz'))
+        self.assertEqual(state['offset'], os.path.getsize(path))
+        # Every sync starts a new gzip member, read back as one stream
+        self.assertEqual(read_lines(path), ['one', 'two'])
+
+    def test_split_by_size(self):
+        writer = ExportWriter(self.directory, compression='none', max_bytes=8)
+        for i in range(5):
+            writer.write(i, 'line{}\n'.format(i))
+        writer.close()
+        self.assertEqual(read_lines(writer.path(0)), ['line0', 'line1'])
+        self.assertEqual(read_lines(writer.path(1)), ['line2', 'line3'])
+        self.assertEqual(read_lines(writer.path(2)), ['line4'])
+
+    def test_split_by_time(self):
+        writer = ExportWriter(self.directory, compression='none', max_seconds=60)
+        for timestamp in (0, 59999, 60000, 185000):
+            writer.write(timestamp, '{}\n'.format(timestamp))
+        writer.close()
+        self.assertEqual(read_lines(writer.path(0)), ['0', '59999'])
+        self.assertEqual(read_lines(writer.path(1)), ['60000'])
+        self.assertEqual(read_lines(writer.path(2)), ['185000'])
+
+    def test_resume_discards_what_was_not_synced(self):
+        writer = ExportWriter(self.directory)
+        writer.write(1000, 'one\n')
+        state = writer.sync()
+        writer.write(2000, 'lost\n')
+        writer.close()
+
+        writer = ExportWriter(self.directory, state=state)
+        writer.write(2000, 'two\n')
+        writer.close()
+        self.assertEqual(read_lines(writer.path(0)), ['one', 'two'])
+
+    def test_resume_into_full_file(self):
+        writer = ExportWriter(self.directory, compression='none', max_bytes=4)
+        writer.write(1000, 'one\n')
+        state = writer.sync()
+        writer.close()
+
+        writer = ExportWriter(
+            self.directory, compression='none', max_bytes=4, state=state
+        )
+        writer.write(2000, 'two\n')
+        writer.close()
+        self.assertEqual(read_lines(writer.path(0)), ['one'])
+        self.assertEqual(read_lines(writer.path(1)), ['two'])
+
+    def test_zstd_needs_zstandard(self):
+        with patch.dict('sys.modules', {'zstandard': None}):
+            with self.assertRaises(MissingDependencyError):
+                ExportWriter(self.directory, compression='zstd')
+
+
+class TestExportCheckpoint(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.path = os.path.join(self.directory, 'checkpoint.json')
+
+    def test_save_and_load(self):
+        checkpoint = ExportCheckpoint(self.path, {'group': 'a'})
+        self.assertFalse(checkpoint.load())
+        checkpoint.start, checkpoint.end = 1000, 5000
+        checkpoint.timestamp = 2000
+        checkpoint.event_ids = ['1', '2']
+        checkpoint.next_token = 'token'
+        checkpoint.writer = {'part': 1, 'offset': 42, 'size': 100, 'window': None}
+        checkpoint.save()
+
+        loaded = ExportCheckpoint(self.path, {'group': 'a'})
+        self.assertTrue(loaded.load())
+        self.assertEqual((loaded.start, loaded.end), (1000, 5000))
+        self.assertEqual(loaded.timestamp, 2000)
+        self.assertEqual(loaded.event_ids, ['1', '2'])
+        self.assertEqual(loaded.next_token, 'token')
+        self.assertEqual(loaded.writer['offset'], 42)
+        self.assertFalse(loaded.complete)
+
+    def test_different_export(self):
+        ExportCheckpoint(self.path, {'group': 'a'}).save()
+        with self.assertRaises(CheckpointMismatchError):
+            ExportCheckpoint(self.path, {'group': 'b'}).load()
+
+    def test_corrupted(self):
+        with open(self.path, 'w') as f:
+            f.write('{')
+        with self.assertRaises(CheckpointMismatchError):
+            ExportCheckpoint(self.path, {}).load()
+
+
+if __name__ == '__main__':
+    unittest.main()
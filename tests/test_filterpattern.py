@@ -0,0 +1,97 @@
+import json
+import unittest
+from awslogs.filterpattern import UnsupportedFilterPattern, compile_filter_pattern
+
+
+MESSAGE = json.dumps({
+    'eventType': 'UpdateTrail',
+    'sourceIPAddress': '123.123.123.123',
+    'latency': 250,
+    'ratio': 0.5,
+    'errorCode': None,
+    'encrypted': True,
+    'user': {'name': 'alice-admin', 'roles': ['read', 'write']},
+})
+
+
+class TestFilterPattern(unittest.TestCase):
+    def assertMatches(self, pattern, message, expected=True):
+        self.assertIs(compile_filter_pattern(pattern)(message), expected,
+                      '{!r} on {!r}'.format(pattern, message))
+
+    def test_empty(self):
+        self.assertMatches(None, 'anything')
+        self.assertMatches('', 'anything')
+        self.assertMatches('""', 'anything')
+
+    def test_terms(self):
+        self.assertMatches('ERROR', '[ERROR] Something failed')
+        self.assertMatches('ERROR', '[error] Something failed', False)
+        self.assertMatches('ERROR failed', '[ERROR] Something failed')
+        self.assertMatches('ERROR timeout', '[ERROR] Something failed', False)
+        self.assertMatches('"Something failed"', '[ERROR] Something failed')
+        self.assertMatches('"failed Something"', '[ERROR] Something failed',
+                           False)
+
+    def test_excluded_terms(self):
+        self.assertMatches('ERROR -timeout', 'ERROR: failed')
+        self.assertMatches('ERROR -timeout', 'ERROR: timeout', False)
+
+    def test_optional_terms(self):
+        self.assertMatches('?ERROR ?WARN', 'WARN: disk almost full')
+        self.assertMatches('?ERROR ?WARN', 'INFO: all good', False)
+        self.assertMatches('?"disk full" ?ERROR', 'disk full')
+
+    def test_json_equality(self):
+        self.assertMatches('{ $.eventType = "UpdateTrail" }', MESSAGE)
+        self.assertMatches('{ $.eventType = UpdateTrail }', MESSAGE)
+        self.assertMatches('{ $.eventType = "DeleteTrail" }', MESSAGE, False)
+        self.assertMatches('{ $.eventType != "DeleteTrail" }', MESSAGE)
+        self.assertMatches('{ $.sourceIPAddress = 123.123.* }', MESSAGE)
+        self.assertMatches('{ $.user.name = *admin }', MESSAGE)
+        self.assertMatches('{ $.user.roles[1] = "write" }', MESSAGE)
+        self.assertMatches('{ $.user.roles[2] = "write" }', MESSAGE, False)
+        self.assertMatches('{ $.missing = "x" }', MESSAGE, False)
+
+    def test_json_numbers(self):
+        self.assertMatches('{ $.latency > 200 }', MESSAGE)
+        self.assertMatches('{ $.latency >= 250 }', MESSAGE)
+        self.assertMatches('{ $.latency < 250 }', MESSAGE, False)
+        self.assertMatches('{ $.ratio = 0.5 }', MESSAGE)
+        self.assertMatches('{ $.ratio != 0.5 }', MESSAGE, False)
+        self.assertMatches('{ $.eventType > 1 }', MESSAGE, False)
+
+    def test_json_special_values(self):
+        self.assertMatches('{ $.errorCode IS NULL }', MESSAGE)
+        self.assertMatches('{ $.eventType IS NULL }', MESSAGE, False)
+        self.assertMatches('{ $.encrypted IS TRUE }', MESSAGE)
+        self.assertMatches('{ $.encrypted IS FALSE }', MESSAGE, False)
+        self.assertMatches('{ $.missing NOT EXISTS }', MESSAGE)
+        self.assertMatches('{ $.errorCode NOT EXISTS }', MESSAGE, False)
+
+    def test_json_compound(self):
+        self.assertMatches(
+            '{ $.eventType = "UpdateTrail" && $.latency > 100 }', MESSAGE)
+        self.assertMatches(
+            '{ $.eventType = "DeleteTrail" || $.latency > 100 }', MESSAGE)
+        self.assertMatches(
+            '{ ($.eventType = "DeleteTrail" || $.latency > 100) '
+            '&& $.encrypted IS FALSE }', MESSAGE, False)
+        self.assertMatches(
+            '{ $.eventType = "DeleteTrail" || ($.latency > 100 '
+            '&& $.encrypted IS TRUE) }', MESSAGE)
+
+    def test_json_on_other_messages(self):
+        self.assertMatches('{ $.latency > 1 }', 'latency 300', False)
+        self.assertMatches('{ $.latency > 1 }', '{"latency": ', False)
+
+    def test_unsupported(self):
+        for pattern in ('[ip, user, status = 404]', '%ERR.*%', 'ERROR ?WARN',
+                        '{ $.latency > }', '{ $.a = ) }', '{ $.a < "x" }',
+                        '{ latency = 1 }', '{ $.a = 1', '"unbalanced'):
+            with self.assertRaises(UnsupportedFilterPattern, msg=pattern):
+                compile_filter_pattern(pattern)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,157 @@
+import csv
+import io
+import json
+import unittest
+from unittest.mock import MagicMock
+import time
+from unittest.mock import patch
+from awslogs.formatting import (
+    TimestampFormatter, ansi_codes, build_formatter, build_record_formatter,
+    milis2iso
+)
+from awslogs.query import compile_query
+
+
+def fake_color(text, color):
+    return '<{}>{}</{}>'.format(color, text, color)
+
+
+EVENT = {
+    'logGroupName': 'group',
+    'logStreamName': 'stream',
+    'timestamp': 1000,
+    'ingestionTime': 2500,
+    'message': '{"level": "info"}\n',
+}
+
+
+class TestFormatting(unittest.TestCase):
+    def test_milis2iso(self):
+        self.assertEqual(milis2iso(0), '1970-01-01T00:00:00.000Z')
+        self.assertEqual(milis2iso(1500), '1970-01-01T00:00:01.500Z')
+
+    def test_milis2iso_matches_datetime(self):
+        from datetime import datetime
+        for milis in (0, 999, 1000, 1712345678901, 1712345678000, 1712345679999):
+            expected = datetime.utcfromtimestamp(milis / 1000.0).isoformat()
+            self.assertEqual(milis2iso(milis), (expected + ".000")[:23] + "Z")
+
+    def test_timestamp_formatter_memoizes_seconds(self):
+        formatter = TimestampFormatter()
+        with patch('awslogs.formatting.time.strftime', wraps=time.strftime) as mock:
+            formatted = formatter.format_many([1000, 1001, 1999, 2000, 1500])
+        self.assertEqual(formatted, [
+            '1970-01-01T00:00:01.000Z',
+            '1970-01-01T00:00:01.001Z',
+            '1970-01-01T00:00:01.999Z',
+            '1970-01-01T00:00:02.000Z',
+            '1970-01-01T00:00:01.500Z',
+        ])
+        self.assertEqual(mock.call_count, 2)
+
+    def test_timestamp_formatter_modes(self):
+        self.assertEqual(TimestampFormatter('epoch')(1234), '1234')
+        self.assertEqual(TimestampFormatter('epoch').format_many([1, 2]), ['1', '2'])
+
+        local = TimestampFormatter('local')(1712345678901)
+        self.assertRegex(local, r'^\d{4}-\d\d-\d\dT\d\d:\d\d:\d\d\.901[+-]\d\d:\d\d$')
+        self.assertEqual(local[:19], time.strftime(
+            '%Y-%m-%dT%H:%M:%S', time.localtime(1712345678)))
+
+        with self.assertRaises(ValueError):
+            TimestampFormatter('nope')
+
+    def test_ansi_codes(self):
+        self.assertEqual(ansi_codes(fake_color, 'red'), ('<red>', '</red>'))
+        self.assertEqual(ansi_codes(lambda text, color: text, 'red'), ('', ''))
+
+    def test_message_only(self):
+        format_event = build_formatter(fake_color)
+        self.assertEqual(format_event(EVENT), '{"level": "info"}')
+
+    def test_all_columns(self):
+        format_event = build_formatter(
+            fake_color, group_length=7, stream_length=8,
+            timestamp=True, ingestion_time=True,
+        )
+        self.assertEqual(
+            format_event(EVENT),
+            '<green>group  </green> <cyan>stream  </cyan> '
+            '<yellow>1970-01-01T00:00:01.000Z</yellow> '
+            '<blue>1970-01-01T00:00:02.500Z</blue> {"level": "info"}'
+        )
+
+    def test_single_column_and_query(self):
+        format_event = build_formatter(
+            fake_color, stream_length=6, query=compile_query('level')
+        )
+        self.assertEqual(format_event(EVENT), '<cyan>stream</cyan> info')
+
+    def test_timestamp_format(self):
+        format_event = build_formatter(
+            fake_color, timestamp=True, timestamp_format='epoch'
+        )
+        self.assertEqual(format_event(EVENT), '<yellow>1000</yellow> {"level": "info"}')
+
+    def test_color_is_only_called_when_building(self):
+        color = MagicMock(side_effect=fake_color)
+        format_event = build_formatter(color, group_length=5, stream_length=6)
+        self.assertEqual(color.call_count, 2)
+        for _ in range(3):
+            format_event(EVENT)
+        self.assertEqual(color.call_count, 2)
+
+
+class TestRecordFormatting(unittest.TestCase):
+    def test_jsonl(self):
+        header, format_event = build_record_formatter('jsonl')
+        self.assertIsNone(header)
+        self.assertEqual(json.loads(format_event(dict(EVENT))), EVENT)
+
+    def test_jsonl_query(self):
+        _, format_event = build_record_formatter('jsonl', compile_query('level'))
+        record = json.loads(format_event(dict(EVENT)))
+        self.assertEqual(record['query'], 'info')
+        self.assertEqual(record['message'], EVENT['message'])
+
+        record = json.loads(format_event(dict(EVENT, message='plain')))
+        self.assertIsNone(record['query'])
+
+    def test_csv(self):
+        header, format_event = build_record_formatter('csv')
+        self.assertEqual(
+            header,
+            'logGroupName,logStreamName,timestamp,ingestionTime,eventId,message'
+        )
+        line = format_event(dict(EVENT, eventId='1'))
+        self.assertEqual(
+            line, 'group,stream,1000,2500,1,"{""level"": ""info""}\n"'
+        )
+        self.assertEqual(
+            next(csv.reader(io.StringIO(line), strict=True)),
+            ['group', 'stream', '1000', '2500', '1', EVENT['message']]
+        )
+        event = dict(EVENT, eventId='1', message='plain')
+        del event['ingestionTime']
+        self.assertEqual(format_event(event), 'group,stream,1000,,1,plain')
+
+    def test_csv_query(self):
+        header, format_event = build_record_formatter(
+            'csv', compile_query('level')
+        )
+        self.assertTrue(header.endswith(',message,query'))
+        self.assertTrue(format_event(EVENT).endswith(',info'))
+
+    def test_raw(self):
+        _, format_event = build_record_formatter('raw')
+        self.assertEqual(format_event(EVENT), '{"level": "info"}')
+        _, format_event = build_record_formatter('raw', compile_query('level'))
+        self.assertEqual(format_event(EVENT), 'info')
+
+    def test_unknown_output(self):
+        with self.assertRaises(ValueError):
+            build_record_formatter('xml')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+import unittest
+from unittest.mock import MagicMock, patch
+from botocore.exceptions import ClientError
+from awslogs.exceptions import InsightsQueryError
+from awslogs.insights import InsightsQuery, result_to_dict, split_range
+
+
+def result(**fields):
+    return [{'field': name, 'value': value} for name, value in fields.items()]
+
+
+def event(ptr, message):
+    return result(**{'@message': message, '@ptr': ptr})
+
+
+class TestInsightsQuery(unittest.TestCase):
+    def setUp(self):
+        self.client = MagicMock()
+        self.client.start_query.return_value = {'queryId': 'q1'}
+        patcher = patch('awslogs.insights.time.sleep')
+        self.sleep = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def make_query(self, query_string='fields @message', groups=('g',),
+                   start=0, end=3600 * 1000, **kwargs):
+        return InsightsQuery(self.client, query_string, list(groups), start,
+                             end, **kwargs)
+
+    def test_result_to_dict(self):
+        self.assertEqual(result_to_dict(result(a='1', b='2')),
+                         {'a': '1', 'b': '2'})
+
+    def test_split_range(self):
+        self.assertEqual(split_range(0, 10, 4), [(0, 4), (4, 8), (8, 10)])
+        self.assertEqual(split_range(0, 4, 4), [(0, 4)])
+
+    def test_subqueries(self):
+        groups = ['g{}'.format(i) for i in range(60)]
+        query = self.make_query(groups=groups, start=500, end=50 * 3600 * 1000,
+                                limit=100)
+        subqueries = query.subqueries()
+        self.assertEqual(
+            [(q['startTime'], q['endTime'], len(q['logGroupNames']))
+             for q in subqueries],
+            [(0, 86400, 50), (0, 86400, 10),
+             (86400, 172800, 50), (86400, 172800, 10),
+             (172800, 180000, 50), (172800, 180000, 10)]
+        )
+        self.assertEqual(subqueries[0]['limit'], 100)
+        self.assertEqual(subqueries[0]['queryString'], 'fields @message')
+
+    def test_aggregations_are_not_split(self):
+        query = self.make_query('stats count(*) by bin(1h)', end=50 * 3600 * 1000)
+        self.assertEqual(len(query.subqueries()), 1)
+        query = self.make_query('fields @message | limit 5', end=50 * 3600 * 1000)
+        self.assertEqual(len(query.subqueries()), 1)
+        query = self.make_query('fields @timestamp, @message | sort @timestamp desc',
+                                end=50 * 3600 * 1000)
+        self.assertEqual(len(query.subqueries()), 1)
+
+    def test_streams_partial_results(self):
+        self.client.get_query_results.side_effect = [
+            {'status': 'Scheduled'},
+            {'status': 'Running', 'results': [event('a', 'one')]},
+            {'status': 'Running',
+             'results': [event('a', 'one'), event('b', 'two')]},
+            {'status': 'Complete',
+             'results': [event('a', 'one'), event('b', 'two'),
+                         event('c', 'three')],
+             'statistics': {'recordsMatched': 3.0, 'bytesScanned': 10.0}},
+        ]
+        query = self.make_query()
+        rows = iter(query)
+        self.assertEqual(next(rows), {'@message': 'one'})
+        self.assertEqual(list(rows), [{'@message': 'two'}, {'@message': 'three'}])
+        self.assertEqual(query.statistics,
+                         {'recordsMatched': 3.0, 'bytesScanned': 10.0})
+        self.client.get_query_results.assert_called_with(queryId='q1')
+        self.client.stop_query.assert_not_called()
+        # Backs off while no new rows arrive
+        self.assertEqual([c[0][0] for c in self.sleep.call_args_list],
+                         [0.5, 0.5, 0.5])
+
+    def test_aggregations_wait_until_complete(self):
+        self.client.get_query_results.side_effect = [
+            {'status': 'Running', 'results': [result(count='1')]},
+            {'status': 'Complete', 'results': [result(count='2')]},
+        ]
+        self.assertEqual(list(self.make_query('stats count(*) as count')),
+                         [{'count': '2'}])
+
+    def test_sorted_events_wait_until_complete(self):
+        self.client.get_query_results.side_effect = [
+            {'status': 'Running', 'results': [event('a', 'one')]},
+            {'status': 'Complete',
+             'results': [event('c', 'three'), event('b', 'two')]},
+        ]
+        query = self.make_query('fields @message | sort @timestamp desc | limit 2')
+        self.assertEqual(list(query),
+                         [{'@message': 'three'}, {'@message': 'two'}])
+
+    def test_concurrent_query_limit(self):
+        self.client.start_query.side_effect = [
+            ClientError({'Error': {'Code': 'LimitExceededException'}},
+                        'StartQuery'),
+            {'queryId': 'q1'},
+        ]
+        self.client.get_query_results.return_value = {
+            'status': 'Complete', 'results': [event('a', 'one')]
+        }
+        self.assertEqual(list(self.make_query()), [{'@message': 'one'}])
+        self.assertEqual(self.client.start_query.call_count, 2)
+
+    def test_failed_query(self):
+        self.client.get_query_results.return_value = {'status': 'Failed'}
+        with self.assertRaises(InsightsQueryError):
+            list(self.make_query())
+
+    def test_stops_running_queries(self):
+        self.client.get_query_results.return_value = {
+            'status': 'Running', 'results': [event('a', 'one')]
+        }
+        rows = iter(self.make_query())
+        next(rows)
+        rows.close()
+        self.client.stop_query.assert_called_once_with(queryId='q1')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+from awslogs.merge import merge_pages
+
+
+def pages(*timestamps_per_page):
+    for timestamps in timestamps_per_page:
+        yield {'events': [{'timestamp': ts} for ts in timestamps]}
+    yield None
+
+
+class TestMergePages(unittest.TestCase):
+    def test_merges_by_timestamp(self):
+        merged = merge_pages([
+            pages([1, 4], [6, 9]),
+            pages([2, 3, 8]),
+            pages(),
+        ], page_size=3)
+
+        result = []
+        for page in merged:
+            if page is None:
+                break
+            self.assertLessEqual(len(page['events']), 3)
+            result.extend(e['timestamp'] for e in page['events'])
+        merged.close()
+        self.assertEqual(result, [1, 2, 3, 4, 6, 8, 9])
+
+    def test_rounds(self):
+        def watched():
+            yield {'events': [{'timestamp': 1}]}
+            yield None
+            yield {'events': [{'timestamp': 5}]}
+            yield None
+
+        merged = merge_pages([watched(), pages([2])])
+        self.assertEqual(next(merged), {'events': [{'timestamp': 1}, {'timestamp': 2}]})
+        self.assertIsNone(next(merged))
+        self.assertEqual(next(merged), {'events': [{'timestamp': 5}]})
+        self.assertIsNone(next(merged))
+        merged.close()
+
+    def test_errors_are_raised(self):
+        def failing():
+            yield {'events': [{'timestamp': 1}]}
+            raise ValueError("boom")
+
+        merged = merge_pages([failing(), pages([2])])
+        with self.assertRaises(ValueError):
+            next(merged)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import errno
+import io
+import unittest
+from unittest.mock import MagicMock, patch
+from awslogs.output import OutputSink
+
+
+class TestOutputSink(unittest.TestCase):
+    def test_page_policy_buffers_until_end_of_page(self):
+        stream = MagicMock()
+        sink = OutputSink(stream, policy="page")
+        sink.write("one")
+        sink.write("two")
+        stream.write.assert_not_called()
+
+        sink.end_page()
+        stream.write.assert_called_once_with("one\ntwo\n")
+        stream.flush.assert_called_once()
+
+    def test_line_policy_flushes_every_line(self):
+        stream = MagicMock()
+        sink = OutputSink(stream, policy="line")
+        sink.write("one")
+        sink.write("two")
+        self.assertEqual(stream.write.call_count, 2)
+        self.assertEqual(stream.flush.call_count, 2)
+
+    def test_block_policy_ignores_end_of_page(self):
+        stream = io.StringIO()
+        sink = OutputSink(stream, policy="block", max_bytes=8)
+        sink.write("1234")
+        sink.end_page()
+        self.assertEqual(stream.getvalue(), "")
+        sink.write("5678")
+        self.assertEqual(stream.getvalue(), "1234\n5678\n")
+
+    def test_buffer_size_limit(self):
+        stream = io.StringIO()
+        sink = OutputSink(stream, policy="page", max_bytes=8)
+        sink.write("1234")
+        self.assertEqual(stream.getvalue(), "")
+        sink.write("5678")
+        self.assertEqual(stream.getvalue(), "1234\n5678\n")
+
+    def test_buffer_delay_limit(self):
+        stream = io.StringIO()
+        sink = OutputSink(stream, policy="page", max_delay=1.0)
+        with patch('awslogs.output.time.monotonic', side_effect=[0, 0.5, 2.0]):
+            sink.write("one")
+            sink.write("two")
+            self.assertEqual(stream.getvalue(), "")
+            sink.write("three")
+        self.assertEqual(stream.getvalue(), "one\ntwo\nthree\n")
+
+    def test_auto_policy(self):
+        tty = MagicMock()
+        tty.isatty.return_value = True
+        self.assertEqual(OutputSink(tty, watch=True).policy, "line")
+        self.assertEqual(OutputSink(tty, watch=False).policy, "page")
+
+        pipe = MagicMock()
+        pipe.isatty.return_value = False
+        self.assertEqual(OutputSink(pipe, watch=True).policy, "page")
+
+    def test_broken_pipe_is_raised(self):
+        stream = MagicMock()
+        stream.write.side_effect = IOError(errno.EPIPE, "Broken pipe")
+        sink = OutputSink(stream, policy="page")
+        sink.write("one")
+        with self.assertRaises(IOError):
+            sink.flush()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,39 @@
+import unittest
+from unittest.mock import patch
+from awslogs.polling import AdaptivePoller
+
+
+class TestAdaptivePoller(unittest.TestCase):
+    def test_backoff_and_reset(self):
+        poller = AdaptivePoller(1, 10, burst_events=100)
+        self.assertEqual(
+            [poller.wait_time(0) for _ in range(6)], [1, 2, 4, 8, 10, 10]
+        )
+        # New events reset the interval
+        self.assertEqual(poller.wait_time(3), 1)
+        self.assertEqual(poller.wait_time(0), 1)
+        self.assertEqual(poller.wait_time(0), 2)
+
+    def test_burst(self):
+        poller = AdaptivePoller(1, 10, burst_events=100)
+        poller.wait_time(0)
+        poller.wait_time(0)
+        self.assertEqual(poller.wait_time(100), 0)
+        self.assertEqual(poller.wait_time(0), 1)
+
+    def test_max_interval_below_min(self):
+        poller = AdaptivePoller(5, 1, burst_events=100)
+        self.assertEqual([poller.wait_time(0) for _ in range(2)], [5, 5])
+
+    def test_poll_rate(self):
+        with patch('awslogs.polling.time.monotonic', return_value=0):
+            poller = AdaptivePoller(1, 10, burst_events=100)
+        for _ in range(5):
+            poller.wait_time(0)
+        with patch('awslogs.polling.time.monotonic', return_value=30):
+            self.assertEqual(poller.poll_rate(), 10.0)
+            self.assertIn("effective poll rate: 10.0/min", poller.summary())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import json
+import unittest
+from unittest.mock import patch
+from awslogs import query
+from awslogs.query import (
+    FieldPath, compile_query, json_dumps_compact, query_message, query_value
+)
+
+
+class TestQuery(unittest.TestCase):
+    def test_field_paths_skip_jmespath(self):
+        compiled = compile_query('a.b_2.c')
+        self.assertIsInstance(compiled, FieldPath)
+        self.assertEqual(compiled.search({'a': {'b_2': {'c': 1}}}), 1)
+        self.assertIsNone(compiled.search({'a': {'b_2': 'text'}}))
+        self.assertIsNone(compiled.search({'x': 1}))
+
+        self.assertNotIsInstance(compile_query('a[0].b'), FieldPath)
+        self.assertNotIsInstance(compile_query('a.b || c'), FieldPath)
+
+    def test_compiled_queries_are_cached(self):
+        self.assertIs(compile_query('items[*].id'), compile_query('items[*].id'))
+
+    def test_field_paths_match_jmespath(self):
+        import jmespath
+        documents = [
+            {'a': {'b': 'x'}},
+            {'a': {'b': [1, 2]}},
+            {'a': [{'b': 1}]},
+            {'a': None},
+            {},
+        ]
+        for document in documents:
+            self.assertEqual(
+                FieldPath('a.b').search(document),
+                jmespath.search('a.b', document)
+            )
+
+    def test_query_message(self):
+        message = json.dumps({'level': 'error', 'ctx': {'user': 7, 'tags': ['x']}})
+        self.assertEqual(query_message(compile_query('level'), message), 'error')
+        self.assertEqual(query_message(compile_query('ctx.user'), message), '7')
+        self.assertEqual(query_message(compile_query('ctx.tags'), message), '["x"]')
+        self.assertEqual(query_message(compile_query('missing'), message), 'null')
+
+    def test_query_message_not_json(self):
+        compiled = compile_query('level')
+        self.assertEqual(query_message(compiled, 'plain text'), 'plain text')
+        self.assertEqual(query_message(compiled, ''), '')
+        self.assertEqual(query_message(compiled, '{broken'), '{broken')
+
+    def test_query_value(self):
+        query_ = compile_query('a')
+        self.assertEqual(query_value(query_, '{"a": [1, 2]}'), [1, 2])
+        self.assertIsNone(query_value(query_, 'not json'))
+        self.assertEqual(query_value(query_, '{broken', 'default'), 'default')
+
+    def test_json_dumps_compact(self):
+        self.assertEqual(json_dumps_compact({'a': [1, 'é']}), '{"a":[1,"é"]}')
+
+    def test_fallback_json_parser(self):
+        with patch.object(query, 'json_loads', json.loads):
+            self.assertEqual(query_message(compile_query('a'), '{"a": "b"}'), 'b')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import os
+import subprocess
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Top level packages that slow the command line down before it even gets to
+# parse its arguments
+HEAVY_PACKAGES = ('boto3', 'botocore', 'jmespath', 'dateutil')
+
+# awslogs modules only needed once there is a command to run
+COMMAND_MODULES = ('awslogs.core', 'awslogs.daemon')
+
+
+def importtime(code):
+    """Run ``code`` in a new interpreter with ``-X importtime`` and return
+    the cumulative import time, in microseconds, of every module imported."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    if result.returncode:
+        raise AssertionError(result.stderr[-2000:])
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        modules[name.strip()] = int(cumulative)
+    return modules
+
+
+def heavy_imports(modules):
+    return sorted(name for name in modules
+                  if name.split('.')[0] in HEAVY_PACKAGES
+                  or name in COMMAND_MODULES)
+
+
+class TestStartup(unittest.TestCase):
+    def test_cli_import_is_light(self):
+        modules = importtime('import awslogs.bin')
+        self.assertIn('awslogs.bin', modules)
+        self.assertEqual(heavy_imports(modules), [])
+
+    def test_version_is_light(self):
+        modules = importtime(
+            'import sys\n'
+            'from awslogs.bin import main\n'
+            'sys.stdout = open("/dev/null", "w")\n'
+            'main(["awslogs", "--version"])'
+        )
+        self.assertIn('awslogs.bin', modules)
+        self.assertEqual(heavy_imports(modules), [])
+
+    def test_jmespath_only_for_expressions(self):
+        modules = importtime(
+            'from awslogs.query import compile_query\n'
+            'compile_query("ctx.user.id")'
+        )
+        self.assertNotIn('jmespath', modules)
+
+        modules = importtime(
+            'from awslogs.query import compile_query\n'
+            'compile_query("items[0].id")'
+        )
+        self.assertIn('jmespath', modules)
+
+    def test_dateutil_only_for_absolute_dates(self):
+        code = (
+            'from unittest.mock import MagicMock, patch\n'
+            'from awslogs.core import AWSLogs\n'
+            'with patch("awslogs.core.boto3_client", MagicMock()):\n'
+            '    logs = AWSLogs(aws_region="us-east-1")\n'
+            'logs.parse_datetime({0!r})'
+        )
+        self.assertNotIn('dateutil.parser', importtime(code.format('5m')))
+        self.assertIn('dateutil.parser', importtime(code.format('2024-01-01 10:00')))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import os
+import shutil
+import tempfile
+import unittest
+from awslogs.store import EventStore, merge_ranges, subtract_ranges
+
+
+def event(event_id, stream, timestamp):
+    return {'eventId': event_id, 'logStreamName': stream,
+            'timestamp': timestamp, 'ingestionTime': timestamp + 1,
+            'message': 'message {}'.format(event_id)}
+
+
+class TestRanges(unittest.TestCase):
+    def test_merge_ranges(self):
+        self.assertEqual(merge_ranges([(5, 8), (0, 2), (2, 3), (7, 10)]),
+                         [(0, 3), (5, 10)])
+        self.assertEqual(merge_ranges([]), [])
+
+    def test_subtract_ranges(self):
+        self.assertEqual(subtract_ranges(0, 10, []), [(0, 10)])
+        self.assertEqual(subtract_ranges(0, 10, [(2, 4), (6, 7)]),
+                         [(0, 2), (4, 6), (7, 10)])
+        self.assertEqual(subtract_ranges(3, 10, [(0, 5), (8, 20)]), [(5, 8)])
+        self.assertEqual(subtract_ranges(3, 10, [(0, 20)]), [])
+
+
+class TestEventStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.store = EventStore.for_account(('default', 'us-east-1', None),
+                                            self.directory)
+        self.addCleanup(self.store.close)
+
+    def test_for_account(self):
+        self.assertTrue(self.store.path.startswith(
+            os.path.join(self.directory, 'store')))
+        other = EventStore.for_account(('other', 'us-east-1', None),
+                                       self.directory)
+        self.addCleanup(other.close)
+        self.assertNotEqual(other.path, self.store.path)
+
+    def test_missing_ranges(self):
+        store = self.store
+        self.assertEqual(store.missing_ranges('g', [], 0, 100), [(0, 100)])
+
+        store.add_coverage('g', ['a', 'b'], 0, 50)
+        store.add_coverage('g', ['a'], 50, 80)
+        self.assertEqual(store.missing_ranges('g', ['a'], 0, 100), [(80, 100)])
+        self.assertEqual(store.missing_ranges('g', ['a', 'b'], 0, 100),
+                         [(50, 100)])
+        # Single streams don't cover the whole group
+        self.assertEqual(store.missing_ranges('g', [], 0, 100), [(0, 100)])
+
+        store.add_coverage('g', [], 60, 90)
+        self.assertEqual(store.missing_ranges('g', ['a', 'b'], 0, 100),
+                         [(50, 60), (90, 100)])
+        self.assertEqual(store.missing_ranges('g', [], 0, 100),
+                         [(0, 60), (90, 100)])
+        self.assertEqual(store.missing_ranges('other', [], 0, 100), [(0, 100)])
+
+    def test_coverage_is_merged(self):
+        self.store.add_coverage('g', [], 0, 10)
+        self.store.add_coverage('g', [], 10, 20)
+        self.store.add_coverage('g', [], 30, 40)
+        self.assertEqual(self.store._coverage('g', ''), [(0, 20), (30, 40)])
+
+    def test_iter_events(self):
+        self.store.add_events('g1', [event('1', 'a', 30), event('2', 'b', 10)])
+        self.store.add_events('g2', [event('3', 'a', 20), event('4', 'c', 40)])
+        # Events already stored are ignored
+        self.store.add_events('g1', [event('1', 'a', 30)])
+
+        pages = list(self.store.iter_events(['g1', 'g2'], {}, 0, 100,
+                                            page_size=3))
+        self.assertEqual([len(page['events']) for page in pages], [3, 1])
+        events = [e for page in pages for e in page['events']]
+        self.assertEqual([e['eventId'] for e in events], ['2', '3', '1', '4'])
+        self.assertEqual(events[0].to_dict(),
+                         dict(event('2', 'b', 10), logGroupName='g1'))
+
+        pages = self.store.iter_events(['g1', 'g2'], {'g2': ['c']}, 0, 40)
+        self.assertEqual(
+            [e['eventId'] for page in pages for e in page['events']],
+            ['2', '1']
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
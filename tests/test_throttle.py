@@ -0,0 +1,155 @@
+import unittest
+from unittest.mock import MagicMock, patch
+from botocore.awsrequest import AWSResponse
+from botocore.exceptions import ClientError, EndpointConnectionError
+from awslogs.core import boto3_client
+from awslogs.throttle import ThrottledClient, TokenBucket
+
+
+def throttling_error(operation='FilterLogEvents'):
+    return ClientError(
+        {'Error': {'Code': 'ThrottlingException', 'Message': 'Rate exceeded'}},
+        operation
+    )
+
+
+class TestTokenBucket(unittest.TestCase):
+    def test_waits_for_tokens(self):
+        sleeps = []
+        clock = [100.0]
+
+        def sleep(seconds):
+            sleeps.append(seconds)
+            clock[0] += seconds
+
+        with patch('awslogs.throttle.time.monotonic', side_effect=lambda: clock[0]), \
+                patch('awslogs.throttle.time.sleep', side_effect=sleep):
+            bucket = TokenBucket(2)
+            for _ in range(4):
+                bucket.acquire()
+
+        # Two tokens in the bucket, then one every half a second
+        self.assertEqual(sleeps, [0.5, 0.5])
+
+    def test_adapts_rate(self):
+        bucket = TokenBucket(16)
+        bucket.throttled()
+        self.assertEqual(bucket.rate, 8)
+        for _ in range(10):
+            bucket.throttled()
+        self.assertEqual(bucket.rate, 1)
+        bucket.succeeded()
+        self.assertAlmostEqual(bucket.rate, 1.8)
+        for _ in range(100):
+            bucket.succeeded()
+        self.assertEqual(bucket.rate, 16)
+
+
+class TestThrottledClient(unittest.TestCase):
+    def setUp(self):
+        self.mock_client = MagicMock()
+        self.client = ThrottledClient(self.mock_client, {'filter_log_events': 1000})
+        self.sleep_patcher = patch('awslogs.throttle.time.sleep')
+        self.mock_sleep = self.sleep_patcher.start()
+
+    def tearDown(self):
+        self.sleep_patcher.stop()
+
+    def test_retries_throttled_requests(self):
+        self.mock_client.filter_log_events.side_effect = [
+            throttling_error(), throttling_error(), {'events': []}
+        ]
+        self.assertEqual(self.client.filter_log_events(logGroupName='g'), {'events': []})
+        self.assertEqual(self.mock_client.filter_log_events.call_count, 3)
+        self.assertEqual(self.client.throttles['filter_log_events'], 2)
+
+        delays = [c[0][0] for c in self.mock_sleep.call_args_list]
+        self.assertEqual(len(delays), 2)
+        for delay in delays:
+            self.assertGreaterEqual(delay, ThrottledClient.BASE_DELAY)
+            self.assertLessEqual(delay, ThrottledClient.MAX_DELAY)
+
+    def test_gives_up_after_max_retries(self):
+        self.mock_client.filter_log_events.side_effect = throttling_error()
+        with self.assertRaises(ClientError):
+            self.client.filter_log_events(logGroupName='g')
+        self.assertEqual(
+            self.mock_client.filter_log_events.call_count,
+            ThrottledClient.MAX_RETRIES + 1
+        )
+
+    def test_other_errors_are_not_retried(self):
+        self.mock_client.filter_log_events.side_effect = ClientError(
+            {'Error': {'Code': 'ResourceNotFoundException'}}, 'FilterLogEvents'
+        )
+        with self.assertRaises(ClientError):
+            self.client.filter_log_events(logGroupName='g')
+        self.assertEqual(self.mock_client.filter_log_events.call_count, 1)
+        self.assertEqual(sum(self.client.throttles.values()), 0)
+
+    def test_retries_server_and_connection_errors(self):
+        self.mock_client.filter_log_events.side_effect = [
+            ClientError({'Error': {'Code': 'ServiceUnavailableException'},
+                         'ResponseMetadata': {'HTTPStatusCode': 503}},
+                        'FilterLogEvents'),
+            EndpointConnectionError(endpoint_url='https://logs'),
+            {'events': []},
+        ]
+        self.assertEqual(self.client.filter_log_events(logGroupName='g'), {'events': []})
+        self.assertEqual(self.mock_client.filter_log_events.call_count, 3)
+        self.assertEqual(sum(self.client.throttles.values()), 0)
+        self.assertEqual(self.client._buckets['filter_log_events'].rate, 1000)
+
+    def test_paginator(self):
+        self.mock_client.describe_log_groups.side_effect = [
+            {'logGroups': [{'logGroupName': 'a'}], 'nextToken': 't1'},
+            throttling_error('DescribeLogGroups'),
+            {'logGroups': [{'logGroupName': 'b'}]},
+        ]
+        paginator = self.client.get_paginator('describe_log_groups')
+        pages = list(paginator.paginate(logGroupNamePrefix='x'))
+
+        self.assertEqual([p['logGroups'][0]['logGroupName'] for p in pages], ['a', 'b'])
+        self.mock_client.describe_log_groups.assert_called_with(
+            logGroupNamePrefix='x', nextToken='t1'
+        )
+        self.mock_client.get_paginator.assert_not_called()
+
+    def test_other_attributes_are_forwarded(self):
+        self.assertIs(self.client.meta, self.mock_client.meta)
+        self.client.get_paginator('describe_queries')
+        self.mock_client.get_paginator.assert_called_once_with('describe_queries')
+
+
+
+class _Raw(object):
+    def __init__(self, body):
+        self.body = body
+
+    def stream(self, **kwargs):
+        yield self.body
+
+
+class TestBotocoreClient(unittest.TestCase):
+    def test_every_throttle_is_seen(self):
+        # Answers every request botocore sends with a throttling error
+        client = boto3_client(None, 'key', 'secret', None, 'us-east-1', None)
+        requests = []
+
+        def send(request, **kwargs):
+            requests.append(request)
+            body = b'{"__type": "ThrottlingException", "message": "Rate exceeded"}'
+            return AWSResponse(request.url, 400, {}, _Raw(body))
+
+        client.meta.events.register('before-send.logs.FilterLogEvents', send)
+        with patch('awslogs.throttle.time.sleep'):
+            with self.assertRaises(ClientError):
+                client.filter_log_events(logGroupName='g')
+
+        self.assertEqual(len(requests), ThrottledClient.MAX_RETRIES + 1)
+        self.assertEqual(client.throttles['filter_log_events'],
+                         ThrottledClient.MAX_RETRIES + 1)
+
+
+if __name__ == '__main__':
+    unittest.main()